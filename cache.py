@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import sqlite3
+
+import ujson
+
+from constants import DIALECT
+
+"""
+On-disk (SQLite) cache of verification results, keyed by a normalized hash of
+(sql1, sql2, schema, constraints, dialect, semantics) and the bound size.
+
+Results are only reused at the same bound size: base tables have exactly `bound_size` tuples, so a result at one bound
+size implies nothing at another, e.g., `SELECT COUNT(*) FROM T` and `SELECT 2 * COUNT(*) - 2 FROM T` are only
+equivalent at bound size 2.
+"""
+
+
+def _normalize_sql(sql: str):
+    sql = ' '.join(sql.split())
+    return sql[:-1].rstrip() if sql.endswith(';') else sql
+
+
+def _normalize_schema(schema):
+    return {
+        str.upper(name): {str.upper(attr): str.upper(type or 'INTEGER') for attr, type in attributes.items()}
+        for name, attributes in schema.items()
+    }
+
+
+class ResultCache:
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.file = os.path.join(directory, 'results.sqlite3')
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self):
+        # a SQLite connection must not be shared with forked workers
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.file, timeout=60)
+            self._pid = os.getpid()
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT, bound_size INTEGER, state TEXT, traversing_time REAL, solving_time REAL, '
+                'counterexample TEXT, PRIMARY KEY (key, bound_size))'
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def key(sql1, sql2, schema, constraints=None, dialect=DIALECT.ALL, semantics=None):
+        content = ujson.dumps(
+            [_normalize_sql(sql1), _normalize_sql(sql2), _normalize_schema(schema), constraints, dialect, semantics],
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def lookup(self, key, bound_size):
+        """
+        return {'state', 'traversing_time', 'solving_time', 'counterexample', 'bound_size'} or None, where
+        `counterexample` is the JSON object given to `store`
+        """
+        row = self.conn.execute(
+            'SELECT state, traversing_time, solving_time, counterexample, bound_size FROM results '
+            'WHERE key = ? AND bound_size = ?', (key, bound_size),
+        ).fetchone()
+        if row is None:
+            return None
+        result = dict(zip(['state', 'traversing_time', 'solving_time', 'counterexample', 'bound_size'], row))
+        if result['counterexample'] is not None:
+            try:
+                result['counterexample'] = ujson.loads(result['counterexample'])
+            except ValueError:
+                # written by an older version
+                return None
+        return result
+
+    def store(self, key, bound_size, state, traversing_time=None, solving_time=None, counterexample=None):
+        if counterexample is not None:
+            counterexample = ujson.dumps(counterexample, ensure_ascii=False)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+            (key, bound_size, state, traversing_time, solving_time, counterexample),
+        )
+        self.conn.commit()
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+__all__ = [
+    'ResultCache',
+]
@@ -75,6 +75,37 @@ class DIALECT:
     ORACLE = "oracle"
 
 
+class SORT_ENCODING:
+    # ORDER BY/LIMIT encodings
+    BUBBLE = "bubble"  # two bubble-sort passes, O(n^2) comparators
+    NETWORK = "network"  # Batcher's odd-even merge sorting network, O(n log^2 n) comparators
+    PERMUTATION = "permutation"  # n x n permutation matrix with adjacent order constraints
+
+
+class BAG_ENCODING:
+    # bag equality encodings
+    PAIRWISE = "pairwise"  # column-wise comparison of every 2 tuples, counted on both tables
+    FINGERPRINT = "fingerprint"  # one injective fingerprint term per tuple, counted on the 1st table only
+
+
+class GROUP_ENCODING:
+    # GROUP BY partition encodings
+    PAIRWISE = "pairwise"  # group(t_j, i) compares the keys of t_j with every previous group leader t_i, O(n^2)
+    GROUP_ID = "group_id"  # an integer group id per tuple, keys compared through fingerprints, O(n)
+
+
+class KEY_ENCODING:
+    # PRIMARY KEY encodings
+    PAIRWISE = "pairwise"  # the keys of every 2 tuples differ, O(n^2) disequalities
+    DISTINCT = "distinct"  # `Distinct` over single-column keys, an injective key -> tuple index function otherwise
+
+
+class FOREIGN_KEY_ENCODING:
+    # FOREIGN KEY encodings
+    DISJUNCTION = "disjunction"  # every referencing tuple equals one of all referenced tuples, O(n * m)
+    WITNESS = "witness"  # every referencing tuple equals the referenced tuple at its witness index, O(n + m)
+
+
 class STATE:
     EQUIV = "EQU"
     NON_EQUIV = "NEQ"
@@ -4,46 +4,147 @@ import datetime
 import itertools
 import operator
 import os.path
+import re
+import sqlite3
 from collections import Counter
 
-import mysql.connector
 import ujson
 import utils
 import yaml
 from tqdm import tqdm
 
+"""
+Validate counterexamples by running both queries over them on a DBMS. The database lives behind a backend:
+    - `SQLiteBackend`: an in-memory SQLite database, which needs no external service and is re-opened per reset;
+    - `MySQLBackend`: a MySQL database, which is dropped and re-created per reset, or, with `pool`, keeps its connection
+        and only deletes rows of created tables in one transaction per reset.
+"""
 
-class CounterexampleChecker:
-    operator_map = {
-        'gt': operator.gt,
-        'gte': operator.ge,
-        'lt': operator.lt,
-        'lte': operator.le,
-        'neq': operator.ne,
-        'eq': operator.eq,
-    }
+CREATE_TABLE = re.compile(r'^\s*CREATE\s+TABLE\s+(\w+)', re.IGNORECASE)
+
+
+class SQLiteBackend:
+    Error = sqlite3.Error
+
+    def __init__(self, config=None):
+        self.config = config
+        self._connect()
+
+    def _connect(self):
+        self.cnx = sqlite3.connect(':memory:')
+        self.cursor = self.cnx.cursor()
 
+    def execute(self, statement):
+        self.cursor.execute(statement)
+
+    def commit(self):
+        self.cnx.commit()
+
+    def reset(self):
+        self.close()
+        self._connect()
+
+    def close(self):
+        self.cursor.close()
+        self.cnx.close()
+
+
+class MySQLBackend:
     def __init__(self, config):
+        import mysql.connector
+
+        self.Error = mysql.connector.Error
         self.config = config
+        self.pool = config.get('pool', False)
+        # table name -> CREATE TABLE statement, only for pooled connections
+        self.tables = {}
+        self._create_database()
         self.cnx = mysql.connector.connect(
+            host=self.config['host'],
+            user=self.config['user'],
+            password=self.config['password'],
+            database=self.config['database']
+        )
+        self.cursor = self.cnx.cursor(buffered=True)
+        # self.cursor.execute("SET GLOBAL sql_mode=(SELECT REPLACE(@@sql_mode,'ONLY_FULL_GROUP_BY',''));")
+
+    def _create_database(self):
+        import mysql.connector
+
+        cnx = mysql.connector.connect(
             host=self.config['host'],
             user=self.config['user'],
             password=self.config['password']
         )
-        cursor = self.cnx.cursor()
+        cursor = cnx.cursor()
         cursor.execute(f"DROP DATABASE IF EXISTS {self.config['database']}")
         cursor.execute(f"CREATE DATABASE {self.config['database']}")
         cursor.close()
+        cnx.close()
+
+    def execute(self, statement):
+        match = CREATE_TABLE.match(statement) if self.pool else None
+        if match is not None:
+            # reuse an (empty) table of the same definition
+            name, statement = match.group(1), statement.strip()
+            if self.tables.get(name) == statement:
+                return
+            if name in self.tables:
+                self.cursor.execute(f"DROP TABLE {name}")
+            self.cursor.execute(statement)
+            self.tables[name] = statement
+        else:
+            self.cursor.execute(statement)
+
+    def commit(self):
+        self.cnx.commit()
+
+    def reset(self):
+        if self.pool:
+            # a single transaction; DELETE instead of TRUNCATE since the latter implicitly commits
+            try:
+                for name in self.tables:
+                    self.cursor.execute(f"DELETE FROM {name}")
+                self.cnx.commit()
+            except self.Error:
+                self.cnx.rollback()
+                self.close()
+                self.__init__(self.config)
+        else:
+            self.close()
+            self.__init__(self.config)
+
+    def close(self):
+        self.cursor.execute(f"DROP DATABASE {self.config['database']}")
+        self.cursor.close()
         self.cnx.close()
 
-        self.cnx = mysql.connector.connect(
-            host=self.config['host'],
-            user=self.config['user'],
-            password=self.config['password'],
-            database=self.config['database']
-        )
-        self.cursor = self.cnx.cursor(buffered=True)
-        # self.cursor.execute("SET GLOBAL sql_mode=(SELECT REPLACE(@@sql_mode,'ONLY_FULL_GROUP_BY',''));")
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'mysql': MySQLBackend,
+}
+
+
+class CounterexampleChecker:
+    operator_map = {
+        'gt': operator.gt,
+        'gte': operator.ge,
+        'lt': operator.lt,
+        'lte': operator.le,
+        'neq': operator.ne,
+        'eq': operator.eq,
+    }
+
+    def __init__(self, config):
+        """`config['backend']` is one of `BACKENDS` (default: mysql)"""
+        self.config = config
+        self.backend = BACKENDS[self.config.get('backend', 'mysql')](self.config)
+        self.Error = self.backend.Error
+
+    @property
+    def cursor(self):
+        return self.backend.cursor
 
     def __enter__(self):
         return self
@@ -52,11 +153,11 @@ class CounterexampleChecker:
         if isinstance(statements, dict):
             statements = statements['tables']
             for table, statement in statements.items():
-                self.cursor.execute(statement)
+                self.backend.execute(statement)
         else:
             for statement in statements.split(';')[:-1]:
-                self.cursor.execute(statement)
-        self.cnx.commit()
+                self.backend.execute(statement)
+        self.backend.commit()
 
     def run_query(self, query: str) -> list:
         self.cursor.execute(query)
@@ -70,10 +171,32 @@ class CounterexampleChecker:
             # bag semantics
             return Counter(self.run_query(q1)) == Counter(self.run_query(q2))
 
+    def _fetch_tables(self, constraints: list[dict]) -> dict:
+        """table -> (header, rows), one `SELECT *` per table referenced by constraints"""
+        tables = {}
+        for c in constraints:
+            operands = next(iter(c.values()))
+            if not isinstance(operands, list):
+                operands = [operands]
+            for operand in operands:
+                if isinstance(operand, dict) and isinstance(operand.get('value'), str) and '__' in operand['value']:
+                    table = operand['value'].split('__')[0]
+                    if table not in tables:
+                        self.cursor.execute(f"SELECT * FROM {table}")
+                        tables[table] = ([a[0] for a in self.cursor.description], self.cursor.fetchall())
+        return tables
+
     def check_database_integrity(self, constraints: list[dict]) -> bool:
         if constraints is None:
             return True
 
+        tables = self._fetch_tables(constraints)
+
+        def _column(operand):
+            table, column = operand['value'].split('__')[:2]
+            header, rows = tables[table]
+            return header, rows, header.index(column)
+
         for c in constraints:
             key = next(iter(c))
             match key:
@@ -81,94 +204,48 @@ class CounterexampleChecker:
                     columns = c[key]
                     if not isinstance(columns, list):
                         columns = [columns]
-                    table = columns[0]['value'].split('__')[0]
-                    columns = [col['value'].split('__')[1] for col in columns]
-
-                    self.cursor.execute(f"SELECT * FROM {table}")
-                    header = [a[0] for a in self.cursor.description]
-                    rows = self.cursor.fetchall()
-                    pk_indices = [header.index(col) for col in columns]
-                    visited = []
-                    for row in rows:
-                        row_values = [row[index] for index in pk_indices]
-                        if row_values in visited:
-                            return False
-                        visited.append(row_values)
+                    header, rows, _ = _column(columns[0])
+                    pk_indices = [header.index(col['value'].split('__')[1]) for col in columns]
+                    if len({tuple(row[index] for index in pk_indices) for row in rows}) < len(rows):
+                        return False
                 case 'foreign':
-                    table = c[key][0]['value'].split('__')[0]
-                    column = c[key][0]['value'].split('__')[1]
-                    references_table = c[key][1]['value'].split('__')[0]
-                    references_column = c[key][1]['value'].split('__')[1]
-
-                    self.cursor.execute(f"SELECT * FROM {references_table}")
-                    header = [a[0] for a in self.cursor.description]
-                    fk_references_index = header.index(references_column)
-                    rows = self.cursor.fetchall()
-                    foreign_values = [row[fk_references_index] for row in rows]
-
-                    self.cursor.execute(f"SELECT * FROM {table}")
-                    header = [a[0] for a in self.cursor.description]
-                    fk_index = header.index(column)
-                    rows = self.cursor.fetchall()
-                    for row in rows:
-                        if row[fk_index] not in foreign_values:
-                            return False
+                    _, references_rows, fk_references_index = _column(c[key][1])
+                    foreign_values = {row[fk_references_index] for row in references_rows}
+                    _, rows, fk_index = _column(c[key][0])
+                    if any(row[fk_index] not in foreign_values for row in rows):
+                        return False
                 case 'between':
-                    table = c[key][0]['value'].split('__')[0]
-                    column = c[key][0]['value'].split('__')[1]
+                    _, rows, index = _column(c[key][0])
                     lower_bound = c[key][1]
                     upper_bound = c[key][2]
-
-                    self.cursor.execute(f"SELECT * FROM {table}")
-                    header = [a[0] for a in self.cursor.description]
-                    index = header.index(column)
-                    rows = self.cursor.fetchall()
                     for row in rows:
                         if row[index] is None or not (lower_bound <= row[index] <= upper_bound):
                             return False
                 case 'in':
-                    table = c[key][0]['value'].split('__')[0]
-                    column = c[key][0]['value'].split('__')[1]
-                    subset = []
+                    _, rows, index = _column(c[key][0])
+                    subset = set()
                     for val in c[key][1]:
                         if isinstance(val, dict):
-                            subset.append(val['literal'])
+                            subset.add(val['literal'])
                         else:
-                            subset.append(val)
-
-                    self.cursor.execute(f"SELECT * FROM {table}")
-                    header = [a[0] for a in self.cursor.description]
-                    index = header.index(column)
-                    rows = self.cursor.fetchall()
-                    for row in rows:
-                        if not row[index] in subset:
-                            return False
+                            subset.add(val)
+                    if any(row[index] not in subset for row in rows):
+                        return False
                 case 'not_null':
-                    table = c[key]['value'].split('__')[0]
-                    column = c[key]['value'].split('__')[1]
-
-                    self.cursor.execute(f"SELECT * FROM {table}")
-                    header = [a[0] for a in self.cursor.description]
-                    rows = self.cursor.fetchall()
-                    not_null_index = header.index(column)
-                    for row in rows:
-                        if row[not_null_index] is None:
-                            return False
+                    _, rows, not_null_index = _column(c[key])
+                    if any(row[not_null_index] is None for row in rows):
+                        return False
                 case 'gt' | 'gte' | 'lt' | 'lte' | 'neq' | 'eq':
-                    table = c[key][0]['value'].split('__')[0]
-                    column = c[key][0]['value'].split('__')[1]
+                    header, rows, index = _column(c[key][0])
                     compare_to = c[key][1]
+                    compare_index = None
                     if isinstance(compare_to, dict) and 'date' in compare_to:
                         compare_to = datetime.date(*map(int, compare_to['date'].split('-')))
-
-                    self.cursor.execute(f"SELECT * FROM {table}")
-                    header = [a[0] for a in self.cursor.description]
-                    rows = self.cursor.fetchall()
-                    index = header.index(column)
+                    elif isinstance(compare_to, dict) and 'value' in compare_to:
+                        compare_index = header.index(compare_to['value'].split('__')[1])
                     for row in rows:
-                        if isinstance(compare_to, dict) and 'value' in c[key][1]:
-                            compare_to = c[key][1]['value'].split('__')[1]
-                            compare_to = row[header.index(compare_to)]
+                        if compare_index is not None:
+                            compare_to = row[compare_index]
 
                         if key in {'neq', 'eq'}:
                             if all(value is not None for value in [row[index], compare_to]) and \
@@ -179,30 +256,7 @@ class CounterexampleChecker:
                                     not CounterexampleChecker.operator_map[key](row[index], compare_to):
                                 return False
                 case 'inc':
-                    table = c[key]['value'].split('__')[0]
-                    column = c[key]['value'].split('__')[1]
-
-                    self.cursor.execute(f"SELECT * FROM {table}")
-                    header = [a[0] for a in self.cursor.description]
-                    rows = self.cursor.fetchall()
-                    index = header.index(column)
-                    for row in rows:
-                        if isinstance(compare_to, dict) and 'value' in c[key][1]:
-                            compare_to = c[key][1]['value'].split('__')[1]
-                            compare_to = row[header.index(compare_to)]
-
-                        if key in {'neq', 'eq'}:
-                            if all(value is not None for value in [row[index], compare_to]) and \
-                                    not CounterexampleChecker.operator_map[key](row[index], compare_to):
-                                return False
-                        else:
-                            if row[index] is None or not CounterexampleChecker.operator_map[key](row[index],
-                                                                                                 compare_to):
-                                return False
-                case 'inc':
-                    table = c[key]['value'].split('__')[0]
-                    column = c[key]['value'].split('__')[1]
-                    inc_index = header.index(column)
+                    _, rows, inc_index = _column(c[key])
                     inc_values = [row[inc_index] for row in rows]
                     if not all(
                             i is not None and j is not None and j == i + 1 for i, j in zip(inc_values, inc_values[1:])):
@@ -212,13 +266,10 @@ class CounterexampleChecker:
         return True
 
     def reset(self):
-        self.__exit__()
-        self.__init__(self.config)
+        self.backend.reset()
 
     def __exit__(self, *args):
-        self.cursor.execute(f"DROP DATABASE {self.config['database']}")
-        self.cursor.close()
-        self.cnx.close()
+        self.backend.close()
 
 
 def check(config, lines, out_file, idx):
@@ -253,20 +304,7 @@ def check(config, lines, out_file, idx):
                         spurious_not_meet_ic.append(idx)
                         line['spurious_info'] = 'I.C. error'
                         print(ujson.dumps(line, ensure_ascii=False), file=writer)
-                except mysql.connector.errors.ProgrammingError as e:
-                    # print(idx, e)
-                    # print('--------------------')
-                    # print(line['counterexample'])
-                    # print('--------------------')
-                    # exit()
-                    line['spurious_info'] = str(e)
-                    print(ujson.dumps(line, ensure_ascii=False), file=writer)
-                except mysql.connector.errors.DataError as e:
-                    # print(idx, e)
-                    # print('--------------------')
-                    # print(line['counterexample'])
-                    # print('--------------------')
-                    # exit()
+                except checker.Error as e:
                     line['spurious_info'] = str(e)
                     print(ujson.dumps(line, ensure_ascii=False), file=writer)
                 except Exception as err:
@@ -280,9 +318,22 @@ def check(config, lines, out_file, idx):
     return total, spurious_same_result, spurious_not_meet_ic
 
 
-def main(DIR, in_file):
+def _config(backend, pool, idx):
+    if backend == 'sqlite':
+        return {'backend': backend}
     with open(os.path.join(os.path.dirname(__file__), 'mysql_config.yml'), 'r') as f:
         config = yaml.safe_load(f)
+    return {
+        'backend': backend,
+        'pool': pool,
+        'host': config['host'],
+        'user': f"{config['user']}{idx}",
+        'password': config['password'],
+        'database': f"{config['database']}{idx}",
+    }
+
+
+def main(DIR, in_file, backend='mysql', pool=False):
 
     from multiprocessing import Pool, cpu_count
 
@@ -306,13 +357,7 @@ def main(DIR, in_file):
             mpool.apply_async(
                 check,
                 (
-                    {
-                        'host': config['host'],
-                        'user': f"{config['user']}{idx}",
-                        'password': config['password'],
-                        'database': f"{config['database']}{idx}",
-                    },
-                    # config,
+                    _config(backend, pool, idx),
                     lines[idx], out_files[idx],
                     idx,
                 )
@@ -337,6 +382,12 @@ def main(DIR, in_file):
 
 
 if __name__ == '__main__':
-    DIR = "experiments/2023_03_27/"
-    in_file = f'{DIR}/calcite.out'
-    main(DIR, in_file)
+    import argparse
+
+    parser = argparse.ArgumentParser(description='counterexample checker')
+    parser.add_argument('-f', '--file', type=str, default='experiments/2023_03_27/calcite.out')
+    parser.add_argument('-b', '--backend', type=str, default='mysql', choices=list(BACKENDS))
+    parser.add_argument('-p', '--pool', type=int, default=0,
+                        help='keep MySQL connections and delete rows instead of dropping databases')
+    args = parser.parse_args()
+    main(os.path.dirname(args.file), args.file, backend=args.backend, pool=bool(args.pool))
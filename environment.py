@@ -6,6 +6,11 @@ import operator as Operator
 import pprint
 import random
 from collections import defaultdict
+from contextlib import (
+    contextmanager,
+    nullcontext,
+)
+from copy import deepcopy
 from time import time
 from typing import *
 
@@ -20,12 +25,14 @@ from z3 import (
     Solver,
 
     Function,
+    Distinct,
 
     sat,
     unknown,
 )
 
 import utils
+from cache import ResultCache
 from constants import *
 from errors import (
     UnknownError,
@@ -46,6 +53,9 @@ from formulas.expressions import (
 )
 from formulas.tables import (
     FBaseTable,
+    FFetchTable,
+    FLimitTable,
+    FOffsetTable,
     FOrderByTable,
 )
 from formulas.tuples import (
@@ -54,6 +64,15 @@ from formulas.tuples import (
 )
 from logger import LOGGER
 from parsers import SQLParser
+from portfolio import (
+    PORTFOLIO_CONFIGS,
+    race,
+)
+from profiler import StageProfiler
+from precheck import (
+    RandomPrechecker,
+    column_kind,
+)
 from scope import Scope
 from utils import CodeSnippet
 from verifiers import (
@@ -86,15 +105,29 @@ class Environment:
     AVG_FUNCTION = Function('AVG', TupleSort, StringSort, VarSort)
     SUM_FUNCTION = Function('SUM', TupleSort, StringSort, VarSort)
 
-    def __init__(self, generate_code=False, semantics=None, timer=False, show_counterexample=False,
-                 dialect=DIALECT.ALL,
+    def __init__(self, generate_code=False, generate_counterexample=False, semantics=None, timer=False,
+                 show_counterexample=False,
+                 dialect=DIALECT.ALL, sort_encoding=SORT_ENCODING.BUBBLE, portfolio=0, cache_dir=None,
+                 bag_encoding=BAG_ENCODING.PAIRWISE, group_encoding=GROUP_ENCODING.PAIRWISE,
+                 symmetry_breaking=False, precheck=0, key_encoding=KEY_ENCODING.DISTINCT,
+                 foreign_key_encoding=FOREIGN_KEY_ENCODING.DISJUNCTION, profile=False,
                  **kwargs):
-        if generate_code:
-            self._script_writer = Script()
+        # generate_code: z3 scripts (rendered on demand into `out_file`) and counterexamples
+        # generate_counterexample: counterexamples only, no formula is printed
+        self._script_writer = Script() if generate_code else None
+        if generate_code or generate_counterexample:
             self.sql_code = {'tables': {}, 'sql1': None, 'sql2': None}
         else:
-            self._script_writer = self.sql_code = None
+            self.sql_code = None
         self.show_counterexample = show_counterexample
+        self.semantics = semantics
+        # on-disk results of previous runs, see `cache.py`
+        self.cache = ResultCache(cache_dir) if cache_dir is not None else None
+        self.cache_hit = False
+        self._cache_schema = {}
+        self._cache_bound_sizes = {}
+        self._cache_constraints = None
+        self._cacheable = True
         self.counterexample = None
         self.counterexample_dict = defaultdict(list) # for Demo frontend
         if semantics == 'bag':
@@ -108,11 +141,39 @@ class Environment:
             LOGGER.debug("Semantics: auto")
         self.traversing_time = time() if timer else None
         self.solving_time = None
+        # per-stage wall time, #tuple sorts, #formulas and AST sizes, see `profiler.py`
+        self.profiler = StageProfiler(self) if profile else None
+        # counters and `reason_unknown` of the last solver check
+        self.solver_statistics = None
+        self.reason_unknown = None
+        # wall-clock time (`time()`) at which the solver gives up, so that a timeout still reports its statistics
+        self.deadline = None
         self.solver = Solver(ctx=Z3_CONTEXT)
+        # race the default solver with `portfolio` other configurations in child processes
+        self.portfolio = list(PORTFOLIO_CONFIGS)[:portfolio]
         self.visitor = Visitor(self)
         self.symbolic_count = 1
+        # running totals of hits/misses of `Scope.attribute_terms` over all scopes, each scope has its own terms
+        self.attribute_term_hits = 0
+        self.attribute_term_misses = 0
         self.dialect = dialect
         LOGGER.debug(f"SQL dialect: {self.dialect}")
+        self.sort_encoding = sort_encoding
+        LOGGER.debug(f"ORDER BY/LIMIT encoding: {self.sort_encoding}")
+        self.bag_encoding = bag_encoding
+        LOGGER.debug(f"Bag equality encoding: {self.bag_encoding}")
+        self.group_encoding = group_encoding
+        LOGGER.debug(f"GROUP BY encoding: {self.group_encoding}")
+        self.key_encoding = key_encoding
+        LOGGER.debug(f"PRIMARY KEY encoding: {self.key_encoding}")
+        self.foreign_key_encoding = foreign_key_encoding
+        LOGGER.debug(f"FOREIGN KEY encoding: {self.foreign_key_encoding}")
+        # order tuples of every base table lexicographically, see `_symmetry_breaking_constraints`
+        self.symmetry_breaking = symmetry_breaking
+        LOGGER.debug(f"Symmetry breaking: {self.symmetry_breaking}")
+        # #random concrete databases to run queries on before the symbolic check, see `precheck.py`
+        self.precheck = precheck
+        self.precheck_hit = False
 
         self.attributes = {}
         self.variables = {}
@@ -124,6 +185,10 @@ class Environment:
         self.base_databases = {}
         self._database_num = 1
         self.DBMS_facts = []
+        self._checkpoint_facts = 0
+        self._checkpoint_sql_code = deepcopy(self.sql_code)
+        # base tables whose integrity constraints depend on the tuple positions (e.g., auto-increment columns)
+        self.positional_tables = set()
         self.sql_parser = SQLParser()
         self.checkpoints = {
             'databases': OrderedSet(),
@@ -265,6 +330,39 @@ class Environment:
             )
         return tuple
 
+    def _declare_auxiliary_value(self, name, sort):
+        """
+        declare an auxiliary symbolic value of encodings, e.g., positions in ORDER BY sorting networks
+        """
+        value = Const(name, sort)
+        if self._script_writer is not None:
+            sort_name = 'Boolean' if sort == self.BooleanSort else str(sort)
+            self._script_writer.variable_declaration.append(
+                CodeSnippet(
+                    code=f"{name} = Const('{name}', __{sort_name})",
+                    docstring=f'define an auxiliary value `{name}`',
+                )
+            )
+        return value
+
+    def _declare_auxiliary_function(self, name, *sorts):
+        """
+        declare an auxiliary function of encodings, e.g., group ids of GROUP BY tuples
+        """
+        function = Function(name, *sorts)
+        if self._script_writer is not None:
+            sort_names = [
+                '__Boolean' if sort == self.BooleanSort else f'__{sort}'
+                for sort in sorts
+            ]
+            self._script_writer.function_declaration.append(
+                CodeSnippet(
+                    code=f"{name} = Function('{name}', {', '.join(sort_names)})",
+                    docstring=f'define an auxiliary function `{name}`',
+                )
+            )
+        return function
+
     def _get_new_tuple_sort(self) -> str:
         new_tuple = f't{len(self.tuple_sorts) + 1}'
         return self._declare_tuple_sort(new_tuple)
@@ -507,69 +605,103 @@ class Environment:
                 self.sql_code['tables'][name][attr] = type
 
         name = str.upper(name or self._get_new_databases_name())
+        self._cache_schema[name] = attributes
+        self._cache_bound_sizes[name] = bound_size
+        self._cacheable &= not key_attributes and NULL_ratio == 0.0
         key_attributes = key_attributes or set()
         tuples = []
-        type_constraints = []
         saved_attributes = {}
         for idx in range(bound_size):
-            fields = []
-
-            tuple_sort = self._get_new_tuple_sort()
-            for i, (attr, type) in enumerate(attributes.items(), start=1):
-                if attr in saved_attributes:
-                    attribute = saved_attributes[attr]
-                else:
-                    attribute = self.declare_attribute(name, literal=attr)
-                    saved_attributes[attr] = attribute
-                if attr not in key_attributes and random.random() < NULL_ratio:
-                    value = FSymbol(self.NULL)
-                else:
-                    value = FSymbol(f'{symbol}{self.symbolic_count}')
-                    self.symbolic_count += 1
-                value = self._declare_value(str(value))
-
-                if type is not None:
-                    upper_type = str.upper(type)
-                    match upper_type:
-                        case 'BOOLEAN' | 'BOOL':
-                            type_constraints.append(Or(
-                                attribute.VALUE(tuple_sort) == Z3_1,
-                                attribute.VALUE(tuple_sort) == Z3_0,
-                            )
-                            )
-                        case 'DATE':
-                            type_constraints.extend([
-                                DATE_LOWER_BOUND <= attribute.VALUE(tuple_sort),
-                                attribute.VALUE(tuple_sort) <= DATE_UPPER_BOUND,
-                            ])
-                        case 'INT':
-                            type_constraints.extend([
-                                INT_LOWER_BOUND <= attribute.VALUE(tuple_sort),
-                                attribute.VALUE(tuple_sort) <= INT_UPPER_BOUND,
-                            ])
-                        case 'VARCHAR':
-                            type_constraints.append(INT_UPPER_BOUND < attribute.VALUE(tuple_sort))
-                        case _:
-                            # 'INT' | 'VARCHAR' | 'TEXT' | ...
-                            pass
-                fields.append(FField(attribute, value))
-            base_tuple = self._declare_tuple(fields, tuple_sort=tuple_sort)
+            base_tuple = self._declare_base_tuple(
+                name, attributes, saved_attributes, symbol=symbol,
+                key_attributes=key_attributes, NULL_ratio=NULL_ratio,
+            )
             tuples.append(base_tuple)
-
-            # register DBMS in z3 solver
-            self.DBMS_facts.append(Not(self.DELETED_FUNCTION(base_tuple.SORT)))  # Not(Deleted(tuple))
-            for operand in base_tuple:
-                # attr(tuple) == ...
-                self.DBMS_facts.append(operand.operator.value(operand.attribute.VALUE(base_tuple.SORT), operand.value))
-        if len(type_constraints) > 0:
-            self.DBMS_facts.extend(type_constraints)
         table = self._declare_table(tuples, name)
         self.register_base_table(table, table.name)
         LOGGER.debug(pprint.pformat(self.databases))
 
+    def grow_database(
+            self,
+            attributes: Dict,
+            name: str,
+            num: int = 1, symbol='x',
+            key_attributes: Sequence = None, NULL_ratio: float = 0.0,
+    ):
+        """
+        append `num` fresh tuples to an existing base table, and only register DBMS facts of the new tuples
+        """
+        name = str.upper(name)
+        table = self.base_databases[name]
+        self._cache_bound_sizes[name] += num
+        key_attributes = key_attributes or set()
+        saved_attributes = {attr.name: attr for attr in table.attributes}
+        for _ in range(num):
+            base_tuple = self._declare_base_tuple(
+                name, attributes, saved_attributes, symbol=symbol,
+                key_attributes=key_attributes, NULL_ratio=NULL_ratio,
+            )
+            table.tuples.append(base_tuple)
+        LOGGER.debug(pprint.pformat(self.databases))
+
+    def _declare_base_tuple(self, name, attributes: Dict, saved_attributes: Dict, symbol='x',
+                            key_attributes: Sequence = None, NULL_ratio: float = 0.0):
+        fields = []
+        type_constraints = []
+        tuple_sort = self._get_new_tuple_sort()
+        for i, (attr, type) in enumerate(attributes.items(), start=1):
+            if str.upper(attr) in saved_attributes:
+                attribute = saved_attributes[str.upper(attr)]
+            else:
+                attribute = self.declare_attribute(name, literal=attr)
+                saved_attributes[str.upper(attr)] = attribute
+            if attr not in key_attributes and random.random() < NULL_ratio:
+                value = FSymbol(self.NULL)
+            else:
+                value = FSymbol(f'{symbol}{self.symbolic_count}')
+                self.symbolic_count += 1
+            value = self._declare_value(str(value))
+
+            if type is not None:
+                upper_type = str.upper(type)
+                match upper_type:
+                    case 'BOOLEAN' | 'BOOL':
+                        type_constraints.append(Or(
+                            attribute.VALUE(tuple_sort) == Z3_1,
+                            attribute.VALUE(tuple_sort) == Z3_0,
+                        )
+                        )
+                    case 'DATE':
+                        type_constraints.extend([
+                            DATE_LOWER_BOUND <= attribute.VALUE(tuple_sort),
+                            attribute.VALUE(tuple_sort) <= DATE_UPPER_BOUND,
+                        ])
+                    case 'INT':
+                        type_constraints.extend([
+                            INT_LOWER_BOUND <= attribute.VALUE(tuple_sort),
+                            attribute.VALUE(tuple_sort) <= INT_UPPER_BOUND,
+                        ])
+                    case 'VARCHAR':
+                        type_constraints.append(INT_UPPER_BOUND < attribute.VALUE(tuple_sort))
+                    case _:
+                        # 'INT' | 'VARCHAR' | 'TEXT' | ...
+                        pass
+            fields.append(FField(attribute, value))
+        base_tuple = self._declare_tuple(fields, tuple_sort=tuple_sort)
+
+        # register DBMS in z3 solver
+        self.DBMS_facts.append(Not(self.DELETED_FUNCTION(base_tuple.SORT)))  # Not(Deleted(tuple))
+        for operand in base_tuple:
+            # attr(tuple) == ...
+            self.DBMS_facts.append(operand.operator.value(operand.attribute.VALUE(base_tuple.SORT), operand.value))
+        if len(type_constraints) > 0:
+            self.DBMS_facts.extend(type_constraints)
+        return base_tuple
+
     def add_constraints(self, constraints):
         if constraints is None:
             return
+        self._cache_constraints = constraints
 
         @functools.lru_cache()
         def _get_attribute(expr):
@@ -601,9 +733,21 @@ class Environment:
 
                 match operator:
                     case 'primary':
+                        key_name = '__KEY__' + '__'.join(str(e['value']) for e in operands)
                         operands = [_f(e) for e in operands]
                         out = []
-                        if len(operands) == 1:
+                        if self.key_encoding == KEY_ENCODING.DISTINCT:
+                            out.extend([Not(attr.NULL) for attr in itertools.chain(*operands)])
+                            if len(operands) == 1 and len(operands[0]) > 1:
+                                out.append(Distinct(*[attr.VALUE for attr in operands[0]]))
+                            elif len(operands[0]) > 1:
+                                # keys are distinct iff a function maps every key to its tuple index
+                                key_function = self._declare_auxiliary_function(
+                                    key_name, *[attrs[0].VALUE.sort() for attrs in operands], self.VarSort,
+                                )
+                                for idx, keys in enumerate(zip(*operands)):
+                                    out.append(key_function(*[key.VALUE for key in keys]) == IntVal(str(idx)))
+                        elif len(operands) == 1:
                             # primary key is an attribute
                             out.extend([Not(attr.NULL) for attr in operands[0]])
                             for key1, key2 in list(itertools.combinations(operands[0], 2)):
@@ -620,8 +764,32 @@ class Environment:
                         out = And(*out)
                         return out
                     case 'foreign':
+                        key_name = '__FK__' + '__'.join(str(e['value']) for e in operands)
                         lhs_attrs, rhs_attrs = [_f(e) for e in operands]
                         out = []
+                        if self.foreign_key_encoding == FOREIGN_KEY_ENCODING.WITNESS:
+                            # referenced tuples as arrays indexed by their positions
+                            ref_null = self._declare_auxiliary_function(
+                                f'{key_name}__NULL', self.VarSort, self.BooleanSort,
+                            )
+                            ref_value = self._declare_auxiliary_function(
+                                f'{key_name}__VALUE', self.VarSort, rhs_attrs[0].VALUE.sort(),
+                            )
+                            for idx, rhs_attr in enumerate(rhs_attrs):
+                                out.extend([
+                                    ref_null(IntVal(str(idx))) == rhs_attr.NULL,
+                                    ref_value(IntVal(str(idx))) == rhs_attr.VALUE,
+                                ])
+                            # every referencing tuple picks the referenced tuple it equals
+                            for idx, lhs_attr in enumerate(lhs_attrs):
+                                witness = self._declare_auxiliary_value(f'{key_name}__WITNESS{idx}', self.VarSort)
+                                out.extend([
+                                    Z3_0 <= witness, witness < IntVal(str(len(rhs_attrs))),
+                                    utils.encode_equality(
+                                        lhs_attr.NULL, ref_null(witness), lhs_attr.VALUE, ref_value(witness),
+                                    ),
+                                ])
+                            return And(*out)
                         for lhs_attr in lhs_attrs:
                             tmp = [
                                 utils.encode_equality(lhs_attr.NULL, rhs_attr.NULL, lhs_attr.VALUE, rhs_attr.VALUE)
@@ -632,6 +800,7 @@ class Environment:
                         return out
                     case 'inc':
                         # cannot be NULL
+                        self.positional_tables.add(str.upper(operands[:operands.find('__')]))
                         operands = _f(operands)
                         if len(operands) > 1:
                             opd0 = operands[0]
@@ -790,25 +959,47 @@ class Environment:
         for key in self.checkpoints.keys():
             elements = list(getattr(self, key).keys())
             self.checkpoints[key].update(elements)
+        # DBMS facts of schemas and constraints, and table definitions of counterexamples
+        self._checkpoint_facts = len(self.DBMS_facts)
+        self._checkpoint_sql_code = deepcopy(self.sql_code)
 
-    def reload_checkpoints(self, keys=None):
+    def reload_checkpoints(self, keys=None, reset_solver=True):
         if keys is None:
             keys = self.checkpoints.keys()
             self._database_num = 1 + len(self.checkpoints['databases'])
             self.orderby_constraints = []
+            # drop everything the previous queries left behind, so that the next pair can reuse the schema
+            del self.DBMS_facts[self._checkpoint_facts:]
+            self.bound_constraints.clear()
+            self.sql_code = deepcopy(self._checkpoint_sql_code)
+            self.counterexample = None
+            self.counterexample_dict.clear()
+            self.cache_hit = self.precheck_hit = False
+            self.solving_time = None
+            self.solver_statistics = self.reason_unknown = None
         for cp_key in keys:
             cp_value = self.checkpoints[cp_key]
             dict_object = getattr(self, cp_key)
             for key in list(dict_object.keys()):
                 if key not in cp_value:
                     dict_object.pop(key)
-        self.solver.reset()
+        if reset_solver:
+            self.solver.reset()
         self.verifier.reset()
 
+    ############################ profile ############################
+
+    def stage(self, name: str, formulas: list = None):
+        """a stage of `self.profiler`, nothing is measured without profiling"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name, formulas=formulas)
+
     ############################ parse SQL query into AST ############################
 
     def parse_sql_query(self, query: str):
-        return self.sql_parser.parse(query, dialect=self.dialect)  # .replace('\"', '\'')
+        with self.stage('parse'):
+            return self.sql_parser.parse(query, dialect=self.dialect)  # .replace('\"', '\'')
 
     ############################ analyze query ############################
 
@@ -822,7 +1013,50 @@ class Environment:
             pass
         return False
 
+    def _cache_key(self, *queries):
+        """cache key and bound size of the current databases, (None, None) if results cannot be cached"""
+        if self.cache is None or not self._cacheable or len(set(self._cache_bound_sizes.values())) != 1:
+            return None, None
+        key = self.cache.key(
+            *queries, self._cache_schema, constraints=self._cache_constraints,
+            dialect=self.dialect, semantics=self.semantics,
+        )
+        return key, list(self._cache_bound_sizes.values())[0]
+
+    def _load_cached_result(self, key, bound_size):
+        cached = self.cache.lookup(key, bound_size)
+        if cached is None or cached['state'] not in {STATE.EQUIV, STATE.NON_EQUIV}:
+            return None
+        self.cache_hit = True
+        if self.traversing_time is not None and cached['solving_time'] is not None:
+            self.traversing_time, self.solving_time = cached['traversing_time'], cached['solving_time']
+        if cached['state'] == STATE.NON_EQUIV:
+            counterexample = cached['counterexample'] or {}
+            if counterexample.get('raised', False):
+                raise NotEquivalenceError
+            if self.sql_code is not None and counterexample.get('sql_code', None) is not None:
+                self.sql_code = counterexample['sql_code']
+            self.counterexample = counterexample.get('counterexample', None)
+            self.counterexample_dict.update(counterexample.get('counterexample_dict', {}))
+            return False
+        return True
+
+    def _cached_counterexample(self, raised=False):
+        """the rendered counterexample of a NEQ result, restored by `_load_cached_result`"""
+        return {
+            'raised': raised,
+            'sql_code': self.sql_code if isinstance(self.sql_code, str) else None,
+            'counterexample': self.counterexample,
+            'counterexample_dict': dict(self.counterexample_dict),
+        }
+
     def analyze(self, *queries, out_file: str = None):
+        cache_key, bound_size = self._cache_key(*queries)
+        if cache_key is not None:
+            result = self._load_cached_result(cache_key, bound_size)
+            if result is not None:
+                return result
+
         if self.sql_code is not None:
             queries = list(map(str.upper, queries))
             self.sql_code['sql1'] = queries[0] if queries[0][-1] == ';' else queries[0] + ';'
@@ -834,13 +1068,108 @@ class Environment:
 
         # 1) parse SQL queries
         query_asts = [self.parse_sql_query(query) for query in queries]
+        try:
+            with self._script_on_demand(out_file):
+                result = self._precheck(queries, out_file=out_file) if self.precheck > 0 else None
+                if result is None:
+                    result = self._analyze_asts(query_asts, out_file=out_file)
+        except NotEquivalenceError:
+            if cache_key is not None:
+                self.cache.store(
+                    cache_key, bound_size, STATE.NON_EQUIV, counterexample=self._cached_counterexample(raised=True),
+                )
+            raise
+        if cache_key is not None and (result is True or result is False):
+            self.cache.store(
+                cache_key, bound_size, STATE.EQUIV if result else STATE.NON_EQUIV,
+                traversing_time=self.traversing_time if self.solving_time is not None else None,
+                solving_time=self.solving_time,
+                counterexample=None if result else self._cached_counterexample(),
+            )
+        return result
+
+    def _precheck(self, queries, out_file: str = None):
+        """
+        Search random concrete databases where queries differ, and confirm such a database by the symbolic check with
+        base tuples fixed to it (SQLite semantics may differ from ours).
+        return the result of the confirmed check, otherwise None and everything is restored for the symbolic check
+        """
+        # base tuples restricted by `key_attributes`/`NULL_ratio` may not fit random databases
+        if not self._cacheable:
+            return None
+        prechecker = RandomPrechecker(self._cache_schema, self._cache_bound_sizes, self._cache_constraints)
+        database = prechecker.search(*queries, trials=self.precheck)
+        if database is None:
+            return None
+        LOGGER.debug(f'Queries differ on a random database: {database}')
+
+        DBMS_facts, traversing_time, sql_code = self.DBMS_facts, self.traversing_time, deepcopy(self.sql_code)
+        orderby_constraints, bound_constraints = list(self.orderby_constraints), set(self.bound_constraints)
+        self.DBMS_facts = DBMS_facts + self._database_facts(database)
+        self.solver.push()
+        try:
+            # rows of the random database are not in the lexicographic order of symmetry breaking
+            result = self._analyze_asts(
+                [self.parse_sql_query(query) for query in queries], out_file=out_file, symmetry_breaking=False,
+            )
+        except (UnknownError, NotSupportedError) as err:
+            # e.g., a timeout, left to the symbolic check
+            LOGGER.debug(f'Pre-check is inconclusive: {err}')
+            result = None
+        finally:
+            self.DBMS_facts = DBMS_facts
+        if result is not True and result is not None:
+            self.precheck_hit = True
+            return result
+
+        self.solver.pop()
+        self.traversing_time, self.solving_time, self.sql_code = traversing_time, None, sql_code
+        self.orderby_constraints, self.bound_constraints = orderby_constraints, bound_constraints
+        self.verifier.reset()
+        if self._script_writer is not None:
+            self._script_writer.reload_checkpoints()
+        return None
+
+    def _database_facts(self, database):
+        """fix base tuples to a concrete database, VARCHAR values are left symbolic"""
+        facts = []
+        for name, rows in database.items():
+            kinds = {str.upper(attr): column_kind(type) for attr, type in self._cache_schema[name].items()}
+            for tuple, row in zip(self.base_databases[name].tuples, rows):
+                row = dict(zip(kinds, row))
+                for attr in self.base_databases[name].attributes:
+                    value = row[attr.name]
+                    facts.append(attr.NULL(tuple.SORT) == BoolVal(value is None))
+                    if value is None or kinds[attr.name] == 'str':
+                        continue
+                    if kinds[attr.name] == 'date':
+                        value = utils.strptime_to_int(value)
+                    facts.append(attr.VALUE(tuple.SORT) == IntVal(str(value)))
+        return facts
+
+    @contextmanager
+    def _script_on_demand(self, out_file):
+        """without `out_file`, the z3 script is not rendered, so no formula is printed while visiting queries"""
+        script_writer = self._script_writer
+        if out_file is None:
+            self._script_writer = None
+        try:
+            yield
+        finally:
+            self._script_writer = script_writer
 
+    def _analyze_asts(self, query_asts, out_file: str = None, symmetry_breaking: bool = True):
         # 2) analyze queries but do not register formulas into z3 environments,
         # and translate/visit the aforementioned queries formulas into the temporary z3 environment
         def _analyze(query, query_idx):
             with Scope(self, f'SCOPE{query_idx}') as scope:
                 ctx = scope.analyze(query)
                 tables, result_formulas = scope.visit(ctx)
+                # results of ORDER BY/LIMIT/OFFSET/FETCH depend on the positions of tuples
+                positional_queries.append(any(
+                    isinstance(table, FOrderByTable | FLimitTable | FOffsetTable | FFetchTable)
+                    for table in self.databases.values()
+                ))
                 # we only consider the outermost orderby clause, otherwise it's too complicated
                 # 1) SELECT * FROM XXX ORDER BY XXX
                 # 2) SELECT XXX FROM XXX ORDER BY XXX
@@ -864,14 +1193,18 @@ class Environment:
                     self.orderby_constraints.append(None)
             return tables, result_formulas
 
-        tables, result_formulas = [], []
+        tables, result_formulas, positional_queries = [], [], []
         for idx, query in enumerate(query_asts, start=1):
             table, formulas = _analyze(query, idx)
             tables.append(table)
             result_formulas.append(formulas)
 
         # 3) SQL queries equivalence verification
-        result = self.compare(tables, result_formulas)
+        if symmetry_breaking and self.symmetry_breaking and self.semantics != 'list' and not any(positional_queries):
+            symmetry_constraints = self._symmetry_breaking_constraints()
+        else:
+            symmetry_constraints = None
+        result = self.compare(tables, result_formulas, symmetry_constraints=symmetry_constraints)
         if result == -1:
             self.sql_code = "Different #columns"
             return result
@@ -890,8 +1223,75 @@ class Environment:
 
         return result
 
+    def deepen(self, schema: Dict, constraints, *queries, max_bound_size: int):
+        """
+        Incremental bound-size deepening in one solver session.
+        Base tables grow by one tuple per round. DBMS facts of existing tuples stay asserted at the solver's base
+        level, while integrity constraints and query formulas (whose encodings depend on the bound size) live in a
+        push/pop frame and are rebuilt each round. Yields `(bound_size, result)` until queries are not equivalent.
+        """
+        if self.sql_code is not None:
+            queries = list(map(str.upper, queries))
+        # SQL ASTs are mutated by Encoder, so we parse once and copy them for every bound size
+        query_asts = None
+        sql_code = None
+        for bound_size in range(1, max_bound_size + 1):
+            if self.traversing_time is not None:
+                self.traversing_time = time()
+                self.solving_time = None
+            if bound_size == 1:
+                for name, db in schema.items():
+                    self.create_database(db, bound_size=1, name=name)
+                sql_code = deepcopy(self.sql_code)
+            else:
+                for name, db in schema.items():
+                    self.grow_database(db, name=name)
+            # tuple facts of smaller bounds are kept, only the new tuples' facts are added
+            self.solver.add(*self.DBMS_facts)
+            self.DBMS_facts = []
+            self.save_checkpoints()
+            if self._script_writer is not None:
+                self._script_writer.save_checkpoints()
+
+            self.solver.push()
+            if constraints is not None:
+                self.add_constraints(constraints)
+            if query_asts is None:
+                query_asts = [self.parse_sql_query(query) for query in queries]
+            if sql_code is not None:
+                self.sql_code = deepcopy(sql_code)
+                self.sql_code['sql1'] = queries[0] if queries[0][-1] == ';' else queries[0] + ';'
+                self.sql_code['sql2'] = queries[1] if queries[1][-1] == ';' else queries[1] + ';'
+            with self._script_on_demand(out_file=None):
+                result = self._analyze_asts(deepcopy(query_asts))
+            yield bound_size, result
+            if result != True:
+                break
+            self.solver.pop()
+            self.DBMS_facts = []
+            self.bound_constraints.clear()
+            self.reload_checkpoints(reset_solver=False)
+
+    def _symmetry_breaking_constraints(self):
+        """
+        Base tuples are interchangeable under bag semantics, i.e., any permutation of a counterexample is also a
+        counterexample. Therefore, we only search for tables whose tuples are in a lexicographic order (NULL first).
+        Tables with position-dependent integrity constraints are left unordered.
+        """
+        constraints = []
+        for name, table in self.base_databases.items():
+            if name in self.positional_tables:
+                continue
+            rows = [
+                [(attr.NULL(tuple.SORT), attr.VALUE(tuple.SORT)) for attr in table.attributes]
+                for tuple in table.tuples
+            ]
+            for lhs, rhs in zip(rows, rows[1:]):
+                constraints.append(utils.encode_lexicographic_order(lhs, rhs))
+        return constraints
+
     def compare(
-            self, tables: Sequence, result_formulas, out_file: str = None,
+            self, tables: Sequence, result_formulas, out_file: str = None, symmetry_constraints=None,
     ) -> bool:
         lhs_tuple = list(tables[0].values())[0]
         rhs_tuple = list(tables[1].values())[0]
@@ -915,124 +1315,162 @@ class Environment:
                     else:
                         lhs_attr.uninterpreted_func = rhs_attr.uninterpreted_func = None
 
-        equivalence_formulas = self.verifier.run(
-            *tables, *result_formulas,
-            lhs_tuple.attributes, rhs_tuple.attributes,
-            orderby_constraints=self.orderby_constraints,
-            bound_constraints=self.bound_constraints,
-        )
+        verified_formulas = []
+        with self.stage('verifier', formulas=verified_formulas):
+            equivalence_formulas = self.verifier.run(
+                *tables, *result_formulas,
+                lhs_tuple.attributes, rhs_tuple.attributes,
+                orderby_constraints=self.orderby_constraints,
+                bound_constraints=self.bound_constraints,
+                symmetry_constraints=symmetry_constraints,
+            )
+            verified_formulas.append(equivalence_formulas)
         if self.traversing_time is not None:
             self.solving_time = time()
             self.traversing_time = round(self.solving_time - self.traversing_time, 6)
         self.solver.add(Not(equivalence_formulas))  # Not means cannot find a satisfying solution
-        out = self.solver.check()
+        if self.deadline is not None:
+            self.solver.set(timeout=max(int((self.deadline - time()) * 1000), 1))
+        with self.stage('solver'):
+            out, solver, winner = race(
+                self.solver, Z3_CONTEXT, self.portfolio, need_model=self.sql_code is not None, deadline=self.deadline,
+            )
+        self.solver_statistics = utils.solver_statistics(solver)
+        self.reason_unknown = solver.reason_unknown() if out == unknown else None
         if self.solving_time is not None:
             self.solving_time = round(time() - self.solving_time, 6)
-        LOGGER.debug(f'Symbolic Reasoning Output: ==> {out} <==')
+        LOGGER.debug(f'Symbolic Reasoning Output: ==> {out} <== ({winner})')
         if out == sat:
-            model = self.solver.model()
-            LOGGER.debug(model)
-            self.counterexample = "-- ----------An counterexample found by VeriEQL------------\n"
-
-            def _f(null, value, out_str=False, data_preix=None, type=None):
-                if not isinstance(null, bool):
-                    null = eval(str(model.eval(null, model_completion=True)))
-                if null:
-                    value = 99999
-                else:
-                    if not isinstance(value, int | float):
-                        value = eval(str(model.eval(value, model_completion=False)))
+            with self.stage('model'):
+                self._extract_counterexample(solver.model(), tables)
+            return False
+        elif out == unknown:
+            raise UnknownError
+        else:
+            return True
 
-                if value == 99999:
-                    return 'NULL'
-                else:
-                    if out_str:
-                        return f"'{value}'"
-                    else:
-                        value = value if data_preix is None else f"'{data_preix + str(value)}'"
-                        if type == 'boolean':
-                            return value != 0
-                        else:
-                            return value
-
-            if self.sql_code is not None:
-                for name, basetable in self.base_databases.items():
-                    insert_rows = []
-                    for tuple in basetable.tuples:
-                        values = []
-                        for idx, attr in enumerate(basetable.attributes, start=1):
-                            v = _f(attr.NULL(tuple.SORT), attr.VALUE(tuple.SORT))
-                            if str.startswith(self.sql_code['tables'][attr.prefix][attr.name], "VARCHAR"):
-                                if v in self.variables:
-                                    v = str(self.variables[v])
-                                    if v.startswith('String_'):
-                                        v = v[7:]
-                                    v = v.split('__')[0]
-                                if v != 'NULL':
-                                    v = f"\'{v}\'"
-                            elif self.sql_code['tables'][attr.prefix][attr.name] == "DATE":
-                                if v != 'NULL':
-                                    v = f"\'{utils.int_to_strptime(v)}\'"
-                            values.append(v)
-
-                        self.counterexample_dict[basetable.name].append(
-                            dict(zip(self.sql_code['tables'][basetable.name].keys(), [str(v) for v in values]))
-                        )
+    def _extract_counterexample(self, model, tables):
+        """render the counterexample (base tables and results of both queries) from a model"""
+        LOGGER.debug(model)
+        self.counterexample = "-- ----------An counterexample found by VeriEQL------------\n"
 
-                        values = f"INSERT INTO {basetable.name} VALUES ({', '.join(str(v) for v in values)});\n"
-                        insert_rows.append(values)
-                    attr_rows = f',\n\t'.join(
-                        f"{attr} {type}" for attr, type in self.sql_code['tables'][basetable.name].items())
-                    self.sql_code['tables'][basetable.name] = f"CREATE TABLE {basetable.name} (\n\t{attr_rows}\n);\n"
-                    self.sql_code['tables'][basetable.name] += ''.join(insert_rows)
-                    if self.show_counterexample:
-                        self.counterexample += self.sql_code['tables'][basetable.name]
+        # evaluate distinct terms of the counterexample in batches, each one only once
+        model_values = {}
 
-                if self.show_counterexample:
-                    self.counterexample += '-- ----------sql1------------\n'
-                for tuple in tables[0].values():
-                    if str(model.eval(self.DELETED_FUNCTION(tuple.SORT))) == 'True':
-                        continue
+        def _evaluate(formulas):
+            for formula in formulas:
+                if not isinstance(formula, bool | int | float) and formula.get_id() not in model_values:
+                    model_values[formula.get_id()] = utils.model_value(model.eval(formula, model_completion=True))
 
-                    values = []
-                    for attr in tuple.attributes:
-                        v = _f(attr.NULL(tuple.SORT), attr.VALUE(tuple.SORT))
-                        if v in self.variables:
-                            v = str(self.variables[v])
-                            if v.startswith('String_'):
-                                v = v[7:]
-                            v = v.split('__')[0]
-                        values.append(v)
-                    if self.show_counterexample:
-                        self.counterexample += '-- ' + ', '.join(str(v) for v in values) + '\n'
-                if self.show_counterexample:
-                    self.counterexample += self.sql_code['sql1'] + '\n'
+        def _cells(tuples):
+            for tuple in tuples:
+                for attr in tuple.attributes:
+                    yield attr.NULL(tuple.SORT)
+                    yield attr.VALUE(tuple.SORT)
 
-                if self.show_counterexample:
-                    self.counterexample += '-- ----------sql2------------\n'
-                for tuple in tables[1].values():
-                    if str(model.eval(self.DELETED_FUNCTION(tuple.SORT))) == 'True':
-                        continue
+        def _value(formula):
+            return formula if isinstance(formula, bool | int | float) else model_values[formula.get_id()]
+
+        def _f(null, value, out_str=False, data_preix=None, type=None):
+            null = _value(null)
+            if null:
+                value = 99999
+            else:
+                value = _value(value)
+
+            if value == 99999:
+                return 'NULL'
+            else:
+                if out_str:
+                    return f"'{value}'"
+                else:
+                    value = value if data_preix is None else f"'{data_preix + str(value)}'"
+                    if type == 'boolean':
+                        return value != 0
+                    else:
+                        return value
 
+        if self.sql_code is not None:
+            _evaluate(_cells(itertools.chain.from_iterable(
+                basetable.tuples for basetable in self.base_databases.values()
+            )))
+            result_tuples = list(itertools.chain(tables[0].values(), tables[1].values()))
+            _evaluate(self.DELETED_FUNCTION(tuple.SORT) for tuple in result_tuples)
+            _evaluate(_cells(
+                tuple for tuple in result_tuples if not _value(self.DELETED_FUNCTION(tuple.SORT))
+            ))
+
+            for name, basetable in self.base_databases.items():
+                insert_rows = []
+                for tuple in basetable.tuples:
                     values = []
-                    for attr in tuple.attributes:
+                    for idx, attr in enumerate(basetable.attributes, start=1):
                         v = _f(attr.NULL(tuple.SORT), attr.VALUE(tuple.SORT))
-                        if v in self.variables:
-                            v = str(self.variables[v])
-                            if v.startswith('String_'):
-                                v = v[7:]
-                            v = v.split('__')[0]
+                        if str.startswith(self.sql_code['tables'][attr.prefix][attr.name], "VARCHAR"):
+                            if v in self.variables:
+                                v = str(self.variables[v])
+                                if v.startswith('String_'):
+                                    v = v[7:]
+                                v = v.split('__')[0]
+                            if v != 'NULL':
+                                v = f"\'{v}\'"
+                        elif self.sql_code['tables'][attr.prefix][attr.name] == "DATE":
+                            if v != 'NULL':
+                                v = f"\'{utils.int_to_strptime(v)}\'"
                         values.append(v)
-                    if self.show_counterexample:
-                        self.counterexample += '-- ' + ', '.join(str(v) for v in values) + '\n'
-                if self.show_counterexample:
-                    self.counterexample += self.sql_code['sql2'] + '\n'
 
-            return False
-        elif out == unknown:
-            raise UnknownError
-        else:
-            return True
+                    self.counterexample_dict[basetable.name].append(
+                        dict(zip(self.sql_code['tables'][basetable.name].keys(), [str(v) for v in values]))
+                    )
+
+                    values = f"INSERT INTO {basetable.name} VALUES ({', '.join(str(v) for v in values)});\n"
+                    insert_rows.append(values)
+                attr_rows = f',\n\t'.join(
+                    f"{attr} {type}" for attr, type in self.sql_code['tables'][basetable.name].items())
+                self.sql_code['tables'][basetable.name] = f"CREATE TABLE {basetable.name} (\n\t{attr_rows}\n);\n"
+                self.sql_code['tables'][basetable.name] += ''.join(insert_rows)
+                if self.show_counterexample:
+                    self.counterexample += self.sql_code['tables'][basetable.name]
+
+            if self.show_counterexample:
+                self.counterexample += '-- ----------sql1------------\n'
+            for tuple in tables[0].values():
+                if _value(self.DELETED_FUNCTION(tuple.SORT)):
+                    continue
+
+                values = []
+                for attr in tuple.attributes:
+                    v = _f(attr.NULL(tuple.SORT), attr.VALUE(tuple.SORT))
+                    if v in self.variables:
+                        v = str(self.variables[v])
+                        if v.startswith('String_'):
+                            v = v[7:]
+                        v = v.split('__')[0]
+                    values.append(v)
+                if self.show_counterexample:
+                    self.counterexample += '-- ' + ', '.join(str(v) for v in values) + '\n'
+            if self.show_counterexample:
+                self.counterexample += self.sql_code['sql1'] + '\n'
+
+            if self.show_counterexample:
+                self.counterexample += '-- ----------sql2------------\n'
+            for tuple in tables[1].values():
+                if _value(self.DELETED_FUNCTION(tuple.SORT)):
+                    continue
+
+                values = []
+                for attr in tuple.attributes:
+                    v = _f(attr.NULL(tuple.SORT), attr.VALUE(tuple.SORT))
+                    if v in self.variables:
+                        v = str(self.variables[v])
+                        if v.startswith('String_'):
+                            v = v[7:]
+                        v = v.split('__')[0]
+                    values.append(v)
+                if self.show_counterexample:
+                    self.counterexample += '-- ' + ', '.join(str(v) for v in values) + '\n'
+            if self.show_counterexample:
+                self.counterexample += self.sql_code['sql2'] + '\n'
 
 
 __all__ = [
@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from constants import (
+    DIALECT,
+    IS_FALSE,
+    IS_TRUE,
+    SPACE_STRING,
+)
+from errors import NotSupportedError
+from parsers import SQLParser
+
+"""
+Vectorized evaluation of queries over a batch of concrete databases, e.g., random databases of the pre-check.
+A batch of B databases (the same #tuples per table) is stored column-wise in (B, N) NumPy arrays of values and NULL
+flags, and each operator processes all databases at once. Strings and dates are encoded by their ranks among all
+strings of the batch and queries (above any integer as VARCHARs in the z3 encoding), which keeps equality and order.
+
+Supported: SELECT [DISTINCT], FROM (tables, subqueries, CROSS/INNER/LEFT/RIGHT/FULL joins), WHERE, GROUP BY, HAVING,
+COUNT/SUM/AVG/MAX/MIN [DISTINCT], arithmetic, comparisons, AND/OR/NOT, IS [NOT] NULL, [NOT] IN (literals),
+[NOT] BETWEEN and CASE WHEN. ORDER BY is ignored as results are compared as bags.
+
+NULL semantics follow the z3 encoding (cf. `utils.encode_concate_by_and`), e.g., NULL AND FALSE is FALSE, a NULL
+predicate drops tuples, SUM/MAX/MIN/AVG of no values are NULL and AVG/`/` are real divisions.
+"""
+
+AGGREGATES = {'count', 'sum', 'avg', 'max', 'min'}
+STRING_OFFSET = 2 ** 32
+ARITHMETIC = {
+    'add': np.add,
+    'sub': np.subtract,
+    'mul': np.multiply,
+    'div': np.divide,
+    'mod': np.fmod,
+}
+COMPARISONS = {
+    'eq': np.equal,
+    'neq': np.not_equal,
+    'lt': np.less,
+    'lte': np.less_equal,
+    'gt': np.greater,
+    'gte': np.greater_equal,
+}
+JOINS = {
+    'join': (False, False),
+    'inner join': (False, False),
+    'cross join': (False, False),
+    'left join': (True, False),
+    'left outer join': (True, False),
+    'right join': (False, True),
+    'right outer join': (False, True),
+    'full join': (True, True),
+    'full outer join': (True, True),
+}
+
+
+class Relation:
+    def __init__(self, columns, valid):
+        # [(qualifier, name, values, NULLs)] of (B, N) arrays
+        self.columns = columns
+        # (B, N) array, cf. Not(DELETED(tuple))
+        self.valid = valid
+
+
+def _equal(lhs, rhs):
+    # tolerate rounding errors of AVG/division
+    return np.abs(lhs - rhs) <= 1e-9
+
+
+def _compact(table):
+    """move valid tuples ahead (in order) and cut the tail which is invalid in every database"""
+    size = max(int(table.valid.sum(axis=1).max(initial=0)), 1)
+    if size == table.valid.shape[1]:
+        return table
+    index = np.argsort(~table.valid, axis=1, kind='stable')[:, :size]
+    take = lambda array: np.take_along_axis(array, index, axis=1)
+    return Relation(
+        [(qualifier, name, take(values), take(nulls)) for qualifier, name, values, nulls in table.columns],
+        take(table.valid),
+    )
+
+
+def _null_safe_same(lhs, rhs):
+    """(B, M1, M2) array whether rows of `lhs` (B, M1) and `rhs` (B, M2) are the same, cf. `utils.encode_same`"""
+    same = np.ones(lhs[0][0].shape + rhs[0][0].shape[1:], dtype=bool)
+    for (lhs_values, lhs_nulls), (rhs_values, rhs_nulls) in zip(lhs, rhs):
+        lhs_nulls, rhs_nulls = lhs_nulls[:, :, None], rhs_nulls[:, None, :]
+        equal = _equal(lhs_values[:, :, None], rhs_values[:, None, :])
+        same &= (lhs_nulls & rhs_nulls) | (~lhs_nulls & ~rhs_nulls & equal)
+    return same
+
+
+def _first_occurrences(same, valid):
+    """tuples that are valid and not the same as any valid tuple ahead"""
+    ahead = np.triu(np.ones(same.shape[-2:], dtype=bool), k=1)  # ahead[k, j] = k < j
+    return valid & ~(same & ahead & valid[:, :, None]).any(axis=1)
+
+
+def _string(value):
+    # cf. `SQLParser`, string literals are in upper case and the empty string is a placeholder
+    return str.upper(value) or SPACE_STRING
+
+
+def _has_aggregate(expr):
+    if isinstance(expr, list):
+        return any(_has_aggregate(e) for e in expr)
+    elif isinstance(expr, dict):
+        return any(
+            key in AGGREGATES or (key not in {'select', 'select_distinct'} and _has_aggregate(value))
+            for key, value in expr.items()
+        )
+    return False
+
+
+def _literals(expr):
+    if isinstance(expr, list):
+        for e in expr:
+            yield from _literals(e)
+    elif isinstance(expr, dict):
+        for key, value in expr.items():
+            if key == 'literal':
+                yield from (v for v in (value if isinstance(value, list) else [value]) if isinstance(v, str))
+            else:
+                yield from _literals(value)
+
+
+class BatchEvaluator:
+    def __init__(self, schema, databases, dialect=DIALECT.ALL):
+        """
+        schema: {table: {attribute: type}}
+        databases: [{table: [row, ...]}, ...] where rows are tuples of Python values (None for NULL)
+        """
+        self.schema = {
+            str.upper(name): [str.upper(attr) for attr in attributes]
+            for name, attributes in schema.items()
+        }
+        self.databases = databases
+        self.sql_parser = SQLParser()
+        self.dialect = dialect
+        self.size = len(databases)
+        self.codes = None
+        self.tables = None
+
+    ############################ encode databases ############################
+
+    def _encode(self, query_asts):
+        strings = set(_literals(query_asts))
+        for database in self.databases:
+            for rows in database.values():
+                strings.update(_string(v) for row in rows for v in row if isinstance(v, str))
+        self.codes = {string: float(STRING_OFFSET + code) for code, string in enumerate(sorted(strings))}
+
+        self.tables = {}
+        for name, attributes in self.schema.items():
+            lengths = {len(database[name]) for database in self.databases}
+            if len(lengths) != 1:
+                raise NotSupportedError(f'different #tuples of `{name}` in a batch')
+            shape = (self.size, lengths.pop())
+            columns = []
+            for idx, attr in enumerate(attributes):
+                values, nulls = np.zeros(shape), np.zeros(shape, dtype=bool)
+                for b, database in enumerate(self.databases):
+                    for n, row in enumerate(database[name]):
+                        value = row[idx]
+                        if value is None:
+                            nulls[b, n] = True
+                        else:
+                            values[b, n] = self.codes[_string(value)] if isinstance(value, str) else float(value)
+                columns.append((name, attr, values, nulls))
+            self.tables[name] = Relation(columns, np.ones(shape, dtype=bool))
+
+    ############################ FROM clause ############################
+
+    def _table(self, item):
+        if isinstance(item, str):
+            name, alias = str.upper(item), str.upper(item)
+        elif isinstance(item, dict) and 'value' in item:
+            name, alias = item['value'], item.get('name')
+            if isinstance(alias, dict):
+                raise NotSupportedError('column aliases of tables')
+        else:
+            raise NotSupportedError(item)
+        if isinstance(name, dict):
+            if alias is None:
+                raise NotSupportedError('subqueries without aliases')
+            table = self._query(name)
+        elif str.upper(name) in self.tables:
+            table = self.tables[str.upper(name)]
+        else:
+            raise NotSupportedError(f'table `{name}`')
+        alias = str.upper(alias or name)
+        return Relation([(alias, *column[1:]) for column in table.columns], table.valid)
+
+    def _product(self, lhs, rhs):
+        lhs_num, rhs_num = lhs.valid.shape[1], rhs.valid.shape[1]
+        # tuple (i, j) is at i * rhs_num + j
+        repeat = lambda array: np.repeat(array, rhs_num, axis=1)
+        tile = lambda array: np.tile(array, (1, lhs_num))
+        columns = [(q, n, repeat(values), repeat(nulls)) for q, n, values, nulls in lhs.columns] + \
+                  [(q, n, tile(values), tile(nulls)) for q, n, values, nulls in rhs.columns]
+        return Relation(columns, repeat(lhs.valid) & tile(rhs.valid))
+
+    def _pad(self, table, valid, columns, left):
+        """`table` tuples padded with NULL columns on the other side"""
+        shape = valid.shape
+        nulls = [(q, n, np.zeros(shape), np.ones(shape, dtype=bool)) for q, n, _, _ in columns]
+        return Relation(table.columns + nulls if left else nulls + table.columns, valid)
+
+    def _join(self, lhs, rhs, kind, on):
+        left_outer, right_outer = JOINS[kind]
+        table = self._product(lhs, rhs)
+        if on is not None:
+            table.valid = table.valid & self._truth(self._eval(on, table))
+        matched = table.valid.reshape(self.size, lhs.valid.shape[1], rhs.valid.shape[1])
+        tables = [table]
+        if left_outer:
+            tables.append(self._pad(lhs, lhs.valid & ~matched.any(axis=2), rhs.columns, left=True))
+        if right_outer:
+            tables.append(self._pad(rhs, rhs.valid & ~matched.any(axis=1), lhs.columns, left=False))
+        out = self._concatenate(tables)
+        out.columns = [(qualifier, *column[1:]) for (qualifier, *_), column in zip(table.columns, out.columns)]
+        return _compact(out)
+
+    def _from(self, items):
+        if not isinstance(items, list):
+            items = [items]
+        table = None
+        for item in items:
+            kinds = [key for key in item if key.endswith('join')] if isinstance(item, dict) else []
+            if table is None:
+                table = self._table(item)
+            elif len(kinds) == 0:
+                table = self._product(table, self._table(item))
+            else:
+                if kinds[0] not in JOINS or 'using' in item:
+                    raise NotSupportedError(kinds[0])
+                table = self._join(table, self._table(item[kinds[0]]), kinds[0], item.get('on'))
+        return table
+
+    ############################ expressions ############################
+
+    def _const(self, value, null=False):
+        shape = self._shape
+        return np.full(shape, float(value)), np.full(shape, null, dtype=bool)
+
+    @staticmethod
+    def _truth(operand):
+        values, nulls = operand
+        return (values != 0) & ~nulls
+
+    def _column(self, name, table):
+        qualifier, _, attr = name.rpartition('__')
+        candidates = [
+            (values, nulls) for q, n, values, nulls in table.columns
+            if n == str.upper(attr) and (qualifier == '' or q == str.upper(qualifier))
+        ]
+        if len(candidates) != 1:
+            raise NotSupportedError(f'column `{name}`')
+        return candidates[0]
+
+    def _aggregate(self, operator, operand, table, group):
+        if group is None:
+            raise NotSupportedError(f'{operator} without GROUP BY context')
+        distinct = isinstance(operand, dict) and 'distinct' in operand
+        if distinct:
+            operand = operand['distinct']
+        if operand == '*':
+            if operator != 'count':
+                raise NotSupportedError(f'{operator}(*)')
+            mask = group & table.valid[:, None, :]
+            return mask.sum(axis=-1).astype(float), np.zeros(self._shape, dtype=bool)
+        values, nulls = self._eval(operand, table)
+        mask = group & (table.valid & ~nulls)[:, None, :]
+        if distinct:
+            # drop values which appear ahead in the same group
+            same = _equal(values[:, :, None], values[:, None, :])
+            ahead = np.triu(np.ones(same.shape[-2:], dtype=bool), k=1)
+            mask &= ~(mask[:, :, :, None] & (same & ahead)[:, None, :, :]).any(axis=2)
+        count = mask.sum(axis=-1)
+        empty = count == 0
+        match operator:
+            case 'count':
+                return count.astype(float), np.zeros(self._shape, dtype=bool)
+            case 'sum':
+                return np.where(mask, values[:, None, :], 0.).sum(axis=-1), empty
+            case 'avg':
+                return np.where(mask, values[:, None, :], 0.).sum(axis=-1) / np.maximum(count, 1), empty
+            case 'max':
+                return np.where(empty, 0., np.where(mask, values[:, None, :], -np.inf).max(axis=-1)), empty
+            case 'min':
+                return np.where(empty, 0., np.where(mask, values[:, None, :], np.inf).min(axis=-1)), empty
+
+    def _eval(self, expr, table, group=None):
+        """(values, NULLs) of `expr` on every tuple of `table`, aggregates are computed over `group`"""
+        self._shape = table.valid.shape
+        if isinstance(expr, bool):
+            return self._const(expr)
+        elif isinstance(expr, int | float):
+            return self._const(expr)
+        elif isinstance(expr, str):
+            if expr in {IS_TRUE, IS_FALSE}:
+                return self._const(expr == IS_TRUE)
+            return self._column(expr, table)
+        elif not isinstance(expr, dict) or len(expr) != 1:
+            raise NotSupportedError(expr)
+
+        operator, operands = next(iter(expr.items()))
+        _eval = lambda e: self._eval(e, table, group)
+        if operator in AGGREGATES:
+            return self._aggregate(operator, operands, table, group)
+        elif operator == 'literal':
+            if not isinstance(operands, str):
+                raise NotSupportedError(expr)
+            return self._const(self.codes[operands])
+        elif operator == 'null':
+            return self._const(0, null=True)
+        elif operator == 'neg':
+            values, nulls = _eval(operands)
+            return -values, nulls
+        elif operator in ARITHMETIC:
+            values, nulls = _eval(operands[0])
+            for operand in operands[1:]:
+                rhs_values, rhs_nulls = _eval(operand)
+                nulls = nulls | rhs_nulls
+                if operator in {'div', 'mod'}:
+                    # division by zero is NULL
+                    nulls = nulls | (rhs_values == 0)
+                    rhs_values = np.where(rhs_values == 0, 1., rhs_values)
+                values = ARITHMETIC[operator](values, rhs_values)
+            return np.where(nulls, 0., values), nulls
+        elif operator in COMPARISONS:
+            (lhs_values, lhs_nulls), (rhs_values, rhs_nulls) = map(_eval, operands)
+            if operator in {'eq', 'neq'}:
+                values = _equal(lhs_values, rhs_values)
+                values = values if operator == 'eq' else ~values
+            else:
+                values = COMPARISONS[operator](lhs_values, rhs_values)
+            return values.astype(float), lhs_nulls | rhs_nulls
+        elif operator in {'and', 'or'}:
+            operands = [_eval(operand) for operand in operands]
+            nulls = np.logical_or.reduce([n for _, n in operands])
+            if operator == 'and':
+                # FALSE if any operand is FALSE
+                decided = np.logical_or.reduce([(v == 0) & ~n for v, n in operands])
+                return (~decided).astype(float), nulls & ~decided
+            else:
+                decided = np.logical_or.reduce([(v != 0) & ~n for v, n in operands])
+                return decided.astype(float), nulls & ~decided
+        elif operator == 'not':
+            values, nulls = _eval(operands)
+            return (values == 0).astype(float), nulls
+        elif operator in {'missing', 'exists'}:
+            _, nulls = _eval(operands)
+            return (nulls if operator == 'missing' else ~nulls).astype(float), np.zeros_like(nulls)
+        elif operator in {'in', 'nin'}:
+            choices = operands[1]
+            if isinstance(choices, dict) and 'literal' in choices and isinstance(choices['literal'], list):
+                choices = [{'literal': c} if isinstance(c, str) else c for c in choices['literal']]
+            elif not isinstance(choices, list):
+                choices = [choices]
+            if any(isinstance(choice, dict) and ('select' in choice or 'select_distinct' in choice)
+                   for choice in choices):
+                raise NotSupportedError('IN subqueries')
+            out = _eval({'or': [{'eq': [operands[0], choice]} for choice in choices]})
+            return _eval({'not': out}) if operator == 'nin' else out
+        elif operator in {'between', 'not_between'}:
+            attr, lower, upper = operands
+            out = _eval({'and': [{'gte': [attr, lower]}, {'lte': [attr, upper]}]})
+            return out if operator == 'between' else _eval({'not': out})
+        elif operator == 'case':
+            branches = list(operands) if isinstance(operands, list) else [operands]
+            if isinstance(branches[-1], dict) and 'when' in branches[-1]:
+                values, nulls = self._const(0, null=True)
+            else:
+                values, nulls = _eval(branches.pop())
+            for branch in reversed(branches):
+                condition = self._truth(_eval(branch['when']))
+                then_values, then_nulls = _eval(branch['then'])
+                values = np.where(condition, then_values, values)
+                nulls = np.where(condition, then_nulls, nulls)
+            return values, nulls
+        raise NotSupportedError(expr)
+
+    ############################ queries ############################
+
+    def _select_items(self, items, table):
+        if not isinstance(items, list):
+            items = [items]
+        out = []
+        for item in items:
+            if item == '*' or (isinstance(item, dict) and 'all_columns' in item):
+                out.extend((column[1], {'__column__': column}) for column in table.columns)
+            elif isinstance(item, dict) and isinstance(item.get('value'), str) and item['value'].endswith('__*'):
+                qualifier = str.upper(item['value'][:-3])
+                out.extend(
+                    (column[1], {'__column__': column}) for column in table.columns if column[0] == qualifier
+                )
+            elif isinstance(item, dict) and 'value' in item:
+                value = item['value']
+                name = item.get('name') or (value.rpartition('__')[-1] if isinstance(value, str) else str(value))
+                out.append((str.upper(name), value))
+            else:
+                raise NotSupportedError(item)
+        return out
+
+    def _concatenate(self, tables):
+        if any(len(table.columns) != len(tables[0].columns) for table in tables[1:]):
+            raise NotSupportedError('different #columns')
+        return Relation(
+            [
+                (None, columns[0][1], np.concatenate([c[2] for c in columns], axis=1),
+                 np.concatenate([c[3] for c in columns], axis=1))
+                for columns in zip(*[table.columns for table in tables])
+            ],
+            np.concatenate([table.valid for table in tables], axis=1),
+        )
+
+    def _distinct(self, table):
+        rows = [column[2:] for column in table.columns]
+        table.valid = _first_occurrences(_null_safe_same(rows, rows), table.valid)
+        return table
+
+    def _query(self, query):
+        if not isinstance(query, dict):
+            raise NotSupportedError(query)
+        for operator in ['union_all', 'union']:
+            if operator in query:
+                if len(set(query) - {operator, 'orderby'}) > 0:
+                    raise NotSupportedError(', '.join(sorted(query)))
+                out = self._concatenate([self._query(q) for q in query[operator]])
+                return self._distinct(out) if operator == 'union' else out
+        unsupported = set(query) - {'select', 'select_distinct', 'from', 'where', 'groupby', 'having', 'orderby'}
+        if len(unsupported) > 0 or 'from' not in query:
+            raise NotSupportedError(', '.join(sorted(unsupported)) or 'SELECT without FROM')
+        distinct = 'select_distinct' in query
+        table = self._from(query['from'])
+        if 'where' in query:
+            table.valid = table.valid & self._truth(self._eval(query['where'], table))
+        table = _compact(table)
+        items = self._select_items(query['select_distinct' if distinct else 'select'], table)
+
+        group = None
+        valid = table.valid
+        if 'groupby' in query or _has_aggregate([value for _, value in items] + [query.get('having')]):
+            if 'groupby' in query:
+                keys = query['groupby'] if isinstance(query['groupby'], list) else [query['groupby']]
+                keys = [self._eval(key['value'], table) for key in keys]
+                group = _null_safe_same(keys, keys) & (table.valid[:, :, None] & table.valid[:, None, :])
+                # the first tuple of every group stands for the group
+                valid = _first_occurrences(group, table.valid)
+            else:
+                # a single group over all tuples, even if there is no tuple
+                group = np.broadcast_to(table.valid[:, None, :], table.valid.shape + table.valid.shape[1:])
+                valid = np.zeros_like(table.valid)
+                valid[:, 0] = True
+            if 'having' in query:
+                valid = valid & self._truth(self._eval(query['having'], table, group))
+        elif 'having' in query:
+            raise NotSupportedError('HAVING without GROUP BY')
+
+        columns = []
+        for name, value in items:
+            if isinstance(value, dict) and '__column__' in value:
+                values, nulls = value['__column__'][2:]
+            else:
+                values, nulls = self._eval(value, table, group)
+            columns.append((None, name, values, nulls))
+        out = Relation(columns, valid)
+        return self._distinct(out) if distinct else out
+
+    def evaluate(self, *queries):
+        """results (`Relation`) of queries on every database of the batch"""
+        query_asts = [self.sql_parser.parse(query, dialect=self.dialect) for query in queries]
+        self._encode(query_asts)
+        return [self._query(query_ast) for query_ast in query_asts]
+
+    def differ(self, *queries):
+        """(B,) array whether the results of queries differ as bags on every database"""
+        results = self.evaluate(*queries)
+        rows = [[column[2:] for column in result.columns] for result in results]
+        if any(len(r) != len(rows[0]) for r in rows[1:]):
+            raise NotSupportedError('different #columns')
+        differ = np.zeros(self.size, dtype=bool)
+        lhs, lhs_rows = results[0], rows[0]
+        for rhs, rhs_rows in zip(results[1:], rows[1:]):
+            for (x, x_rows), (y, y_rows) in [((lhs, lhs_rows), (rhs, rhs_rows)), ((rhs, rhs_rows), (lhs, lhs_rows))]:
+                # multiplicities of every tuple of x in x and y
+                in_x = (_null_safe_same(x_rows, x_rows) & x.valid[:, None, :]).sum(axis=-1)
+                in_y = (_null_safe_same(x_rows, y_rows) & y.valid[:, None, :]).sum(axis=-1)
+                differ |= (x.valid & (in_x != in_y)).any(axis=-1)
+        return differ
+
+
+__all__ = [
+    'BatchEvaluator',
+]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from cache import ResultCache
+from constants import STATE
+from environment import Environment
+from pruning import prune_schema
+
+"""
+Setup of a single check shared by `cli_within_bound.py` and `cli_within_timeout.py`; `args` are their parsed
+command-line arguments.
+"""
+
+
+def build_environment(args):
+    return Environment(timer=True, generate_counterexample=True, sort_encoding=args.sort_encoding,
+                       bag_encoding=args.bag_encoding, group_encoding=args.group_encoding, portfolio=args.portfolio,
+                       cache_dir=args.cache, symmetry_breaking=bool(args.symmetry_breaking), precheck=args.precheck,
+                       key_encoding=args.key_encoding, foreign_key_encoding=args.foreign_key_encoding,
+                       profile=bool(args.profile))
+
+
+def cached_outs(cache: ResultCache, args, schema, constraint, query1, query2, bound_size):
+    """outputs of a cached EQU/NEQ result, so that no worker is bothered"""
+    if cache is None:
+        return None
+    key = ResultCache.key(query1, query2, schema, constraints=constraint if args.integrity_constraint else None)
+    cached = cache.lookup(key, bound_size)
+    if cached is None or cached['state'] not in {STATE.EQUIV, STATE.NON_EQUIV}:
+        return None
+    counterexample = (cached['counterexample'] or {}).get('sql_code', None)
+    return [cached['state'], cached['traversing_time'] or 0., cached['solving_time'], counterexample, None, None]
+
+
+def prune(args, schema, constraint, query1, query2):
+    """schema and constraints of a pair, restricted to the tables and columns it may read with `--prune`"""
+    if not args.prune:
+        return schema, constraint
+    return prune_schema(schema, constraint if args.integrity_constraint else None, query1, query2)
+
+
+__all__ = [
+    'build_environment',
+    'cached_outs',
+    'prune',
+]
@@ -2,24 +2,53 @@
 
 import argparse
 import time
+from functools import partial
 from multiprocessing import (
     Process,
     Queue,
     cpu_count,
-    Manager,
 )
+from queue import Empty
 
 import tqdm
 import ujson
-from prettytable import PrettyTable
 
+from cache import ResultCache
 from constants import *
-from environment import Environment
 from errors import *
 from logger import LOGGER
-from utils import (
-    divide,
+from parallel.checks import (
+    build_environment,
+    cached_outs,
+    prune,
 )
+from parallel.result_writer import (
+    ResultWriter,
+    load_progress,
+    merge,
+    part_file,
+    prepare,
+)
+from parallel.evaluation import evaluation
+from parallel.metrics import (
+    collect_metrics,
+    is_timeout,
+    record_metrics,
+    solver_deadline,
+)
+from parallel.schema_templates import SchemaTemplates
+from parallel.scheduler import (
+    ORDER,
+    WorkerStats,
+    dispatch,
+    sort_tasks,
+    utilization_table,
+)
+from parallel.worker import (
+    TASK_DONE,
+    Worker,
+)
+from portfolio import PORTFOLIO_CONFIGS
 
 parser = argparse.ArgumentParser(description='DBChecker cli')
 parser.add_argument('-f', '--file', type=str)
@@ -30,24 +59,124 @@ parser.add_argument('-m', '--mode', type=str, default='train', choices=['train',
 parser.add_argument('-c', '--cores', type=int, default=1, choices=list(range(1, 1 + cpu_count())))
 parser.add_argument('-i', '--integrity_constraint', default=1, choices=[0, 1], type=int)
 parser.add_argument('-o', '--out_file', type=str, default=None)
+# ORDER BY/LIMIT encoding
+parser.add_argument('-e', '--sort_encoding', type=str, default=SORT_ENCODING.BUBBLE,
+                    choices=[SORT_ENCODING.BUBBLE, SORT_ENCODING.NETWORK, SORT_ENCODING.PERMUTATION])
+# bag equality encoding
+parser.add_argument('-b', '--bag_encoding', type=str, default=BAG_ENCODING.PAIRWISE,
+                    choices=[BAG_ENCODING.PAIRWISE, BAG_ENCODING.FINGERPRINT])
+# GROUP BY encoding
+parser.add_argument('-g', '--group_encoding', type=str, default=GROUP_ENCODING.PAIRWISE,
+                    choices=[GROUP_ENCODING.PAIRWISE, GROUP_ENCODING.GROUP_ID])
+# PRIMARY KEY encoding
+parser.add_argument('-k', '--key_encoding', type=str, default=KEY_ENCODING.DISTINCT,
+                    choices=[KEY_ENCODING.PAIRWISE, KEY_ENCODING.DISTINCT])
+# FOREIGN KEY encoding
+parser.add_argument('--foreign_key_encoding', type=str, default=FOREIGN_KEY_ENCODING.DISJUNCTION,
+                    choices=[FOREIGN_KEY_ENCODING.DISJUNCTION, FOREIGN_KEY_ENCODING.WITNESS])
+# lexicographic order over the tuples of base tables (skipped for ORDER BY/LIMIT queries)
+parser.add_argument('--symmetry_breaking', default=0, choices=[0, 1], type=int)
+# run queries on N random databases (SQLite) before the symbolic check
+parser.add_argument('--precheck', default=0, type=int)
+# race the default solver with N other solver configurations (one more process per configuration)
+parser.add_argument('-p', '--portfolio', type=int, default=0, choices=list(range(1 + len(PORTFOLIO_CONFIGS))))
+# grow tables tuple by tuple inside one solver session, instead of a fresh process per bound size
+parser.add_argument('-d', '--deepening', default=0, choices=[0, 1], type=int)
+# respawn a verifier worker after N tasks to bound memory growth (0: never)
+parser.add_argument('-r', '--max_tasks', type=int, default=100)
+# #schema templates (declared tables and constraints) a worker keeps to reuse across pairs (0: never)
+parser.add_argument('--schema_templates', type=int, default=4)
+# dispatch order of pairs: benchmark order, or longest expected first by query size/previous run times
+parser.add_argument('--order', type=str, default=ORDER.FILE, choices=[ORDER.FILE, ORDER.SIZE, ORDER.HISTORY])
+parser.add_argument('--history', type=str, default=None, help='a previous `.out` file for `--order history`')
+# reuse/store results of previous runs in an on-disk cache under this directory
+parser.add_argument('--cache', type=str, default=None)
+# skip the pairs finished by a previous (crashed or smaller-bound) run on the same `out_file`
+parser.add_argument('--resume', default=0, choices=[0, 1], type=int)
+# only declare tables/columns the pair may read (directly or through integrity constraints), see `pruning.py`
+parser.add_argument('--prune', default=0, choices=[0, 1], type=int)
+# per-stage time, #tuple sorts, #formulas and AST sizes of every check in the `metrics` of records
+parser.add_argument('--profile', default=0, choices=[0, 1], type=int)
+# also write a Chrome trace file of every profiled check into this directory
+parser.add_argument('--trace_dir', type=str, default=None)
+# `eval` mode: also summarize solver statistics of records by bound size and operator
+parser.add_argument('--summary', default=0, choices=[0, 1], type=int)
 args = parser.parse_args()
+args.max_tasks = args.max_tasks or None
+cache = ResultCache(args.cache) if args.cache is not None else None
 
 
-def verify(schema, constraint, query1, query2, bound_size, queue: Queue):
+# per worker process, pairs on the same schema/constraints/bound size share one Environment
+schema_templates = SchemaTemplates(partial(build_environment, args), max_templates=args.schema_templates)
+
+
+def verify(schema, constraint, query1, query2, bound_size, deadline, queue: Queue):
     err_info = None
-    with Environment(timer=True, generate_code=True) as env:
-        for name, db in schema.items():
-            env.create_database(db, bound_size=bound_size, name=name)
-        if args.integrity_constraint and constraint is not None:
-            env.add_constraints(constraint)
-        env.save_checkpoints()
-        env.reload_checkpoints()
+    start = time.time()
+    env = schema_templates.get(schema, constraint if args.integrity_constraint else None, bound_size)
+    env.traversing_time = start
+    env.deadline = solver_deadline(deadline, args.timeout)
+    try:
+        result = env.analyze(query1, query2)
+        if result == False:
+            raise NotEquivalenceError()
+        else:
+            state = STATE.EQUIV
+    except SyntaxError as err:
+        err_info = str(err)
+        state = STATE.SYN_ERR
+    except NotEquivalenceError as err:
+        err_info = str(err)
+        state = STATE.NON_EQUIV
+    except TimeoutError as err:
+        err_info = str(err)
+        state = STATE.TIMEOUT
+    except NotSupportedError as err:
+        err_info = str(err)
+        state = STATE.NOT_SUP_ERR
+    except UnknownError as err:
+        if is_timeout(env.reason_unknown):
+            err_info = 'Time Out!'
+            state = STATE.TIMEOUT
+        else:
+            err_info = str(err)
+            state = STATE.UNKNOWN
+    except NotImplementedError as err:
+        err_info = str(err)
+        state = STATE.NOT_IMPL_ERR
+    except Exception as err:
+        err_info = str(err)
+        state = STATE.OTHER_ERR
+    counterexample = env.sql_code if isinstance(env.sql_code, str) else None
+    metrics = collect_metrics(env, query1, query2, bound_size, trace_dir=args.trace_dir)
+    if env.solving_time is None:
+        outs = [state, round(time.time() - env.traversing_time, 6), None, counterexample, err_info, metrics]
+    else:
+        outs = [state, env.traversing_time, env.solving_time, counterexample, err_info, metrics]
+    # an unexpected error might leave the template half-updated
+    schema_templates.release(env, reuse=state != STATE.OTHER_ERR)
+    queue.put(outs)
+
+
+def verify_with_deepening(schema, constraint, query1, query2, max_bound_size, deadline, queue: Queue):
+    # outputs of each bound size are pushed into the queue as soon as they are solved
+    with build_environment(args) as env:
+        env.deadline = solver_deadline(deadline, args.timeout)
+        err_info = state = None
+        bound_size = 1
         try:
-            result = env.analyze(query1, query2)
-            if result == False:
-                raise NotEquivalenceError()
-            else:
-                state = STATE.EQUIV
+            rounds = env.deepen(
+                schema, constraint if args.integrity_constraint else None, query1, query2,
+                max_bound_size=max_bound_size,
+            )
+            # `deepen` yields one round per bound size until queries are not equivalent
+            while bound_size <= max_bound_size:
+                _, result = next(rounds)
+                if result == False:
+                    raise NotEquivalenceError()
+                metrics = collect_metrics(env, query1, query2, bound_size, trace_dir=args.trace_dir)
+                queue.put([STATE.EQUIV, env.traversing_time, env.solving_time, None, None, metrics])
+                bound_size += 1
         except SyntaxError as err:
             err_info = str(err)
             state = STATE.SYN_ERR
@@ -61,26 +190,79 @@ def verify(schema, constraint, query1, query2, bound_size, queue: Queue):
             err_info = str(err)
             state = STATE.NOT_SUP_ERR
         except UnknownError as err:
-            err_info = str(err)
-            state = STATE.UNKNOWN
+            if is_timeout(env.reason_unknown):
+                err_info = 'Time Out!'
+                state = STATE.TIMEOUT
+            else:
+                err_info = str(err)
+                state = STATE.UNKNOWN
         except NotImplementedError as err:
             err_info = str(err)
             state = STATE.NOT_IMPL_ERR
         except Exception as err:
             err_info = str(err)
             state = STATE.OTHER_ERR
-        counterexample = env.sql_code if isinstance(env.sql_code, str) else None
-        if env.solving_time is None:
-            outs = [state, round(time.time() - env.traversing_time, 6), None, counterexample, err_info]
-        else:
-            outs = [state, env.traversing_time, env.solving_time, counterexample, err_info]
-        for o in outs:
-            queue.put(o)
+        if state is not None:
+            counterexample = env.sql_code if isinstance(env.sql_code, str) else None
+            metrics = collect_metrics(env, query1, query2, bound_size, trace_dir=args.trace_dir)
+            if env.solving_time is None:
+                outs = [state, round(time.time() - env.traversing_time, 6), None, counterexample, err_info, metrics]
+            else:
+                outs = [state, env.traversing_time, env.solving_time, counterexample, err_info, metrics]
+            queue.put(outs)
+
+
+def process_ends_with_deepening(
+        index, schema, constraint, query1, query2, max_bound_size, states, time_cost,
+        timeout, worker: Worker
+):
+    result = {
+        'index': index,
+        'pair': [query1, query2],
+        'states': [],
+        'times': [],
+        'counterexample': None,
+        'err': None,
+    }
+    # one solver session grows tables from bound size 1, so neither cached results nor the states of a resumed run
+    # (`states`/`time_cost`) are used: the session would have to rebuild those bound sizes anyway
+    schema, constraint = prune(args, schema, constraint, query1, query2)
+    start = time.time()
+    worker.submit(schema, constraint, query1, query2, max_bound_size, start + timeout)
+    while True:
+        remaining = timeout - (time.time() - start)
+        if remaining <= 0:
+            LOGGER.debug("timed out, restarting the worker")
+            worker.restart()
+            result['states'].append(STATE.TIMEOUT)
+            result['times'].append(None)
+            break
+        try:
+            outs = worker.get(timeout=remaining)
+        except Empty:
+            continue
+        except ChildProcessError:
+            # worker died without reporting, e.g., out of memory
+            result['states'].append(STATE.OOM)
+            result['times'].append(None)
+            break
+        if outs is TASK_DONE:
+            if len(result['states']) == 0:
+                result['states'].append(STATE.OOM)
+                result['times'].append(None)
+            break
+        state, traversing_time, solving_time, counterexample, err, metrics = outs
+        result['states'].append(state)
+        result['times'].append([traversing_time, solving_time])
+        result['counterexample'] = counterexample
+        result['err'] = err
+        record_metrics(result, len(result['states']), metrics)
+    return result
 
 
 def process_ends_with_max_timeout(
         index, schema, constraint, query1, query2, max_bound_size, states, time_cost,
-        timeout, queue: Queue
+        timeout, worker: Worker
 ):
     result = {
         'index': index,
@@ -90,6 +272,7 @@ def process_ends_with_max_timeout(
         'counterexample': None,
         'err': None,
     }
+    schema, constraint = prune(args, schema, constraint, query1, query2)
     if states is not None and time_cost is not None:
         result['states'] = states
         result['times'] = time_cost
@@ -99,70 +282,79 @@ def process_ends_with_max_timeout(
     bound_size = len(result['states']) + 1
     pbar.set_description(f'Bound size: {bound_size:5d} | Thread: {1:3d}', refresh=False)
     pbar.update(bound_size)
-    queue.empty()
-    proc = Process(
-        target=verify,
-        args=(schema, constraint, query1, query2, bound_size, queue,),
-    )
-    proc.start()
+
+    def _submit(bound_size):
+        # a cached result saves the worker a task
+        outs = cached_outs(cache, args, schema, constraint, query1, query2, bound_size)
+        if outs is None:
+            worker.submit(schema, constraint, query1, query2, bound_size, start + timeout)
+        return outs
 
     start = time.time()
-    while time.time() - start <= timeout:
-        if not proc.is_alive():
-            # All the processes are done, break now.
-            try:
-                state, traversing_time, solving_time, counterexample, err = [queue.get() for _ in range(queue.qsize())]
-                result['states'].append(state)
-                result['times'].append([traversing_time, solving_time])
-                result['counterexample'] = counterexample
-                result['err'] = err
-            except ValueError:
-                # out of memory
-                state = STATE.OOM
-                result['states'].append(state)
+    outs = _submit(bound_size)
+    while True:
+        if outs is None:
+            remaining = timeout - (time.time() - start)
+            if remaining <= 0:
+                LOGGER.debug("timed out, restarting the worker")
+                worker.restart()
+                result['states'].append(STATE.TIMEOUT)
                 result['times'].append(None)
-
-            if state == STATE.EQUIV:
-                # only continute if queries are = or !=
-                bound_size = len(result['states']) + 1
-                pbar.set_description(f'Bound size: {bound_size:5d} | Thread: {1:3d}', refresh=False)
-                pbar.update(bound_size)
-                queue.empty()
-                proc = Process(
-                    target=verify,
-                    args=(schema, constraint, query1, query2, bound_size, queue,),
-                )
-                proc.start()
-            else:
-                # not support
                 break
+            try:
+                outs = worker.get(timeout=remaining)
+            except Empty:
+                continue
+            except ChildProcessError:
+                outs = TASK_DONE
+            else:
+                if outs is not TASK_DONE:
+                    worker.finish()
+        if outs is TASK_DONE:
+            # out of memory
+            state = STATE.OOM
+            result['states'].append(state)
+            result['times'].append(None)
         else:
-            time.sleep(0.1)  # Just to avoid hogging the CPU
-    else:
-        # We only enter this if we didn't 'break' above.
-        LOGGER.debug("timed out, killing all processes")
-        proc.terminate()
-        proc.join()
-        result['states'].append(STATE.TIMEOUT)
-        result['times'].append(None)
+            state, traversing_time, solving_time, counterexample, err, metrics = outs
+            result['states'].append(state)
+            result['times'].append([traversing_time, solving_time])
+            result['counterexample'] = counterexample
+            result['err'] = err
+            record_metrics(result, bound_size, metrics)
+
+        if state == STATE.EQUIV:
+            # only continute if queries are = or !=
+            bound_size = len(result['states']) + 1
+            pbar.set_description(f'Bound size: {bound_size:5d} | Thread: {1:3d}', refresh=False)
+            pbar.update(bound_size)
+            outs = _submit(bound_size)
+        else:
+            # not support
+            break
     return result
 
 
-def core(pbar, out_file, desc, timeout, worker_idx):
-    pbar = tqdm.tqdm(pbar, desc=desc, mininterval=10)
+def core(tasks: Queue, out_file, desc, timeout, worker_idx, stats_queue: Queue, total=None):
+    pbar = tqdm.tqdm(iter(tasks.get, None), desc=desc, mininterval=10, total=total)
+    stats = WorkerStats(worker_idx)
 
-    os.makedirs(os.path.dirname(out_file), exist_ok=True)
-    with open(out_file, 'w') as writer:
+    target = verify_with_deepening if args.deepening else verify
+    with ResultWriter(out_file) as writer, Worker(target, max_tasks=args.max_tasks) as worker:
         for parameters in pbar:
+            stats.task_started()
             file_path = parameters.pop(-1)
-            manager = Manager()
-            queue = manager.Queue()
-            out = process_ends_with_max_timeout(*parameters, timeout, queue)
+            if args.deepening:
+                out = process_ends_with_deepening(*parameters, timeout, worker)
+            else:
+                out = process_ends_with_max_timeout(*parameters, timeout, worker)
             # to log for check
             out['file'] = file_path
             out['schema'] = parameters[1]
             out['constraint'] = parameters[2]
-            print(ujson.dumps(out, ensure_ascii=False), file=writer)
+            writer.write(out)
+            stats.task_finished()
+    stats_queue.put(stats.close().to_dict())
 
 
 def train(args):
@@ -185,159 +377,56 @@ def train(args):
                 file_path = context['benchmark']
             states = timecost = None
             parameters.append([index, schema, constraint, *pair, args.bound_size, states, timecost, file_path])
-        # out_file = args.file[:args.file.rfind('.jsonlines')] + '.out'
-        # if os.path.exists(out_file):
-        #     with open(out_file, 'r') as reader:
-        #         for idx, line in enumerate(reader):
-        #             line = ujson.loads(line)
-        #             parameters[idx][-2] = line['states']
-        #             parameters[idx][-1] = line['times']
         count = len(parameters)
+        indices = [task[0] for task in parameters]
+        assert len(set(indices)) == count, f'Duplicate indices in {args.file}'
+        # skip finished pairs of a previous run, and continue the ones verified up to a smaller bound
+        prepare(args.out_file, resume=args.resume)
+        finished, unfinished = load_progress(args.out_file, args.bound_size)
+        parameters = [task for task in parameters if task[0] not in finished]
+        for task in parameters:
+            if task[0] in unfinished:
+                task[-3], task[-2] = unfinished[task[0]]
+        parameters = sort_tasks(parameters, order=args.order, history_file=args.history, timeout=args.timeout)
 
+        stats_queue = Queue()
         if args.cores == 1:
             core(
-                parameters,
-                args.out_file,
+                dispatch(parameters, workers=1),
+                part_file(args.out_file, 0),
                 f'Bound size: {args.bound_size:3d} | Thread: {1:3d}',
                 args.timeout,
-                worker_idx=1,
+                0,
+                stats_queue,
+                total=len(parameters),
             )
+            stats = [stats_queue.get()]
         else:
-            parameters = list(divide(parameters, partitions=args.cores))
+            # workers pull pairs from a shared queue, so that no worker idles while others hold a backlog
+            tasks = dispatch(parameters, workers=args.cores)
             procs = []
-            for worker_idx in range(len(parameters)):
+            for worker_idx in range(args.cores):
                 proc = Process(
                     target=core,
                     args=(
-                        parameters[worker_idx],
-                        args.out_file + str(worker_idx),
+                        tasks,
+                        part_file(args.out_file, worker_idx),
                         f'Bound size: {args.bound_size:3d} | Thread: {worker_idx:3d}',
                         args.timeout,
                         worker_idx,
+                        stats_queue,
                     ),
                 )
                 proc.start()
                 procs.append(proc)
 
+            stats = [stats_queue.get() for _ in procs]
             for proc in procs:
                 proc.join()
 
-            with open(args.out_file, 'w') as writer:
-                results = []
-                for worker_idx in range(len(parameters)):
-                    file = args.out_file + str(worker_idx)
-                    with open(file, 'r') as reader:
-                        for line in reader:
-                            line = ujson.loads(line)
-                            results.append(line)
-                    os.remove(file)
-                assert len(results) == count, (args.file, len(results), count)
-                for line in results:
-                    print(ujson.dumps(line), file=writer)
-
-
-def evaluation(args):
-    def load_records(file):
-        with open(file, 'r') as reader:
-            performances = [ujson.loads(line) for line in reader]
-        return performances
-
-    performances = load_records(file=args.out_file)
-    history = PrettyTable([
-        'Datatime', '#Rows', '#Equiv', '#NotEquiv', '#SynErr', f'#TimeOut({args.timeout})', '#NotSupErr',
-        '#NotImplErr', '#Unknown', '#OtherErrs', '#Total', 'SuccessRate(%)', 'TotalTime(s)',
-    ])
-
-    for bound_size in range(1, 1 + args.bound_size):
-
-        results = {
-            '#Equiv': 0,
-            '#NotEquiv': 0,
-            '#SynErr': 0,
-            '#TimeOut': 0,
-            '#NotSupErr': 0,
-            '#NotImplErr': 0,
-            '#Unknown': 0,
-            '#OtherErrs': 0,
-            '#Total': 0,
-            'SuccessRate(%)': 0,
-            'TotalTime(s)': 0,
-        }
-        for query in performances:
-            gt, case = query['pair']
-            states, times = query['states'], query['times']
-            state, time_cost = states[bound_size - 1], times[bound_size - 1]
-            if state == STATE.EQUIV:
-                results['#Equiv'] += 1
-            else:
-                if state == STATE.NON_EQUIV:
-                    results['#NotEquiv'] += 1
-                    # print([gt, case])
-                elif state == STATE.TIMEOUT:
-                    results['#TimeOut'] += 1
-                    # print([gt, case])
-                elif state == STATE.SYN_ERR:
-                    results['#SynErr'] += 1
-                    # print([gt, case])
-                elif state == STATE.NOT_SUP_ERR:
-                    results['#NotSupErr'] += 1
-                    # print([gt, case])
-                elif state == STATE.NOT_IMPL_ERR:
-                    results['#NotImplErr'] += 1
-                    # print([gt, case])
-                elif state == STATE.UNKNOWN:
-                    results['#Unknown'] += 1
-                    # print([gt, case])
-                elif state == STATE.OTHER_ERR:
-                    results['#OtherErrs'] += 1
-                    # print([gt, case])
-                else:
-                    # print(f'Unknown Error: {[gt, case]}')
-                    raise NotImplementedError
-            results['TotalTime(s)'] += time_cost
-
-        results['#Total'] = len(performances)
-        results['SuccessRate(%)'] = (results["#Equiv"] + results["#NotEquiv"]) / results['#Total']
-
-        now = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        history.add_row([
-            now, bound_size, f'{results["#Equiv"]:3,}', f'{results["#NotEquiv"]:3,}',
-            f'{results["#SynErr"]:3,}', f'{results["#TimeOut"]:3,}', f'{results["#NotSupErr"]:3,}',
-            f'{results["#NotImplErr"]:3,}', f'{results["#Unknown"]:3,}', f'{results["#OtherErrs"]:3,}',
-            f'{results["#Total"]:3,}', f"{results['SuccessRate(%)']:.2%}", f'{results["TotalTime(s)"]:6.4f}',
-        ])
-    print(history)
-
-    EQUIV, NON_EQUIV, NO_SUPP, TIME_OUT, TIME_COST = 0, 0, 0, 0, 0
-    for prf in performances:
-        state = prf['states'][0]
-        time_cost = prf['times'][0]
-        if state == STATE.TIMEOUT:
-            TIME_OUT += 1
-        elif state == STATE.NON_EQUIV:
-            NON_EQUIV += 1
-        elif state == STATE.EQUIV:
-            for i, state in enumerate(prf['states'][1:], start=1):
-                time_cost += prf['times'][i]
-                if state == STATE.NON_EQUIV:
-                    NON_EQUIV += 1
-                    break
-                elif state == STATE.TIMEOUT:
-                    EQUIV += 1
-                    break
-                elif state == STATE.EQUIV:
-                    pass
-                else:
-                    raise NotImplementedError(state)
-            if state == STATE.EQUIV:
-                EQUIV += 1
-        else:
-            NO_SUPP += 1
-        TIME_COST += time_cost
-    AVG_TIME_COST = round(TIME_COST / len(performances), 2)
-    SUCCESS_RATE = (EQUIV + NON_EQUIV) / len(performances)
-    print(
-        f'#EQUIV: {EQUIV:3,}, #NON-EQUIV: {NON_EQUIV:3,}, #NOT-SUPP: {NO_SUPP:3,}, #TIMEOUT: {TIME_OUT:3,}, AvgTIME: {AVG_TIME_COST:.2f}s, SuccessRate: {SUCCESS_RATE:.2%}')
+        written = merge(args.out_file, indices)
+        assert written == count, (args.file, written, count)
+        LOGGER.info(f'Worker utilization:\n{utilization_table(stats)}')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+import ujson
+from prettytable import PrettyTable
+
+from constants import STATE
+from parallel.metrics import metrics_summary
+
+"""
+`eval` mode of `cli_within_bound.py` and `cli_within_timeout.py`: summarize the records of `args.out_file` per bound
+size. A pair is only counted at the bound sizes it was checked at, e.g., not after it is found non-equivalent.
+"""
+
+
+def _time_cost(times):
+    # [traversing time, solving time] of a check, either may be missing (e.g., timeouts)
+    if times is None:
+        return 0.
+    if isinstance(times, list):
+        return sum(time_cost for time_cost in times if time_cost is not None)
+    return times
+
+
+def evaluation(args):
+    def load_records(file):
+        with open(file, 'r') as reader:
+            performances = [ujson.loads(line) for line in reader]
+        return performances
+
+    performances = load_records(file=args.out_file)
+    history = PrettyTable([
+        'Datatime', '#Rows', '#Equiv', '#NotEquiv', '#SynErr', f'#TimeOut({args.timeout})', '#NotSupErr',
+        '#NotImplErr', '#Unknown', '#OtherErrs', '#Total', 'SuccessRate(%)', 'TotalTime(s)',
+    ])
+
+    for bound_size in range(1, 1 + args.bound_size):
+
+        results = {
+            '#Equiv': 0,
+            '#NotEquiv': 0,
+            '#SynErr': 0,
+            '#TimeOut': 0,
+            '#NotSupErr': 0,
+            '#NotImplErr': 0,
+            '#Unknown': 0,
+            '#OtherErrs': 0,
+            '#Total': 0,
+            'SuccessRate(%)': 0,
+            'TotalTime(s)': 0,
+        }
+        checked = [query for query in performances if len(query['states']) >= bound_size]
+        for query in checked:
+            gt, case = query['pair']
+            states, times = query['states'], query['times']
+            state, time_cost = states[bound_size - 1], times[bound_size - 1]
+            if state == STATE.EQUIV:
+                results['#Equiv'] += 1
+            else:
+                if state == STATE.NON_EQUIV:
+                    results['#NotEquiv'] += 1
+                    # print([gt, case])
+                elif state == STATE.TIMEOUT:
+                    results['#TimeOut'] += 1
+                    # print([gt, case])
+                elif state == STATE.SYN_ERR:
+                    results['#SynErr'] += 1
+                    # print([gt, case])
+                elif state == STATE.NOT_SUP_ERR:
+                    results['#NotSupErr'] += 1
+                    # print([gt, case])
+                elif state == STATE.NOT_IMPL_ERR:
+                    results['#NotImplErr'] += 1
+                    # print([gt, case])
+                elif state == STATE.UNKNOWN:
+                    results['#Unknown'] += 1
+                    # print([gt, case])
+                elif state == STATE.OTHER_ERR:
+                    results['#OtherErrs'] += 1
+                    # print([gt, case])
+                else:
+                    # print(f'Unknown Error: {[gt, case]}')
+                    raise NotImplementedError
+            results['TotalTime(s)'] += _time_cost(time_cost)
+
+        results['#Total'] = len(checked)
+        results['SuccessRate(%)'] = (results["#Equiv"] + results["#NotEquiv"]) / max(results['#Total'], 1)
+
+        now = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        history.add_row([
+            now, bound_size, f'{results["#Equiv"]:3,}', f'{results["#NotEquiv"]:3,}',
+            f'{results["#SynErr"]:3,}', f'{results["#TimeOut"]:3,}', f'{results["#NotSupErr"]:3,}',
+            f'{results["#NotImplErr"]:3,}', f'{results["#Unknown"]:3,}', f'{results["#OtherErrs"]:3,}',
+            f'{results["#Total"]:3,}', f"{results['SuccessRate(%)']:.2%}", f'{results["TotalTime(s)"]:6.4f}',
+        ])
+    print(history)
+    if args.summary:
+        print(metrics_summary(performances))
+
+    EQUIV, NON_EQUIV, NO_SUPP, TIME_OUT, TIME_COST = 0, 0, 0, 0, 0
+    for prf in performances:
+        state = prf['states'][0]
+        time_cost = _time_cost(prf['times'][0])
+        if state == STATE.TIMEOUT:
+            TIME_OUT += 1
+        elif state == STATE.NON_EQUIV:
+            NON_EQUIV += 1
+        elif state == STATE.EQUIV:
+            for i, state in enumerate(prf['states'][1:], start=1):
+                time_cost += _time_cost(prf['times'][i])
+                if state == STATE.NON_EQUIV:
+                    NON_EQUIV += 1
+                    break
+                elif state == STATE.EQUIV:
+                    pass
+                else:
+                    # equivalent up to the previous bound size, e.g., timed out at this one
+                    EQUIV += 1
+                    break
+            if state == STATE.EQUIV:
+                EQUIV += 1
+        else:
+            NO_SUPP += 1
+        TIME_COST += time_cost
+    AVG_TIME_COST = round(TIME_COST / max(len(performances), 1), 2)
+    SUCCESS_RATE = (EQUIV + NON_EQUIV) / max(len(performances), 1)
+    print(
+        f'#EQUIV: {EQUIV:3,}, #NON-EQUIV: {NON_EQUIV:3,}, #NOT-SUPP: {NO_SUPP:3,}, #TIMEOUT: {TIME_OUT:3,}, AvgTIME: {AVG_TIME_COST:.2f}s, SuccessRate: {SUCCESS_RATE:.2%}')
+
+
+__all__ = [
+    'evaluation',
+]
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import re
+import resource
+import sys
+from collections import (
+    Counter,
+    defaultdict,
+)
+
+import ujson
+from prettytable import PrettyTable
+
+from constants import STATE
+
+# operators of a pair, by its SQL
+OPERATOR_PATTERNS = {
+    'join': re.compile(r'\bJOIN\b|\bFROM\s+\w+(\s+(AS\s+)?\w+)?\s*,', re.IGNORECASE),
+    'distinct': re.compile(r'\bDISTINCT\b', re.IGNORECASE),
+    'groupby': re.compile(r'\bGROUP\s+BY\b|\b(COUNT|SUM|AVG|MAX|MIN)\s*\(', re.IGNORECASE),
+    'orderby': re.compile(r'\bORDER\s+BY\b', re.IGNORECASE),
+    'limit': re.compile(r'\bLIMIT\b|\bOFFSET\b|\bFETCH\b', re.IGNORECASE),
+    'setop': re.compile(r'\bUNION\b|\bINTERSECT\b|\bEXCEPT\b', re.IGNORECASE),
+    'subquery': re.compile(r'\bEXISTS\b|\bIN\s*\(\s*SELECT\b', re.IGNORECASE),
+}
+# z3 counters shown in the summary, `arith-*` counters are summed up into `arith`
+SUMMARY_COUNTERS = ['conflicts', 'decisions', 'propagations', 'quant instantiations', 'arith', 'max memory']
+
+
+def solver_deadline(deadline: float, timeout: float):
+    """
+    when the solver of a worker gives up: a bit earlier than the parent kills the worker at `deadline`, so that a
+    timed-out check still reports its statistics
+    """
+    return deadline - min(timeout * 0.05, 1.)
+
+
+def is_timeout(reason_unknown):
+    """z3 reports a timeout of an incremental solver (e.g., after `push`, cf. `Environment.deepen`) as `canceled`"""
+    return reason_unknown in {'timeout', 'canceled'}
+
+
+def peak_rss():
+    """peak resident set size (MB) of the current process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 ** 2 if sys.platform == 'darwin' else 1024), 2)  # bytes on macOS, KB on Linux
+
+
+def collect_metrics(env, query1, query2, bound_size, trace_dir=None):
+    """
+    measurements of the last check of `env`
+    statistics/reason_unknown: counters and the final `reason_unknown` of the solver (missing if nothing was solved)
+    peak_rss: peak RSS (MB) of the worker so far
+    stages: per-stage summary of `env.profiler`, whose records are cleared for the next check
+    trace: a Chrome trace file `{trace_dir}/{hash of the pair}-{bound_size}.json` of these stages
+    """
+    metrics = {}
+    if env.solver_statistics is not None:
+        metrics['statistics'] = env.solver_statistics
+        metrics['reason_unknown'] = env.reason_unknown
+    metrics['peak_rss'] = peak_rss()
+    if env.profiler is not None:
+        metrics['stages'] = env.profiler.summary()
+        if trace_dir is not None:
+            name = hashlib.md5(ujson.dumps([query1, query2]).encode('utf-8')).hexdigest()[:16]
+            metrics['trace'] = os.path.join(trace_dir, f'{name}-{bound_size}.json')
+            env.profiler.chrome_trace(metrics['trace'])
+        env.profiler.clear()
+    return metrics
+
+
+def record_metrics(result, bound_size, metrics):
+    """append measurements of a bound size into a result record"""
+    if metrics is not None:
+        result.setdefault('metrics', []).append({'bound_size': bound_size, **metrics})
+
+
+def pair_operators(pair):
+    return sorted(name for name, pattern in OPERATOR_PATTERNS.items() if any(pattern.search(sql) for sql in pair))
+
+
+def _counters(statistics):
+    counters = {key: statistics.get(key, 0) for key in SUMMARY_COUNTERS if key != 'arith'}
+    counters['arith'] = sum(value for key, value in statistics.items() if key.startswith('arith'))
+    return counters
+
+
+def metrics_summary(records):
+    """
+    solver statistics of result records grouped by bound size and by operator, e.g., whether timeouts come with many
+    conflicts (SAT core), arith-* counters (arithmetic), or without any statistics (the encoding never reached the
+    solver)
+    """
+    groups = defaultdict(list)
+    for record in records:
+        operators = pair_operators(record['pair'])
+        for metrics in record.get('metrics', []):
+            state = record['states'][metrics['bound_size'] - 1]
+            for group in [f'bound={metrics["bound_size"]}'] + [f'op={operator}' for operator in operators]:
+                groups[group].append((state, metrics))
+        # timeouts of killed workers have no metrics
+        for bound_size, state in enumerate(record['states'], start=1):
+            if state in {STATE.TIMEOUT, STATE.OOM} and \
+                    all(metrics['bound_size'] != bound_size for metrics in record.get('metrics', [])):
+                for group in [f'bound={bound_size}'] + [f'op={operator}' for operator in operators]:
+                    groups[group].append((state, None))
+
+    table = PrettyTable(
+        ['Group', '#Checks', '#TimeOut', '#NoStats', 'ReasonUnknown'] +
+        [f'Avg({counter})' for counter in SUMMARY_COUNTERS] + ['MaxPeakRSS(MB)']
+    )
+
+    def _group_key(group):
+        name, value = group.split('=')
+        return name != 'bound', int(value) if name == 'bound' else value
+
+    for group in sorted(groups, key=_group_key):
+        checks = groups[group]
+        statistics = [_counters(metrics['statistics']) for _, metrics in checks
+                      if metrics is not None and 'statistics' in metrics]
+        reasons = Counter(metrics['reason_unknown'] for _, metrics in checks
+                          if metrics is not None and metrics.get('reason_unknown'))
+        peaks = [metrics['peak_rss'] for _, metrics in checks if metrics is not None]
+        table.add_row(
+            [
+                group, len(checks), sum(state == STATE.TIMEOUT for state, _ in checks),
+                len(checks) - len(statistics), ', '.join(f'{reason}: {num}' for reason, num in reasons.items()),
+            ] + [
+                round(sum(counters[counter] for counters in statistics) / len(statistics), 2) if statistics else None
+                for counter in SUMMARY_COUNTERS
+            ] + [max(peaks) if peaks else None]
+        )
+    return table
+
+
+__all__ = [
+    'solver_deadline',
+    'is_timeout',
+    'peak_rss',
+    'collect_metrics',
+    'record_metrics',
+    'pair_operators',
+    'metrics_summary',
+]
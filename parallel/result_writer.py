@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import glob
+import os
+
+import ujson
+
+from constants import STATE
+
+"""
+Workers append every finished pair to their own `{out_file}.part{worker_idx}` file. Once the run ends, the parts
+are merged into `out_file` in benchmark order. If a run crashes, its parts are kept and a resumed run skips the
+pairs they have already finished.
+"""
+
+
+class ResultWriter:
+    """append one JSON line per pair, flushed to disk so that a crash only loses the running pair"""
+
+    def __init__(self, file):
+        directory = os.path.dirname(file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = file
+        self._writer = open(file, 'a')
+        if self._writer.tell() > 0:
+            with open(file, 'rb') as reader:
+                reader.seek(-1, os.SEEK_END)
+                if reader.read(1) != b'\n':
+                    self._writer.write('\n')  # terminate a line truncated by a crash
+
+    def write(self, record):
+        print(ujson.dumps(record, ensure_ascii=False), file=self._writer)
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def part_file(out_file, worker_idx):
+    return f'{out_file}.part{worker_idx}'
+
+
+def part_files(out_file):
+    return sorted(glob.glob(f'{glob.escape(out_file)}.part*'))
+
+
+def _scan(out_file):
+    """yield (file, offset, record) of every record in the part files"""
+    for file in part_files(out_file):
+        with open(file, 'r') as reader:
+            while True:
+                offset = reader.tell()
+                line = reader.readline()
+                if not line:
+                    break
+                try:
+                    record = ujson.loads(line)
+                except ValueError:
+                    continue  # a line truncated by a crash
+                yield file, offset, record
+
+
+def _is_newer(record, states_num):
+    # a resumed pair extends its previous states
+    return states_num is None or len(record['states']) >= states_num
+
+
+def is_finished(states, bound_size):
+    """a pair is finished once it is not equivalent/fails at some bound, or is equivalent up to `bound_size`"""
+    return len(states) > 0 and (states[-1] != STATE.EQUIV or len(states) >= bound_size)
+
+
+def prepare(out_file, resume=False):
+    """
+    without `resume`, drop the parts of a previous run
+    with `resume`, the previous `out_file` becomes a part file, so that its pairs are skipped as well
+    """
+    if resume:
+        if os.path.exists(out_file):
+            os.replace(out_file, part_file(out_file, '-resumed'))  # scanned before parts of this run
+    else:
+        for file in part_files(out_file):
+            os.remove(file)
+
+
+def load_progress(out_file, bound_size):
+    """
+    return the indices of finished pairs, and the states/times of pairs that are equivalent up to a smaller bound
+    """
+    latest = {}
+    for _, _, record in _scan(out_file):
+        if _is_newer(record, latest.get(record['index'], (None,))[0]):
+            latest[record['index']] = (len(record['states']), record['states'], record['times'])
+    finished, unfinished = set(), {}
+    for index, (_, states, times) in latest.items():
+        if is_finished(states, bound_size):
+            finished.add(index)
+        elif len(states) > 0:
+            unfinished[index] = (states, times)
+    return finished, unfinished
+
+
+def merge(out_file, indices):
+    """
+    write the latest record of each index into `out_file` in the order of `indices`, and remove the part files
+    only file offsets are kept in memory
+    """
+    offsets = {}
+    for file, offset, record in _scan(out_file):
+        if _is_newer(record, offsets.get(record['index'], (None,))[0]):
+            offsets[record['index']] = (len(record['states']), file, offset)
+
+    readers = {}
+    count = 0
+    tmp_file = f'{out_file}.merging'
+    try:
+        with open(tmp_file, 'w') as writer:
+            for index in indices:
+                if index not in offsets:
+                    continue
+                _, file, offset = offsets[index]
+                if file not in readers:
+                    readers[file] = open(file, 'r')
+                readers[file].seek(offset)
+                writer.write(readers[file].readline())
+                count += 1
+    finally:
+        for reader in readers.values():
+            reader.close()
+    os.replace(tmp_file, out_file)
+    for file in part_files(out_file):
+        os.remove(file)
+    return count
+
+
+__all__ = [
+    'ResultWriter',
+    'part_file',
+    'is_finished',
+    'prepare',
+    'load_progress',
+    'merge',
+]
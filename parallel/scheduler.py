@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+from multiprocessing import Queue
+
+import ujson
+from prettytable import PrettyTable
+
+
+class ORDER:
+    FILE = 'file'  # keep the benchmark order
+    SIZE = 'size'  # longest queries first
+    HISTORY = 'history'  # longest previous run (`.out` file) first
+
+
+def _history_costs(file, timeout):
+    costs = {}
+    if file is None or not os.path.exists(file):
+        return costs
+    with open(file, 'r') as reader:
+        for line in reader:
+            line = ujson.loads(line)
+            cost = 0
+            for time_cost in line['times']:
+                if time_cost is None:  # timeout/OOM
+                    cost += timeout
+                else:
+                    cost += sum(t for t in time_cost if t is not None)
+            costs[line['index']] = cost
+    return costs
+
+
+def sort_tasks(parameters, order=ORDER.FILE, history_file=None, timeout=None):
+    """
+    sort tasks (`[index, schema, constraint, query1, query2, ...]`) by their expected cost in descending order,
+    so that hard pairs do not start last on an otherwise idle machine
+    """
+    if order == ORDER.SIZE:
+        return sorted(parameters, key=lambda task: len(task[3]) + len(task[4]), reverse=True)
+    elif order == ORDER.HISTORY:
+        costs = _history_costs(history_file, timeout)
+        # pairs without a history are assumed to be as hard as the hardest known one
+        default_cost = max(costs.values(), default=0)
+        return sorted(parameters, key=lambda task: costs.get(task[0], default_cost), reverse=True)
+    else:
+        return parameters
+
+
+def dispatch(parameters, workers: int) -> Queue:
+    """a shared task queue; every worker pulls its next task until it gets `None`"""
+    tasks = Queue()
+    for task in parameters:
+        tasks.put(task)
+    for _ in range(workers):
+        tasks.put(None)
+    return tasks
+
+
+class WorkerStats:
+    """busy time and finished tasks of a worker"""
+
+    def __init__(self, worker_idx):
+        self.worker_idx = worker_idx
+        self.num_tasks = 0
+        self.busy_time = 0.
+        self.start_time = time.time()
+        self.end_time = None
+        self._task_start = None
+
+    def task_started(self):
+        self._task_start = time.time()
+
+    def task_finished(self):
+        self.busy_time += time.time() - self._task_start
+        self.num_tasks += 1
+
+    def close(self):
+        self.end_time = time.time()
+        return self
+
+    def to_dict(self):
+        return {
+            'worker': self.worker_idx,
+            'tasks': self.num_tasks,
+            'busy_time': self.busy_time,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+        }
+
+
+def utilization_table(stats):
+    """utilization = busy time / makespan of the whole run"""
+    start_time = min(stat['start_time'] for stat in stats)
+    makespan = max(stat['end_time'] for stat in stats) - start_time
+    table = PrettyTable(['Worker', '#Tasks', 'BusyTime(s)', 'FinishedAt(s)', 'Utilization(%)'])
+    for stat in sorted(stats, key=lambda stat: stat['worker']):
+        table.add_row([
+            stat['worker'], stat['tasks'], round(stat['busy_time'], 2),
+            round(stat['end_time'] - start_time, 2),
+            round(100 * stat['busy_time'] / makespan, 2) if makespan > 0 else 0.,
+        ])
+    return table
+
+
+__all__ = [
+    'ORDER',
+    'sort_tasks',
+    'dispatch',
+    'WorkerStats',
+    'utilization_table',
+]
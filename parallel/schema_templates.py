@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+import ujson
+
+
+class SchemaTemplates:
+    """
+    Environments with declared base tables and integrity constraints, kept by a worker across pairs.
+    Pairs on the same (schema, constraints, bound size) reuse one Environment: its checkpoints are reloaded instead of
+    re-declaring tuple sorts, DBMS facts and key formulas. At most `max_templates` templates are kept (LRU).
+    """
+
+    def __init__(self, build, max_templates: int = 4):
+        self.build = build  # build() -> a fresh Environment
+        self.max_templates = max_templates
+        self.templates = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(schema, constraint, bound_size):
+        return ujson.dumps([schema, constraint, bound_size])
+
+    def get(self, schema, constraint, bound_size):
+        """an Environment at the checkpoint right after its schema and constraints are declared"""
+        key = self.key(schema, constraint, bound_size)
+        env = self.templates.get(key, None)
+        if env is None:
+            self.misses += 1
+            env = self.build().__enter__()
+            for name, db in schema.items():
+                env.create_database(db, bound_size=bound_size, name=name)
+            if constraint is not None:
+                env.add_constraints(constraint)
+            env.save_checkpoints()
+            if self.max_templates > 0:
+                self.templates[key] = env
+                while len(self.templates) > self.max_templates:
+                    self.templates.popitem(last=False)[1].__exit__(None, None, None)
+        else:
+            self.hits += 1
+            self.templates.move_to_end(key)
+        env.reload_checkpoints()
+        return env
+
+    def release(self, env, reuse: bool = True):
+        """give `env` back after a pair; a template whose state may be broken (`reuse=False`) is dropped"""
+        for key, template in self.templates.items():
+            if template is env:
+                if reuse:
+                    return
+                del self.templates[key]
+                break
+        env.__exit__(None, None, None)
+
+    def close(self):
+        for env in self.templates.values():
+            env.__exit__(None, None, None)
+        self.templates.clear()
+
+
+__all__ = [
+    'SchemaTemplates',
+]
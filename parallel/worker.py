@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+from multiprocessing import (
+    Pipe,
+    Process,
+    Queue,
+)
+from queue import Empty
+
+from logger import LOGGER
+from utils import kill_with_parent
+
+# `_serve` puts it into the output queue once a task returns
+TASK_DONE = None
+
+
+def _serve(target, conn, queue: Queue):
+    kill_with_parent()
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        try:
+            target(*task, queue)
+        except Exception as err:
+            LOGGER.error(f'Worker task failed: {err}')
+        queue.put(TASK_DONE)
+
+
+class Worker:
+    """
+    A persistent process that runs `target(*task, queue)` for every submitted task.
+    z3 and the SQL parsers stay imported across tasks; only a worker that overruns or dies is killed and respawned.
+    """
+
+    def __init__(self, target, max_tasks: int = None):
+        self.target = target
+        self.max_tasks = max_tasks  # respawn after `max_tasks` tasks to bound memory growth
+        self.num_tasks = 0
+        self.num_respawns = 0
+        self._spawn()
+
+    def _spawn(self):
+        self.conn, child_conn = Pipe()
+        self.queue = Queue()
+        self.proc = Process(target=_serve, args=(self.target, child_conn, self.queue))
+        self.proc.start()
+        self.num_tasks = 0
+
+    def submit(self, *task):
+        if self.max_tasks is not None and self.num_tasks >= self.max_tasks:
+            self.close()
+            self._spawn()
+        self.num_tasks += 1
+        self.conn.send(task)
+
+    def get(self, timeout: float = None):
+        """
+        the next output of the running task, or `TASK_DONE` once the task returns
+        raise `queue.Empty` if nothing arrives within `timeout`, and `ChildProcessError` if the worker died
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except Empty:
+            if not self.proc.is_alive() and self.queue.empty():
+                # e.g., out of memory
+                self.restart()
+                raise ChildProcessError('Worker died')
+            raise
+
+    def finish(self):
+        """drop the remaining outputs of the current task"""
+        while True:
+            try:
+                if self.get(timeout=1) is TASK_DONE:
+                    break
+            except Empty:
+                continue
+            except ChildProcessError:
+                break
+
+    def restart(self):
+        """kill the worker (e.g., its task timed out) and spawn a fresh one"""
+        if self.proc.is_alive():
+            self.proc.kill()
+        self.proc.join()
+        self.conn.close()
+        self.queue.close()
+        self.num_respawns += 1
+        self._spawn()
+
+    def close(self):
+        if self.proc.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.proc.join(timeout=1)
+            if self.proc.is_alive():
+                self.proc.kill()
+                self.proc.join()
+        self.conn.close()
+        self.queue.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+__all__ = [
+    'TASK_DONE',
+    'Worker',
+]
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Formula size and solving time of the bag equality encodings (`BAG_ENCODING`) over growing bound sizes, e.g.,
+    PYTHONPATH=. python -m perf.bag_encoding -s 1 -e 8
+"""
+
+import argparse
+import time
+
+import ujson
+from prettytable import PrettyTable
+
+from constants import (
+    BAG_ENCODING,
+    STATE,
+)
+from environment import Environment
+from errors import UnknownError
+from utils import formula_size
+
+SCHEMA = {
+    'EMP': {'ID': 'INT', 'NAME': 'INT', 'AGE': 'INT', 'DEPT_ID': 'INT'},
+    'DEPT': {'ID': 'INT', 'NAME': 'INT'},
+}
+
+# equivalent pairs under bag semantics, the solver has to refute every counterexample
+PAIRS = {
+    'select': (
+        "SELECT AGE, DEPT_ID FROM EMP WHERE AGE > 25",
+        "SELECT AGE, DEPT_ID FROM (SELECT * FROM EMP WHERE AGE > 25) T",
+    ),
+    'union_all': (
+        "SELECT AGE FROM EMP WHERE AGE > 25 UNION ALL SELECT AGE FROM EMP WHERE NOT AGE > 25",
+        "SELECT AGE FROM EMP WHERE AGE IS NOT NULL",
+    ),
+    'join': (
+        "SELECT E.AGE, D.NAME FROM EMP E JOIN DEPT D ON E.DEPT_ID = D.ID",
+        "SELECT E.AGE, D.NAME FROM DEPT D JOIN EMP E ON D.ID = E.DEPT_ID",
+    ),
+    'group_by': (
+        "SELECT DEPT_ID, COUNT(*) FROM EMP GROUP BY DEPT_ID",
+        "SELECT DEPT_ID, SUM(1) FROM EMP GROUP BY DEPT_ID",
+    ),
+}
+
+
+def measure(sql1, sql2, bound_size, bag_encoding, timeout):
+    with Environment(timer=True, bag_encoding=bag_encoding) as env:
+        for name, attributes in SCHEMA.items():
+            env.create_database(attributes=attributes, name=name, bound_size=bound_size)
+        env.save_checkpoints()
+        env.solver.set(timeout=timeout * 1000)
+        try:
+            state = STATE.EQUIV if env.analyze(sql1, sql2) else STATE.NON_EQUIV
+        except UnknownError:
+            state = STATE.TIMEOUT
+        # Not(Implies(premise, conclusion))
+        formula = env.solver.assertions()[-1]
+        conclusion = formula.arg(0).arg(1)
+        return {
+            'state': state,
+            'conclusion_size': formula_size(conclusion),
+            'formula_size': formula_size(formula),
+            'traversing_time': env.traversing_time,
+            'solving_time': env.solving_time,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='bag equality encoding benchmark')
+    parser.add_argument('-s', '--start_bound', type=int, default=1)
+    parser.add_argument('-e', '--end_bound', type=int, default=8)
+    parser.add_argument('-t', '--timeout', type=int, default=60, help='solving timeout (s) of a single check')
+    parser.add_argument('--pairs', type=str, nargs='+', default=list(PAIRS), choices=list(PAIRS))
+    parser.add_argument('-o', '--out_file', type=str, default=None, help='write records as JSON lines')
+    args = parser.parse_args()
+
+    encodings = [BAG_ENCODING.PAIRWISE, BAG_ENCODING.FINGERPRINT]
+    table = PrettyTable(['Pair', 'Bound', 'Encoding', 'State', 'ConclusionSize', 'FormulaSize', 'SolvingTime(s)'])
+    writer = open(args.out_file, 'w') if args.out_file is not None else None
+    try:
+        for pair in args.pairs:
+            for bound_size in range(args.start_bound, args.end_bound + 1):
+                for encoding in encodings:
+                    start = time.time()
+                    record = measure(*PAIRS[pair], bound_size, encoding, args.timeout)
+                    record.update(pair=pair, bound_size=bound_size, encoding=encoding, total_time=time.time() - start)
+                    table.add_row([
+                        pair, bound_size, encoding, record['state'], record['conclusion_size'],
+                        record['formula_size'], record['solving_time'],
+                    ])
+                    if writer is not None:
+                        print(ujson.dumps(record), file=writer, flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Throughput (databases per second) of `BatchEvaluator` against SQLite on random databases of the pre-check, e.g.,
+    PYTHONPATH=. python -m perf.evaluator -f benchmarks/literature/literature.jsonlines -n 1000
+"""
+
+import argparse
+import sqlite3
+import time
+from collections import Counter
+
+import ujson
+from prettytable import PrettyTable
+
+from errors import (
+    NotSupportedError,
+    ParserSyntaxError,
+)
+from evaluator import BatchEvaluator
+from precheck import RandomPrechecker
+
+
+def sqlite_differ(schema, databases, sql1, sql2):
+    differ = []
+    for database in databases:
+        conn = sqlite3.connect(':memory:')
+        for name, rows in database.items():
+            attributes = list(schema[name])
+            conn.execute(f"CREATE TABLE {name} ({', '.join(attributes)})")
+            conn.executemany(f"INSERT INTO {name} VALUES ({', '.join('?' * len(attributes))})", rows)
+        differ.append(Counter(conn.execute(sql1).fetchall()) != Counter(conn.execute(sql2).fetchall()))
+        conn.close()
+    return differ
+
+
+def measure(line, batch_size, bound_size):
+    sql1, sql2 = line['pair']
+    prechecker = RandomPrechecker(line['schema'], {name: bound_size for name in line['schema']}, line['constraint'])
+    if not prechecker.supported:
+        return None
+    domains = prechecker._domains(sql1, sql2)
+    databases = [prechecker.random_database(domains) for _ in range(batch_size)]
+    databases = [database for database in databases if database is not None]
+    if len(databases) == 0:
+        return None
+
+    start = time.time()
+    try:
+        differ = BatchEvaluator(prechecker.schema, databases).differ(sql1, sql2)
+    except (NotSupportedError, ParserSyntaxError):
+        return None
+    evaluator_time = time.time() - start
+    start = time.time()
+    try:
+        expected = sqlite_differ(prechecker.schema, databases, sql1, sql2)
+    except sqlite3.Error:
+        return None
+    sqlite_time = time.time() - start
+    return {
+        'index': line['index'],
+        'databases': len(databases),
+        'evaluator_time': evaluator_time,
+        'sqlite_time': sqlite_time,
+        'agreements': int(sum(x == y for x, y in zip(differ, expected))),
+        'differ': int(differ.sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='batch evaluator benchmark')
+    parser.add_argument('-f', '--file', type=str, default='benchmarks/literature/literature.jsonlines')
+    parser.add_argument('-n', '--batch_size', type=int, default=1000)
+    parser.add_argument('-s', '--bound_size', type=int, default=3)
+    parser.add_argument('-o', '--out_file', type=str, default=None, help='write records as JSON lines')
+    args = parser.parse_args()
+
+    table = PrettyTable(['Index', '#Databases', '#Differ', 'Agreements', 'Evaluator(db/s)', 'SQLite(db/s)'])
+    records = []
+    with open(args.file, 'r') as reader:
+        for line in reader:
+            record = measure(ujson.loads(line), args.batch_size, args.bound_size)
+            if record is None:
+                continue
+            records.append(record)
+            table.add_row([
+                record['index'], record['databases'], record['differ'], record['agreements'],
+                round(record['databases'] / record['evaluator_time']), round(record['databases'] / record['sqlite_time']),
+            ])
+    print(table)
+    if len(records) > 0:
+        databases = sum(record['databases'] for record in records)
+        print(
+            f"{len(records)} pairs, evaluator: {databases / sum(record['evaluator_time'] for record in records):.0f} "
+            f"db/s, SQLite: {databases / sum(record['sqlite_time'] for record in records):.0f} db/s"
+        )
+    if args.out_file is not None:
+        with open(args.out_file, 'w') as writer:
+            for record in records:
+                print(ujson.dumps(record), file=writer)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""
+Formula size and solving time of the FOREIGN KEY encodings (`FOREIGN_KEY_ENCODING`) on a schema with several foreign
+keys over growing bound sizes, e.g.,
+    PYTHONPATH=. python -m perf.foreign_key_encoding -s 3 -e 6
+"""
+
+import argparse
+import time
+
+import ujson
+from prettytable import PrettyTable
+
+from constants import (
+    And,
+    FOREIGN_KEY_ENCODING,
+    STATE,
+)
+from environment import Environment
+from errors import UnknownError
+from utils import formula_size
+
+SCHEMA = {
+    'EMP': {'ID': 'INT', 'DEPT_ID': 'INT', 'MGR_ID': 'INT', 'SALARY': 'INT'},
+    'DEPT': {'ID': 'INT', 'LOC_ID': 'INT', 'BUDGET': 'INT'},
+    'LOC': {'ID': 'INT', 'CITY': 'INT'},
+    'PROJ': {'ID': 'INT', 'DEPT_ID': 'INT', 'LEAD_ID': 'INT'},
+}
+CONSTRAINTS = [
+    {'primary': [{'value': 'EMP__ID'}]},
+    {'primary': [{'value': 'DEPT__ID'}]},
+    {'primary': [{'value': 'LOC__ID'}]},
+    {'primary': [{'value': 'PROJ__ID'}]},
+    {'foreign': [{'value': 'EMP__DEPT_ID'}, {'value': 'DEPT__ID'}]},
+    {'foreign': [{'value': 'EMP__MGR_ID'}, {'value': 'EMP__ID'}]},
+    {'foreign': [{'value': 'DEPT__LOC_ID'}, {'value': 'LOC__ID'}]},
+    {'foreign': [{'value': 'PROJ__DEPT_ID'}, {'value': 'DEPT__ID'}]},
+    {'foreign': [{'value': 'PROJ__LEAD_ID'}, {'value': 'EMP__ID'}]},
+]
+
+# equivalent only under the foreign keys, i.e., joins with referenced tables are redundant
+PAIRS = {
+    'join': (
+        "SELECT E.ID, E.SALARY FROM EMP E JOIN DEPT D ON E.DEPT_ID = D.ID",
+        "SELECT ID, SALARY FROM EMP",
+    ),
+    'self_join': (
+        "SELECT E.ID, E.SALARY FROM EMP E JOIN EMP M ON E.MGR_ID = M.ID",
+        "SELECT ID, SALARY FROM EMP",
+    ),
+    'exists': (
+        "SELECT E.ID FROM EMP E WHERE EXISTS (SELECT * FROM EMP M WHERE M.ID = E.MGR_ID)",
+        "SELECT ID FROM EMP",
+    ),
+    'in': (
+        "SELECT ID FROM PROJ WHERE LEAD_ID IN (SELECT ID FROM EMP) AND DEPT_ID IN (SELECT ID FROM DEPT)",
+        "SELECT ID FROM PROJ",
+    ),
+}
+
+
+def measure(sql1, sql2, bound_size, foreign_key_encoding, timeout):
+    with Environment(timer=True, foreign_key_encoding=foreign_key_encoding) as env:
+        for name, attributes in SCHEMA.items():
+            env.create_database(attributes=attributes, name=name, bound_size=bound_size)
+        env.add_constraints(CONSTRAINTS)
+        env.save_checkpoints()
+        # tuple facts and integrity constraints
+        facts_size = formula_size(And(*env.DBMS_facts))
+        env.solver.set(timeout=timeout * 1000)
+        try:
+            state = STATE.EQUIV if env.analyze(sql1, sql2) else STATE.NON_EQUIV
+        except UnknownError:
+            state = STATE.TIMEOUT
+        # Not(Implies(premise, conclusion)), z3 replaces it with its preprocessed assertions on a timeout
+        formula = env.solver.assertions()[-1] if state != STATE.TIMEOUT else None
+        return {
+            'state': state,
+            'facts_size': facts_size,
+            'formula_size': formula_size(formula) if formula is not None else None,
+            'traversing_time': env.traversing_time,
+            'solving_time': env.solving_time,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='foreign key encoding benchmark')
+    parser.add_argument('-s', '--start_bound', type=int, default=3)
+    parser.add_argument('-e', '--end_bound', type=int, default=6)
+    parser.add_argument('-t', '--timeout', type=int, default=60, help='solving timeout (s) of a single check')
+    parser.add_argument('--pairs', type=str, nargs='+', default=list(PAIRS), choices=list(PAIRS))
+    parser.add_argument('-o', '--out_file', type=str, default=None, help='write records as JSON lines')
+    args = parser.parse_args()
+
+    encodings = [FOREIGN_KEY_ENCODING.DISJUNCTION, FOREIGN_KEY_ENCODING.WITNESS]
+    table = PrettyTable(['Pair', 'Bound', 'Encoding', 'State', 'FactsSize', 'FormulaSize', 'SolvingTime(s)'])
+    writer = open(args.out_file, 'w') if args.out_file is not None else None
+    try:
+        for pair in args.pairs:
+            for bound_size in range(args.start_bound, args.end_bound + 1):
+                for encoding in encodings:
+                    start = time.time()
+                    record = measure(*PAIRS[pair], bound_size, encoding, args.timeout)
+                    record.update(pair=pair, bound_size=bound_size, encoding=encoding, total_time=time.time() - start)
+                    table.add_row([
+                        pair, bound_size, encoding, record['state'], record['facts_size'],
+                        record['formula_size'], record['solving_time'],
+                    ])
+                    if writer is not None:
+                        print(ujson.dumps(record), file=writer, flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    print(table)
+
+
+if __name__ == '__main__':
+    main()
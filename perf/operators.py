@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+"""
+Scaling curves of operator encodings: one operator at a time over a generated schema, bound sizes from 1 to N.
+Each operator is checked on a trivially-equivalent pair (the query against itself), so the encoding is built through
+`Scope`/`Visitor` for both queries and the solver only has to match the two encodings, e.g.,
+    PYTHONPATH=. python -m perf.operators -e 5
+    PYTHONPATH=. python -m perf.operators -e 8 --operators left_join groupby -o operators.jsonl
+
+EncodeTime covers the whole pair (base tables, both queries and the verifier), OpTime/OpAstNodes only the visits of
+the operator itself (the `visit.<operator>` stage of `profiler.py`), and AstNodes the asserted formula.
+"""
+
+import argparse
+import time
+
+import ujson
+from prettytable import PrettyTable
+
+from constants import STATE
+from environment import Environment
+from errors import (
+    NotEquivalenceError,
+    UnknownError,
+)
+
+SCHEMA = {
+    'T': {'ID': 'INT', 'A': 'INT', 'B': 'INT'},
+    'S': {'ID': 'INT', 'A': 'INT', 'C': 'INT'},
+}
+# operator: (query, visitor stage of the operator)
+OPERATORS = {
+    'inner_join': ("SELECT T.A, S.C FROM T JOIN S ON T.ID = S.ID", 'visit.join'),
+    'left_join': ("SELECT T.A, S.C FROM T LEFT JOIN S ON T.ID = S.ID", 'visit.join'),
+    'full_join': ("SELECT T.A, S.C FROM T FULL JOIN S ON T.ID = S.ID", 'visit.join'),
+    'distinct': ("SELECT DISTINCT A FROM T", 'visit.distinct'),
+    'groupby': ("SELECT A, SUM(B) FROM T GROUP BY A", 'visit.groupby'),
+    'orderby': ("SELECT A, B FROM T ORDER BY A", 'visit.orderby'),
+    'limit': ("SELECT A FROM T ORDER BY A LIMIT 1", 'visit.limit'),
+    'intersect_all': ("SELECT A FROM T INTERSECT ALL SELECT A FROM S", 'visit.setop'),
+    'except_all': ("SELECT A FROM T EXCEPT ALL SELECT A FROM S", 'visit.setop'),
+    'count_distinct': ("SELECT COUNT(DISTINCT A) FROM T", 'visit.projection'),
+    'in': ("SELECT A FROM T WHERE A IN (SELECT A FROM S)", 'visit.filter'),
+    'exists': ("SELECT A FROM T WHERE EXISTS (SELECT * FROM S WHERE S.ID = T.ID)", 'visit.filter'),
+}
+
+
+def measure(operator, bound_size, timeout):
+    sql, stage = OPERATORS[operator]
+    with Environment(timer=True, profile=True) as env:
+        for name, attributes in SCHEMA.items():
+            env.create_database(attributes=attributes, name=name, bound_size=bound_size)
+        env.solver.set(timeout=timeout * 1000)
+        try:
+            state = STATE.EQUIV if env.analyze(sql, sql) else STATE.NON_EQUIV
+        except NotEquivalenceError:
+            state = STATE.NON_EQUIV
+        except UnknownError:
+            state = STATE.TIMEOUT
+        stages = env.profiler.summary()
+        return {
+            'state': state,
+            'encode_time': env.traversing_time,
+            'op_time': stages[stage]['time'] if stage in stages else None,
+            'op_ast_nodes': stages[stage]['ast_nodes'] if stage in stages else None,
+            # Not(Implies(premise, conclusion)) with DBMS facts, as built by the verifier
+            'ast_nodes': stages['verifier']['ast_nodes'] if 'verifier' in stages else None,
+            'solving_time': env.solving_time,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='operator encoding microbenchmarks')
+    parser.add_argument('-s', '--start_bound', type=int, default=1)
+    parser.add_argument('-e', '--end_bound', type=int, default=5)
+    parser.add_argument('-t', '--timeout', type=int, default=60, help='solving timeout (s) of a single check')
+    parser.add_argument('--operators', type=str, nargs='+', default=list(OPERATORS), choices=list(OPERATORS))
+    parser.add_argument('-o', '--out_file', type=str, default=None, help='write records as JSON lines')
+    args = parser.parse_args()
+
+    table = PrettyTable([
+        'Operator', 'Bound', 'State', 'EncodeTime(s)', 'OpTime(s)', 'OpAstNodes', 'AstNodes', 'SolvingTime(s)',
+    ])
+    writer = open(args.out_file, 'w') if args.out_file is not None else None
+    try:
+        for operator in args.operators:
+            for bound_size in range(args.start_bound, args.end_bound + 1):
+                start = time.time()
+                record = measure(operator, bound_size, args.timeout)
+                record.update(operator=operator, bound_size=bound_size, total_time=time.time() - start)
+                table.add_row([
+                    operator, bound_size, record['state'], record['encode_time'], record['op_time'],
+                    record['op_ast_nodes'], record['ast_nodes'], record['solving_time'],
+                ])
+                if writer is not None:
+                    print(ujson.dumps(record), file=writer, flush=True)
+                if record['state'] == STATE.TIMEOUT:
+                    # larger bound sizes only take longer
+                    break
+    finally:
+        if writer is not None:
+            writer.close()
+    print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+"""
+Versioned performance suite with regression gating. Fixed subsets of the benchmarks are checked at fixed bound sizes
+with pinned seeds, each check in a fresh process. Encode time, solve time, AST size of the asserted formula and peak
+RSS are stored as a run under `{store}/v{SUITE_VERSION}/runs/`, and compared against the baseline
+`{store}/v{SUITE_VERSION}/baseline-{suite}.json` (the first run becomes the baseline); the command exits with 1 on
+regressions, e.g.,
+    PYTHONPATH=. python -m perf.suite run --suite quick --repeat 3
+    PYTHONPATH=. python -m perf.suite run --suite quick --update_baseline 1  # accept the run as the baseline
+    PYTHONPATH=. python -m perf.suite compare perf/results/v1/baseline-quick.json perf/results/v1/runs/xxx.json
+
+A check regresses if
+    1) its state changes from EQU/NEQ,
+    2) its median time grows by more than `--time_threshold` (and `--min_time` seconds), and all repeats are slower
+       than all repeats of the baseline,
+    3) its AST size grows by more than `--ast_threshold`,
+    4) its median peak RSS grows by more than `--memory_threshold` (and `--min_memory` MB).
+The suite regresses if the geometric mean of time ratios over checks grows by more than `--suite_threshold`.
+Bump `SUITE_VERSION` whenever `SUITES` change, so that runs of different suites are never compared.
+"""
+
+import argparse
+import math
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from multiprocessing import (
+    Process,
+    Queue,
+)
+from queue import Empty
+
+import ujson
+from prettytable import PrettyTable
+
+from constants import STATE
+from environment import Environment
+from errors import (
+    NotEquivalenceError,
+    NotSupportedError,
+    UnknownError,
+)
+from parallel.metrics import (
+    is_timeout,
+    peak_rss,
+)
+from utils import formula_size
+
+SUITE_VERSION = 1
+SEED = 0
+SUITES = {
+    'quick': [
+        # (benchmark file, indices of pairs, bound sizes)
+        ('benchmarks/literature/literature.jsonlines', list(range(0, 16)), [2]),
+        ('benchmarks/calcite/calcite2.jsonlines', list(range(1, 398, 20)), [2]),
+    ],
+    'full': [
+        ('benchmarks/literature/literature.jsonlines', list(range(0, 64, 2)), [2, 3]),
+        ('benchmarks/calcite/calcite2.jsonlines', list(range(1, 398, 5)), [2, 3]),
+    ],
+}
+METRICS = ['encode_time', 'solve_time', 'ast_nodes', 'peak_rss']
+
+
+def load_checks(suite):
+    checks = []
+    for file, indices, bound_sizes in SUITES[suite]:
+        with open(file, 'r') as reader:
+            lines = {line['index']: line for line in map(ujson.loads, reader)}
+        benchmark = os.path.basename(os.path.dirname(file))
+        for index in indices:
+            for bound_size in bound_sizes:
+                checks.append((f'{benchmark}/{index}/{bound_size}', lines[index], bound_size))
+    return checks
+
+
+def _measure(line, bound_size, timeout, queue: Queue):
+    random.seed(SEED)
+    start = time.time()
+    with Environment(timer=True) as env:
+        env.solver.set(random_seed=SEED)
+        env.deadline = start + timeout
+        try:
+            for name, db in line['schema'].items():
+                env.create_database(db, bound_size=bound_size, name=name)
+            if line.get('constraint') is not None:
+                env.add_constraints(line['constraint'])
+            result = env.analyze(*line['pair'])
+            state = STATE.EQUIV if result == True else STATE.NON_EQUIV
+        except NotEquivalenceError:
+            state = STATE.NON_EQUIV
+        except UnknownError:
+            state = STATE.TIMEOUT if is_timeout(env.reason_unknown) else STATE.UNKNOWN
+        except NotSupportedError:
+            state = STATE.NOT_SUP_ERR
+        except NotImplementedError:
+            state = STATE.NOT_IMPL_ERR
+        except SyntaxError:
+            state = STATE.SYN_ERR
+        except Exception:
+            state = STATE.OTHER_ERR
+        solved = env.solving_time is not None
+        queue.put({
+            'state': state,
+            'encode_time': env.traversing_time if solved else round(time.time() - start, 6),
+            'solve_time': env.solving_time,
+            # z3 replaces assertions with preprocessed ones on a timeout
+            'ast_nodes': formula_size(*env.solver.assertions()) if state in {STATE.EQUIV, STATE.NON_EQUIV} else None,
+            # a forked child starts from the RSS of the runner, which is the same for every run
+            'peak_rss': peak_rss(),
+        })
+
+
+def measure(line, bound_size, timeout):
+    queue = Queue()
+    process = Process(target=_measure, args=(line, bound_size, timeout, queue))
+    process.start()
+    try:
+        # the solver stops itself at the deadline, the grace period is for encodings that never reach it
+        record = queue.get(timeout=timeout + 10)
+    except Empty:
+        record = {'state': STATE.TIMEOUT, **{metric: None for metric in METRICS}}
+    if process.is_alive():
+        process.kill()
+    process.join()
+    return record
+
+
+def git_revision():
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL)
+        return revision.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(suite, repeat, timeout):
+    results = {}
+    checks = load_checks(suite)
+    for num, (key, line, bound_size) in enumerate(checks, start=1):
+        records = [measure(line, bound_size, timeout) for _ in range(repeat)]
+        results[key] = {
+            'state': records[0]['state'],
+            **{metric: [record[metric] for record in records] for metric in METRICS},
+        }
+        print(f'[{num}/{len(checks)}] {key}: {records[0]["state"]}', file=sys.stderr)
+    return {
+        'version': SUITE_VERSION,
+        'suite': suite,
+        'seed': SEED,
+        'repeat': repeat,
+        'timeout': timeout,
+        'revision': git_revision(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
+        'results': results,
+    }
+
+
+def _median(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+def compare(baseline, current, args):
+    """return (rows of regressions, geometric mean of time ratios per time metric)"""
+    if baseline['version'] != current['version'] or baseline['suite'] != current['suite']:
+        raise ValueError(f'cannot compare suite {baseline["suite"]}/v{baseline["version"]} '
+                         f'with {current["suite"]}/v{current["version"]}')
+    regressions = []
+    log_ratios = {'encode_time': [], 'solve_time': []}
+    for key, new in current['results'].items():
+        old = baseline['results'].get(key, None)
+        if old is None:
+            continue
+        if old['state'] in {STATE.EQUIV, STATE.NON_EQUIV} and new['state'] != old['state']:
+            regressions.append([key, 'state', old['state'], new['state'], None])
+            continue
+        for metric in ['encode_time', 'solve_time']:
+            old_median, new_median = _median(old[metric]), _median(new[metric])
+            if old_median is None or new_median is None:
+                continue
+            # `min_time` keeps ratios of tiny times from dominating
+            log_ratios[metric].append(math.log((new_median + args.min_time) / (old_median + args.min_time)))
+            # all repeats are slower, i.e., not a noisy one
+            if new_median > old_median * (1 + args.time_threshold) + args.min_time and \
+                    min(value for value in new[metric] if value is not None) > \
+                    max(value for value in old[metric] if value is not None):
+                regressions.append([
+                    key, metric, round(old_median, 6), round(new_median, 6), round(new_median / max(old_median, 1e-6), 2),
+                ])
+        old_median, new_median = _median(old['ast_nodes']), _median(new['ast_nodes'])
+        if old_median is not None and new_median is not None and new_median > old_median * (1 + args.ast_threshold):
+            regressions.append([key, 'ast_nodes', old_median, new_median, round(new_median / old_median, 2)])
+        old_median, new_median = _median(old['peak_rss']), _median(new['peak_rss'])
+        if old_median is not None and new_median is not None and \
+                new_median > old_median * (1 + args.memory_threshold) + args.min_memory:
+            regressions.append([key, 'peak_rss', old_median, new_median, round(new_median / old_median, 2)])
+
+    geomeans = {
+        metric: round(math.exp(sum(ratios) / len(ratios)), 4) if ratios else None
+        for metric, ratios in log_ratios.items()
+    }
+    for metric, geomean in geomeans.items():
+        if geomean is not None and geomean > 1 + args.suite_threshold:
+            regressions.append(['(suite)', metric, None, None, geomean])
+    return regressions, geomeans
+
+
+def report(baseline, current, args):
+    regressions, geomeans = compare(baseline, current, args)
+    print(f'baseline: {baseline["revision"]} ({baseline["time"]}), current: {current["revision"]} ({current["time"]})')
+    print(f'geometric mean of time ratios: {geomeans}')
+    if regressions:
+        table = PrettyTable(['Check', 'Metric', 'Baseline', 'Current', 'Ratio'])
+        table.add_rows(regressions)
+        print(table)
+    print(f'{len(regressions)} regression(s)')
+    return len(regressions) == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='performance suite with regression gating')
+    parser.add_argument('command', choices=['run', 'compare'])
+    parser.add_argument('files', nargs='*', help='`compare`: a baseline and a run file')
+    parser.add_argument('--suite', type=str, default='quick', choices=list(SUITES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('-t', '--timeout', type=int, default=60, help='timeout (s) of a single check')
+    parser.add_argument('--store', type=str, default='perf/results')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='default: `{store}/v{version}/baseline-{suite}.json`')
+    parser.add_argument('--update_baseline', default=0, choices=[0, 1], type=int,
+                        help='accept the run as the new baseline (even with regressions)')
+    parser.add_argument('--time_threshold', type=float, default=0.25)
+    parser.add_argument('--min_time', type=float, default=0.1)
+    parser.add_argument('--suite_threshold', type=float, default=0.1)
+    parser.add_argument('--ast_threshold', type=float, default=0.05)
+    parser.add_argument('--memory_threshold', type=float, default=0.2)
+    parser.add_argument('--min_memory', type=float, default=16.)
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        if len(args.files) != 2:
+            parser.error('`compare` takes a baseline and a run file')
+        with open(args.files[0]) as reader:
+            baseline = ujson.load(reader)
+        with open(args.files[1]) as reader:
+            current = ujson.load(reader)
+        sys.exit(0 if report(baseline, current, args) else 1)
+
+    directory = os.path.join(args.store, f'v{SUITE_VERSION}')
+    os.makedirs(os.path.join(directory, 'runs'), exist_ok=True)
+    current = run(args.suite, args.repeat, args.timeout)
+    file = os.path.join(
+        directory, 'runs', f'{args.suite}-{time.strftime("%Y%m%d-%H%M%S")}-{current["revision"] or "unknown"}.json'
+    )
+    with open(file, 'w') as writer:
+        ujson.dump(current, writer, indent=1)
+    print(f'run stored in {file}')
+
+    baseline_file = args.baseline or os.path.join(directory, f'baseline-{args.suite}.json')
+    passed = True
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as reader:
+            passed = report(ujson.load(reader), current, args)
+    else:
+        print(f'no baseline at {baseline_file}')
+    if args.update_baseline or not os.path.exists(baseline_file):
+        shutil.copyfile(file, baseline_file)
+        print(f'baseline updated: {baseline_file}')
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
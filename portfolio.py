@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from multiprocessing import (
+    Process,
+    Queue,
+)
+from queue import Empty
+
+from z3 import (
+    Context,
+    Solver,
+    Then,
+    With,
+    sat,
+    unsat,
+    unknown,
+)
+
+from constants import TIMEOUT
+from logger import LOGGER
+from utils import kill_with_parent
+
+"""
+Solver portfolio: race several z3 configurations on the same formulas and take the first sat/unsat.
+The default solver keeps running in the current process (so its model is at hand), while other configurations
+run in child processes over the SMT-LIB2 dump of the default solver. Once one of them answers, the others are
+interrupted/killed.
+"""
+
+
+def _tactic_solver(*tactics, **params):
+    def _f(ctx):
+        tactic = Then(*tactics, ctx=ctx)
+        if params:
+            tactic = With(tactic, **params)
+        return tactic.solver()
+
+    return _f
+
+
+def _param_solver(**params):
+    def _f(ctx):
+        solver = Solver(ctx=ctx)
+        solver.set(**params)
+        return solver
+
+    return _f
+
+
+PORTFOLIO_CONFIGS = {
+    'smt-seed1': _param_solver(random_seed=1),
+    'simplify-solve-eqs-smt': _tactic_solver('simplify', 'propagate-values', 'solve-eqs', 'smt'),
+    'smt-arith2': _param_solver(random_seed=2, **{'smt.arith.solver': 2}),
+    'ctx-simplify-smt': _tactic_solver('simplify', 'ctx-simplify', 'solve-eqs', 'elim-uncnstr', 'smt'),
+    'smt-no-relevancy': _param_solver(random_seed=3, **{'smt.relevancy': 0}),
+    'simplify-smt-seed5': _tactic_solver('simplify', 'propagate-values', 'smt', random_seed=5),
+    'smt-seed4-phase': _param_solver(random_seed=4, **{'smt.phase_selection': 5}),
+}
+
+
+def _remaining(deadline):
+    """seconds left before `deadline` (a `time.time()`), or `TIMEOUT` without a deadline"""
+    return TIMEOUT if deadline is None else max(deadline - time.time(), 0.)
+
+
+def _timeout(deadline):
+    # in milliseconds, z3 takes 0 as no timeout
+    return max(int(_remaining(deadline) * 1000), 1)
+
+
+def _worker(name, smt2, queue: Queue, deadline=None):
+    kill_with_parent()
+    try:
+        ctx = Context()
+        solver = PORTFOLIO_CONFIGS[name](ctx)
+        solver.set(timeout=_timeout(deadline))
+        solver.from_string(smt2)
+        out = str(solver.check())
+    except Exception as err:
+        LOGGER.debug(f'Portfolio {name} failed: {err}')
+        out = str(unknown)
+    queue.put([name, out])
+
+
+def race(solver, ctx, configs, need_model=False, deadline=None):
+    """
+    check `solver` together with `configs` (names of `PORTFOLIO_CONFIGS`) in parallel, none of which runs past
+    `deadline`
+    return (result, solver whose `model()` matches the result, winner's name)
+    """
+    if len(configs) == 0:
+        return solver.check(), solver, 'default'
+
+    smt2 = solver.to_smt2()
+    queue = Queue()
+    processes = [Process(target=_worker, args=(name, smt2, queue, deadline)) for name in configs]
+    for process in processes:
+        process.start()
+
+    winner = {}
+
+    def _watch():
+        pending = len(processes)
+        while pending > 0:
+            try:
+                name, out = queue.get(timeout=1)
+            except Empty:
+                if not any(process.is_alive() for process in processes) and queue.empty():
+                    return  # children crashed, e.g., OOM
+                continue
+            if name is None:  # the default solver finished first
+                return
+            pending -= 1
+            if out != str(unknown):
+                winner['name'], winner['out'] = name, (sat if out == str(sat) else unsat)
+                ctx.interrupt()
+                return
+
+    watcher = threading.Thread(target=_watch, daemon=True)
+    watcher.start()
+    out = solver.check()
+    if out != unknown:
+        queue.put([None, None])
+    # if the default solver gives up, wait for the other configurations
+    watcher.join(timeout=_remaining(deadline))
+    for process in processes:
+        if process.is_alive():
+            process.kill()
+        process.join()
+    # the watcher polls the queue every second and stops once children are dead
+    watcher.join(timeout=2)
+    queue.close()
+    if 'name' in winner:
+        # an interrupt that arrives after the default solver has finished stays pending and breaks `model.eval`,
+        # the next `check()` clears it
+        Solver(ctx=ctx).check()
+
+    if out != unknown or 'name' not in winner:
+        return out, solver, 'default'
+    LOGGER.debug(f"Portfolio winner: {winner['name']} ==> {winner['out']} <==")
+    if winner['out'] == sat and need_model:
+        # replay the winning configuration in the current context to get a model
+        model_solver = PORTFOLIO_CONFIGS[winner['name']](ctx)
+        model_solver.add(solver.assertions())
+        model_solver.set(timeout=_timeout(deadline))
+        if model_solver.check() == sat:
+            return sat, model_solver, winner['name']
+        return solver.check(), solver, 'default'
+    return winner['out'], solver, winner['name']
+
+
+__all__ = [
+    'PORTFOLIO_CONFIGS',
+    'race',
+]
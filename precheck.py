@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import random
+import re
+import sqlite3
+from collections import Counter
+
+import numpy as np
+
+from errors import (
+    NotSupportedError,
+    ParserSyntaxError,
+)
+from evaluator import BatchEvaluator
+
+"""
+Concrete pre-check: run both queries over a batch of small random databases, and return the first database on which
+their results differ as bags. The batch is evaluated at once by `BatchEvaluator`, or database by database on an
+in-memory SQLite if queries are beyond the evaluator. Databases have exactly `bound_size` tuples per table (base tuples
+of VeriEQL are never deleted) and satisfy NOT NULL/PRIMARY/FOREIGN key constraints.
+
+Neither SQLite (e.g., integer division, bare columns in GROUP BY) nor the evaluator is exactly the semantics VeriEQL
+verifies against, so a difference found here is only a candidate counterexample, cf. `Environment._precheck`.
+"""
+
+# results depend on the positions of tuples
+POSITIONAL_KEYWORDS = re.compile(r'\b(LIMIT|OFFSET|FETCH|TOP)\b', re.IGNORECASE)
+SUPPORTED_CONSTRAINTS = {'not_null', 'primary', 'foreign'}
+NULL_PROBABILITY = 0.2
+MAX_TABLE_ATTEMPTS = 20
+
+
+def column_kind(type):
+    type = str.upper(type or 'INT')
+    if type.startswith('VARCHAR') or type.startswith('ENUM') or type in {'TEXT', 'CHAR', 'STRING'}:
+        return 'str'
+    elif type in {'DATE', 'DATETIME', 'TIMESTAMP'}:
+        return 'date'
+    elif type in {'BOOLEAN', 'BOOL'}:
+        return 'bool'
+    else:
+        return 'int'
+
+
+def _split_attribute(operand):
+    # {"value": "EMP__ID"} -> ("EMP", "ID")
+    table, _, attribute = operand['value'].partition('__')
+    return str.upper(table), str.upper(attribute)
+
+
+class RandomPrechecker:
+    def __init__(self, schema, bound_sizes, constraints=None, seed=0):
+        self.schema = {
+            str.upper(name): {str.upper(attr): column_kind(type) for attr, type in attributes.items()}
+            for name, attributes in schema.items()
+        }
+        self.bound_sizes = {str.upper(name): size for name, size in bound_sizes.items()}
+        self.constraints = constraints or []
+        self.random = random.Random(seed)
+        self.supported = all(next(iter(c)) in SUPPORTED_CONSTRAINTS for c in self.constraints)
+        self.not_null, self.keys, self.references = set(), [], {}
+        if self.supported:
+            self._parse_constraints()
+
+    def _parse_constraints(self):
+        for constraint in self.constraints:
+            key, operands = next(iter(constraint.items()))
+            match key:
+                case 'not_null':
+                    self.not_null.add(_split_attribute(operands))
+                case 'primary':
+                    operands = [_split_attribute(opd) for opd in operands]
+                    self.not_null.update(operands)
+                    self.keys.append(operands)
+                case 'foreign':
+                    child, parent = [_split_attribute(opd) for opd in operands]
+                    self.not_null.add(child)
+                    self.references[child] = parent
+
+    def _domains(self, *queries):
+        """small domains with the literals of queries, so that predicates and joins hold on some tuples"""
+        text = ' '.join(queries)
+        strings = re.findall(r"'([^']*)'", text)
+        numbers = {int(n) for n in re.findall(r'(?<![\w.])-?\d+(?![\w.])', re.sub(r"'[^']*'", '', text))}
+        ints = {-1, 0, 1, 2, 3}
+        for n in numbers:
+            ints.update({n - 1, n, n + 1})
+        dates = [s for s in strings if re.fullmatch(r'\d{4}-\d{2}-\d{2}', s)]
+        for date in list(dates):
+            date = datetime.date.fromisoformat(date)
+            dates.extend(str(date + datetime.timedelta(days=d)) for d in (-1, 1))
+        return {
+            'int': sorted(ints),
+            'bool': [0, 1],
+            'date': sorted(set(dates) | {'2000-01-01', '2000-01-02'}),
+            'str': sorted(set(strings) | {'a', 'b'}),
+        }
+
+    def _table_order(self):
+        # referenced tables first
+        order = []
+
+        def _visit(name, path):
+            if name in order or name in path:
+                return
+            for (table, _), (parent, _) in self.references.items():
+                if table == name and parent in self.schema:
+                    _visit(parent, path | {name})
+            order.append(name)
+
+        for name in self.schema:
+            _visit(name, set())
+        return order
+
+    def _random_table(self, name, database, domains):
+        attributes = self.schema[name]
+        keys = [[attr for table, attr in key] for key in self.keys if key[0][0] == name]
+        for _ in range(MAX_TABLE_ATTEMPTS):
+            rows = []
+            for _ in range(self.bound_sizes[name]):
+                row = []
+                for attr, kind in attributes.items():
+                    if (name, attr) in self.references:
+                        parent, parent_attr = self.references[(name, attr)]
+                        index = list(self.schema[parent]).index(parent_attr)
+                        choices = [
+                            parent_row[index] for parent_row in database.get(parent, [])
+                            if parent_row[index] is not None
+                        ]
+                        if len(choices) == 0:
+                            return None
+                    else:
+                        choices = domains[kind]
+                    if (name, attr) not in self.not_null and self.random.random() < NULL_PROBABILITY:
+                        row.append(None)
+                    else:
+                        row.append(self.random.choice(choices))
+                rows.append(tuple(row))
+            indices = [[list(attributes).index(attr) for attr in key] for key in keys]
+            if all(
+                    len({tuple(row[idx] for idx in key) for row in rows}) == len(rows)
+                    for key in indices
+            ):
+                return rows
+        return None
+
+    def random_database(self, domains):
+        database = {}
+        for name in self._table_order():
+            rows = self._random_table(name, database, domains)
+            if rows is None:
+                return None
+            database[name] = rows
+        return database
+
+    def _run(self, conn, query):
+        return Counter(conn.execute(query).fetchall())
+
+    def search(self, *queries, trials=10):
+        """return the first random database where results of queries differ, otherwise None"""
+        if not self.supported or any(POSITIONAL_KEYWORDS.search(query) for query in queries):
+            return None
+        domains = self._domains(*queries)
+        databases = [self.random_database(domains) for _ in range(trials)]
+        databases = [database for database in databases if database is not None]
+        if len(databases) == 0:
+            return None
+        try:
+            differ = np.flatnonzero(BatchEvaluator(self.schema, databases).differ(*queries))
+            return databases[differ[0]] if len(differ) > 0 else None
+        except (NotSupportedError, ParserSyntaxError):
+            pass
+        for database in databases:
+            conn = sqlite3.connect(':memory:')
+            try:
+                for name, rows in database.items():
+                    attributes = list(self.schema[name])
+                    conn.execute(f"CREATE TABLE {name} ({', '.join(attributes)})")
+                    conn.executemany(
+                        f"INSERT INTO {name} VALUES ({', '.join('?' * len(attributes))})", rows,
+                    )
+                results = [self._run(conn, query) for query in queries]
+            except sqlite3.Error:
+                # not supported by SQLite
+                return None
+            finally:
+                conn.close()
+            if any(result != results[0] for result in results[1:]):
+                return database
+        return None
+
+
+__all__ = [
+    'RandomPrechecker',
+    'column_kind',
+]
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+from contextlib import contextmanager
+
+import ujson
+
+from formulas.tables import (
+    FAliasTable,
+    FBaseTable,
+    FCrossJoinTable,
+    FDistinctTable,
+    FEmptyTable,
+    FExceptAllTable,
+    FExceptTable,
+    FFakeProjectionTable,
+    FFilterTable,
+    FFullOuterJoinTable,
+    FGroupByMapTable,
+    FGroupByTable,
+    FInnerJoinTable,
+    FIntersectAllTable,
+    FIntersectTable,
+    FLeftOuterJoinTable,
+    FLimitTable,
+    FNaturalJoinTable,
+    FOrderByTable,
+    FProductTable,
+    FProjectionTable,
+    FRightOuterJoinTable,
+    FUnionAllTable,
+    FUnionTable,
+    FValueTable,
+)
+from utils import formula_size
+
+"""
+Per-stage instrumentation of a check: SQL parse, encoder analyze, visitor formula build per operator type, verifier
+build, solver check and model extraction. Each stage reports its wall time, #tuple sorts it declared, #formulas it
+registered and the z3 AST nodes (DAG size) of those formulas.
+
+Stages nest (e.g., a join visits its input tables), so every record keeps both inclusive (`time`) and exclusive
+(`self_time`, `tuple_sorts`, `formulas`, `ast_nodes`) measurements; summing exclusive ones over stages never counts
+anything twice.
+"""
+
+# visitor stages of tables, by operator type
+OPERATORS = {
+    FProductTable: 'join',
+    FCrossJoinTable: 'join',
+    FInnerJoinTable: 'join',
+    FNaturalJoinTable: 'join',
+    FLeftOuterJoinTable: 'join',
+    FRightOuterJoinTable: 'join',
+    FFullOuterJoinTable: 'join',
+    FFilterTable: 'filter',
+    FProjectionTable: 'projection',
+    FFakeProjectionTable: 'projection',
+    FDistinctTable: 'distinct',
+    FGroupByTable: 'groupby',
+    FGroupByMapTable: 'groupby',
+    FOrderByTable: 'orderby',
+    FLimitTable: 'limit',
+    FUnionAllTable: 'setop',
+    FUnionTable: 'setop',
+    FIntersectAllTable: 'setop',
+    FIntersectTable: 'setop',
+    FExceptAllTable: 'setop',
+    FExceptTable: 'setop',
+    FBaseTable: 'table',
+    FAliasTable: 'table',
+    FValueTable: 'table',
+    FEmptyTable: 'table',
+}
+
+
+class StageProfiler:
+    def __init__(self, environment):
+        self.environment = environment
+        self.records = []
+        self._stack = []
+        self._epoch = time.perf_counter()
+
+    def clear(self):
+        self.records.clear()
+
+    @contextmanager
+    def stage(self, name: str, formulas: list = None):
+        """
+        time a stage
+        formulas: a list of formulas the stage registers into (e.g., `Scope.out_formulas`), formulas appended by the
+        stage are counted and measured
+        """
+        start_formulas = len(formulas) if formulas is not None else 0
+        record = {
+            'name': name,
+            'start': time.perf_counter() - self._epoch,
+            'depth': len(self._stack),
+            'tuple_sorts': len(self.environment.tuple_sorts),
+            'formulas': 0,
+            'ast_nodes': 0,
+        }
+        # measurements of nested stages, subtracted from this stage
+        children = {'time': 0., 'tuple_sorts': 0, 'formulas': 0, 'ast_nodes': 0}
+        self._stack.append(children)
+        try:
+            yield record
+        finally:
+            self._stack.pop()
+            record['time'] = time.perf_counter() - self._epoch - record['start']
+            record['tuple_sorts'] = len(self.environment.tuple_sorts) - record['tuple_sorts']
+            if formulas is not None:
+                new_formulas = [getattr(formula, 'code', formula) for formula in formulas[start_formulas:]]
+                record['formulas'] = len(new_formulas)
+                record['ast_nodes'] = formula_size(*new_formulas)
+            if self._stack:
+                parent = self._stack[-1]
+                for key in ['tuple_sorts', 'formulas', 'ast_nodes']:
+                    parent[key] += record[key]
+                # measuring AST sizes above is not charged to the parent either
+                parent['time'] += time.perf_counter() - self._epoch - record['start']
+            record['self_time'] = record['time'] - children['time']
+            for key in ['tuple_sorts', 'formulas', 'ast_nodes']:
+                # shared sub-terms make AST sizes sub-additive
+                record[key] = max(record[key] - children[key], 0)
+            self.records.append(record)
+
+    def profile_visits(self, visitor, formulas: list):
+        """
+        time table visits of `visitor` as `visit.<operator>` stages, other visits (e.g., expressions) are left as is
+        formulas: formulas registered by the visitor, i.e., `Scope.out_formulas`
+        """
+        visit = visitor.visit
+
+        def _visit(formula, *args, **kwargs):
+            operator = OPERATORS.get(type(formula), None)
+            if operator is None:
+                return visit(formula, *args, **kwargs)
+            with self.stage(f'visit.{operator}', formulas=formulas):
+                return visit(formula, *args, **kwargs)
+
+        # table visitors call `self.visit` for their input tables, an instance attribute shadows the dispatcher
+        visitor.visit = _visit
+
+    def summary(self):
+        """exclusive measurements aggregated by stage name, in order of appearance"""
+        stages = {}
+        for record in sorted(self.records, key=lambda record: record['start']):
+            stage = stages.setdefault(
+                record['name'], {'count': 0, 'time': 0., 'tuple_sorts': 0, 'formulas': 0, 'ast_nodes': 0},
+            )
+            stage['count'] += 1
+            stage['time'] += record['self_time']
+            for key in ['tuple_sorts', 'formulas', 'ast_nodes']:
+                stage[key] += record[key]
+        for stage in stages.values():
+            stage['time'] = round(stage['time'], 6)
+        return stages
+
+    def chrome_trace(self, file: str):
+        """write records as complete events of the Chrome trace format, see chrome://tracing or ui.perfetto.dev"""
+        events = [
+            {
+                'name': record['name'],
+                'cat': record['name'].split('.')[0],
+                'ph': 'X',
+                'ts': round(record['start'] * 1e6, 3),
+                'dur': round(record['time'] * 1e6, 3),
+                'pid': os.getpid(),
+                'tid': 0,
+                'args': {key: record[key] for key in ['tuple_sorts', 'formulas', 'ast_nodes']},
+            }
+            for record in sorted(self.records, key=lambda record: record['start'])
+        ]
+        directory = os.path.dirname(file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(file, 'w') as writer:
+            ujson.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, writer)
+
+
+__all__ = [
+    'StageProfiler',
+]
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+from constants import DIALECT
+from parsers import SQLParser
+
+"""
+Cone-of-influence pruning of a schema before its base tables are declared: only tables and columns that queries may
+read, directly or through integrity constraints, get tuples, DBMS facts and type constraints.
+
+Columns are collected from the parsed ASTs of both queries, where
+    1) `*` in a query is every column of the base tables in its FROM clause (derived tables contribute through their own
+       SELECT lists), and `X.*` every column of the base table aliased by X,
+    2) a NATURAL JOIN reads every column of the base tables in its FROM clause,
+    3) a bare column name is referenced in every reachable table having such a column.
+Then integrity constraints are closed over: a constraint is kept iff it touches a reachable column, and all columns it
+mentions become reachable, until a fixpoint. The result is exact as long as the dropped constraints (which only mention
+unreachable columns) are satisfiable on their own, e.g., keys and NOT NULL.
+Counterexamples are rendered over the pruned schema, i.e., without unreachable tables and columns.
+"""
+
+QUERY_KEYWORDS = {
+    'select', 'select_distinct', 'from',
+    'union', 'union_all', 'intersect', 'intersect_all', 'except', 'except_all', 'minus',
+}
+
+
+def _is_query(node):
+    return isinstance(node, dict) and any(key in QUERY_KEYWORDS for key in node)
+
+
+def _from_tables(node, tables, out):
+    """base tables of a FROM clause, derived tables are left to their own queries"""
+    if isinstance(node, str):
+        if str.upper(node) in tables:
+            out.add(str.upper(node))
+    elif isinstance(node, list):
+        for child in node:
+            _from_tables(child, tables, out)
+    elif isinstance(node, dict) and not _is_query(node):
+        for child in node.values():
+            _from_tables(child, tables, out)
+    return out
+
+
+def _natural_join(node):
+    # {'value': 'EMP', 'name': 'NATURAL'} joins on all common columns
+    if isinstance(node, list):
+        return any(_natural_join(child) for child in node)
+    elif isinstance(node, dict) and not _is_query(node):
+        return str.upper(str(node.get('name', ''))) == 'NATURAL' or any(_natural_join(child) for child in node.values())
+    return False
+
+
+def _aliases(node, tables, out):
+    # {'value': 'EMP', 'name': 'E'} -> E: EMP
+    if isinstance(node, dict):
+        if isinstance(node.get('value', None), str) and isinstance(node.get('name', None), str) and \
+                str.upper(node['value']) in tables:
+            out[str.upper(node['name'])] = str.upper(node['value'])
+        for child in node.values():
+            _aliases(child, tables, out)
+    elif isinstance(node, list):
+        for child in node:
+            _aliases(child, tables, out)
+    return out
+
+
+def _references(node, tables, from_tables, out):
+    """collect (name, base tables of the enclosing FROM clause) of every non-literal string"""
+    if isinstance(node, dict):
+        if 'from' in node:
+            from_tables = _from_tables(node['from'], tables, set())
+            if _natural_join(node['from']):
+                out.append(('*', from_tables))
+        for key, value in node.items():
+            if key == 'literal' or (key == 'count' and value == '*'):
+                continue
+            _references(value, tables, from_tables, out)
+    elif isinstance(node, list):
+        for child in node:
+            _references(child, tables, from_tables, out)
+    elif isinstance(node, str):
+        out.append((str.upper(node), from_tables))
+    return out
+
+
+def _constraint_columns(node, schema, out):
+    # {'value': 'EMP__DEPTNO'} -> (EMP, DEPTNO)
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key != 'literal':
+                _constraint_columns(value, schema, out)
+    elif isinstance(node, list):
+        for child in node:
+            _constraint_columns(child, schema, out)
+    elif isinstance(node, str):
+        table, _, column = str.upper(node).partition('__')
+        if column in schema.get(table, {}):
+            out.add((table, column))
+    return out
+
+
+def reachable_columns(schema, constraints, *query_asts):
+    """
+    return (reachable columns, kept constraints), where reachable columns map every reachable table to a set of its
+    columns (in upper case)
+    """
+    columns = {str.upper(name): {str.upper(attr) for attr in attributes} for name, attributes in schema.items()}
+    aliases = {}
+    references = []
+    for query_ast in query_asts:
+        _aliases(query_ast, columns, aliases)
+        _references(query_ast, columns, set(), references)
+
+    reachable = {}
+    names = set()
+    for name, from_tables in references:
+        if name in columns:
+            reachable.setdefault(name, set())
+        prefix, _, name = name.rpartition('__')
+        if name != '*':
+            names.add(name)
+        elif prefix == '':
+            for table in from_tables:
+                reachable.setdefault(table, set()).update(columns[table])
+        elif aliases.get(prefix, prefix) in columns:
+            # otherwise, X is a derived table
+            table = aliases.get(prefix, prefix)
+            reachable.setdefault(table, set()).update(columns[table])
+    for table in reachable:
+        reachable[table].update(names & columns[table])
+    # a table without columns is not valid SQL in counterexamples, e.g., only read by COUNT(*)
+    for name, attributes in schema.items():
+        if attributes and not reachable.get(str.upper(name), True):
+            reachable[str.upper(name)].add(str.upper(next(iter(attributes))))
+    constraints = constraints or []
+    constraint_columns = [_constraint_columns(constraint, columns, set()) for constraint in constraints]
+    kept = [False] * len(constraints)
+    updated = True
+    while updated:
+        updated = False
+        for idx, attributes in enumerate(constraint_columns):
+            if kept[idx] or not any(column in reachable.get(table, ()) for table, column in attributes):
+                continue
+            kept[idx] = updated = True
+            for table, column in attributes:
+                reachable.setdefault(table, set()).add(column)
+    return reachable, [constraint for constraint, keep in zip(constraints, kept) if keep]
+
+
+def prune_schema(schema, constraints, *queries, dialect=DIALECT.ALL):
+    """
+    return the schema and constraints restricted to what `queries` may read, or both unchanged if a query cannot be
+    parsed (so that the error is reported by the check itself)
+    """
+    parser = SQLParser()
+    try:
+        query_asts = [parser.parse(query, dialect=dialect) for query in queries]
+    except Exception:
+        return schema, constraints
+    reachable, kept_constraints = reachable_columns(schema, constraints, *query_asts)
+    schema = {
+        name: {attr: type for attr, type in attributes.items() if str.upper(attr) in reachable[str.upper(name)]}
+        for name, attributes in schema.items()
+        if str.upper(name) in reachable
+    }
+    return schema, (kept_constraints if constraints is not None else None)
+
+
+__all__ = [
+    'reachable_columns',
+    'prune_schema',
+]
@@ -2,6 +2,9 @@
 
 import pprint
 
+from z3 import AstRef
+
+from constants import Or
 from context import Context
 from encoder import Encoder
 from logger import LOGGER
@@ -23,6 +26,8 @@ class Scope:
         self.databases = self.environment.databases
         self.base_databases = self.environment.base_databases
         self.bound_constraints = self.environment.bound_constraints
+        self.sort_encoding = self.environment.sort_encoding
+        self.group_encoding = self.environment.group_encoding
         self._display_datasets = set(self.databases.keys())
 
         # function
@@ -45,6 +50,8 @@ class Scope:
         self._get_tuple_sort = self.environment._get_tuple_sort
         self._declare_tuple = self.environment._declare_tuple
         self._declare_tuple_sort = self.environment._declare_tuple_sort
+        self._declare_auxiliary_value = self.environment._declare_auxiliary_value
+        self._declare_auxiliary_function = self.environment._declare_auxiliary_function
         self.register_tuple = self.environment.register_tuple
         self.register_tuple_sort = self.environment.register_tuple_sort
         self.register_database = self.environment.register_database
@@ -65,6 +72,10 @@ class Scope:
         self.out_formulas = []
         self.alias_constraints = []
         self.dump_tuples = {}
+        # (NULL, VALUE) terms of visited attributes, shared by all visits of the same (attribute, tuple sort)
+        self._attribute_terms = {}
+        self.attribute_term_hits = 0
+        self.attribute_term_misses = 0
         # self._father_caches = {}  # only works for intermediate attributes
         # self._self_caches = {}  # only works for intermediate attributes
         # self._caches = {}
@@ -72,6 +83,8 @@ class Scope:
 
         self.visitor = Visitor(self)
         self.encoder = Encoder(self)
+        if self.environment.profiler is not None:
+            self.environment.profiler.profile_visits(self.visitor, self.out_formulas)
 
     def _get_databases(self, name: str = None):
         if name is not None:
@@ -93,6 +106,29 @@ class Scope:
     def is_register_dump_tuple(self, key) -> bool:
         return key in self.dump_tuples
 
+    def attribute_terms(self, attribute, tuple_sort, pity_flag=False):
+        """
+        return the (NULL, VALUE) terms of `attribute` on `tuple_sort`, built once per scope
+        """
+        if not isinstance(tuple_sort, AstRef):
+            return self._attribute_terms_of(attribute, tuple_sort, pity_flag)
+        # attributes sharing a uuid share their name, hence their NULL/VALUE functions; attributes whose functions are
+        # replaced get a fresh uuid (NULL literals, constant columns) or a name of their own (`Digits_*` aliases)
+        key = (attribute._uuid, tuple_sort.get_id(), pity_flag)
+        terms = self._attribute_terms.get(key, None)
+        if terms is None:
+            self.attribute_term_misses += 1
+            terms = self._attribute_terms[key] = self._attribute_terms_of(attribute, tuple_sort, pity_flag)
+        else:
+            self.attribute_term_hits += 1
+        return terms
+
+    def _attribute_terms_of(self, attribute, tuple_sort, pity_flag):
+        NULL = attribute.NULL(tuple_sort)
+        if pity_flag:
+            NULL = Or(NULL, self.DELETED_FUNCTION(tuple_sort))
+        return NULL, attribute.VALUE(tuple_sort)
+
     ############################ Display ############################
 
     def __str__(self):
@@ -109,14 +145,22 @@ class Scope:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         del self.visitor
+        self.environment.attribute_term_hits += self.attribute_term_hits
+        self.environment.attribute_term_misses += self.attribute_term_misses
+        LOGGER.debug(
+            f'SCOPE-{self.name} attribute terms: {self.attribute_term_hits} hits, {self.attribute_term_misses} misses'
+        )
         # remove partial info from the current query in environment
-        self.environment.reload_checkpoints(keys=['variables', 'attributes', 'functions', 'databases'])
+        self.environment.reload_checkpoints(
+            keys=['variables', 'attributes', 'functions', 'databases'], reset_solver=False,
+        )
         LOGGER.debug(f'############################ SCOPE-{self.name} Cleared ############################\n\n')
 
     ############################ Analyze SQL AST ############################
 
     def analyze(self, query) -> Context:
-        ctx = self.encoder.analyze(query)
+        with self.environment.stage('analyze', formulas=self.out_formulas):
+            ctx = self.encoder.analyze(query)
         return ctx
 
     def visit(self, ctx: Context):
@@ -0,0 +1,22 @@
+# -*- coding:utf-8 -*-
+
+from environment import Environment
+
+"""
+Shared check of the encoding tests: `is_eq(q1, q2, sort_encoding=...)` builds an Environment with the given options
+over `SCHEMA`.
+"""
+
+SCHEMA = {
+    'EMP': {'id': 'int', 'name': 'int', 'age': 'int', 'dept_id': 'int'},
+    'DEPT': {'id': 'int', 'name': 'int'},
+}
+
+
+def is_eq(q1, q2, constraints=None, schema=SCHEMA, ROW_NUM=3, **options):
+    with Environment(**options) as env:
+        for k, v in schema.items():
+            env.create_database(attributes=v, name=k, bound_size=ROW_NUM)
+        if constraints is not None:
+            env.add_constraints(constraints)
+        return env.analyze(q1, q2)
@@ -0,0 +1,68 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from environment import Environment
+from errors import NotEquivalenceError
+from scope import Scope
+
+SCHEMA = {
+    'EMP': {'ID': 'INT', 'AGE': 'INT', 'DEPT_ID': 'INT'},
+    'DEPT': {'ID': 'INT', 'NAME': 'INT'},
+}
+PAIRS = [
+    ("SELECT E.AGE FROM EMP E JOIN DEPT D ON E.DEPT_ID = D.ID WHERE E.AGE > 1",
+     "SELECT E.AGE FROM DEPT D JOIN EMP E ON D.ID = E.DEPT_ID WHERE E.AGE > 1"),
+    ("SELECT AGE, COUNT(*) FROM EMP WHERE AGE > 1 GROUP BY AGE",
+     "SELECT AGE, COUNT(*) FROM EMP WHERE AGE >= 1 GROUP BY AGE"),
+    ("SELECT E.AGE FROM EMP E LEFT JOIN DEPT D ON E.DEPT_ID = D.ID WHERE D.NAME IS NULL",
+     "SELECT AGE FROM EMP"),
+]
+
+
+def is_eq(env, q1, q2):
+    try:
+        return env.analyze(q1, q2)
+    except NotEquivalenceError:
+        return False
+
+
+def _uncached_attribute_terms(self, attribute, tuple_sort, pity_flag=False):
+    return self._attribute_terms_of(attribute, tuple_sort, pity_flag)
+
+
+class TestAttributeTerms(TestCase):
+    def _check(self):
+        results = []
+        with Environment() as env:
+            for k, v in SCHEMA.items():
+                env.create_database(attributes=v, name=k, bound_size=2)
+            env.save_checkpoints()
+            for q1, q2 in PAIRS:
+                env.reload_checkpoints()
+                results.append(is_eq(env, q1, q2))
+            return results, env.attribute_term_hits, env.attribute_term_misses
+
+    def test_reuse(self):
+        scopes = []
+        exit = Scope.__exit__
+
+        def _exit(scope, *args):
+            scopes.append((scope.attribute_term_hits, scope.attribute_term_misses))
+            return exit(scope, *args)
+
+        with patch.object(Scope, '__exit__', _exit):
+            results, hits, misses = self._check()
+        self.assertEqual(results, [True, False, False])
+        # both scopes of the join pair revisit attributes, and the environment sums up all scopes of all pairs
+        self.assertEqual(len(scopes), 2 * len(PAIRS))
+        self.assertTrue(scopes[0][0] > 0 and scopes[1][0] > 0)
+        self.assertEqual((hits, misses), tuple(map(sum, zip(*scopes))))
+
+    def test_results(self):
+        results, _, _ = self._check()
+        with patch.object(Scope, 'attribute_terms', _uncached_attribute_terms):
+            uncached_results, hits, misses = self._check()
+        self.assertEqual(results, uncached_results)
+        self.assertEqual((hits, misses), (0, 0))
@@ -0,0 +1,29 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from constants import BAG_ENCODING
+
+from .equivalence import is_eq
+
+
+class TestBagEncoding(TestCase):
+    ENCODINGS = [BAG_ENCODING.PAIRWISE, BAG_ENCODING.FINGERPRINT]
+
+    def test_join_equivalence(self):
+        sql1 = "SELECT e.age, d.name FROM EMP e JOIN DEPT d ON e.dept_id = d.id"
+        sql2 = "SELECT e.age, d.name FROM DEPT d JOIN EMP e ON d.id = e.dept_id"
+        for encoding in self.ENCODINGS:
+            self.assertTrue(is_eq(sql1, sql2, bag_encoding=encoding))
+
+    def test_multiplicity_non_equivalence(self):
+        sql1 = "SELECT age FROM EMP"
+        sql2 = "SELECT DISTINCT age FROM EMP"
+        for encoding in self.ENCODINGS:
+            self.assertFalse(is_eq(sql1, sql2, bag_encoding=encoding))
+
+    def test_null_non_equivalence(self):
+        sql1 = "SELECT age FROM EMP WHERE age > 1 UNION ALL SELECT age FROM EMP WHERE age <= 1"
+        sql2 = "SELECT age FROM EMP"
+        for encoding in self.ENCODINGS:
+            self.assertFalse(is_eq(sql1, sql2, bag_encoding=encoding))
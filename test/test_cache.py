@@ -0,0 +1,44 @@
+# -*- coding:utf-8 -*-
+
+import tempfile
+from unittest import TestCase
+
+from environment import Environment
+from errors import NotEquivalenceError
+
+SQL1 = "SELECT COUNT(*) FROM EMP"
+SQL2 = "SELECT 2 * COUNT(*) - 2 FROM EMP"
+
+
+def is_eq(bound_size, cache_dir):
+    with Environment(cache_dir=cache_dir) as env:
+        env.create_database({'ID': 'INT'}, bound_size=bound_size, name='EMP')
+        try:
+            return env.analyze(SQL1, SQL2), env.cache_hit
+        except NotEquivalenceError:
+            return False, env.cache_hit
+
+
+class TestResultCache(TestCase):
+    def test_exact_bound_size(self):
+        # only equivalent at bound size 2
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(is_eq(2, directory), (True, False))
+            self.assertEqual(is_eq(1, directory), (False, False))
+            self.assertEqual(is_eq(3, directory), (False, False))
+            self.assertEqual(is_eq(2, directory), (True, True))
+            self.assertEqual(is_eq(3, directory), (False, True))
+
+    def test_counterexample(self):
+        def counterexample(directory):
+            with Environment(cache_dir=directory, generate_counterexample=True, show_counterexample=True) as env:
+                env.create_database({'ID': 'INT'}, bound_size=2, name='EMP')
+                self.assertFalse(env.analyze("SELECT ID FROM EMP", "SELECT ID + 1 FROM EMP"))
+                return env.cache_hit, env.sql_code, env.counterexample
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache_hit, sql_code, text = counterexample(directory)
+            self.assertFalse(cache_hit)
+            self.assertIn('INSERT INTO', sql_code)
+            self.assertIn('INSERT INTO', text)
+            self.assertEqual(counterexample(directory), (True, sql_code, text))
@@ -0,0 +1,47 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from dbms_checker.counterexample_checker import CounterexampleChecker
+
+COUNTEREXAMPLE = """CREATE TABLE EMP (
+	ID INTEGER,
+	AGE INTEGER
+);
+INSERT INTO EMP VALUES (1, 20);
+INSERT INTO EMP VALUES (1, NULL);
+CREATE TABLE DEPT (
+	ID INTEGER,
+	EMP_ID INTEGER
+);
+INSERT INTO DEPT VALUES (1, 1);
+INSERT INTO DEPT VALUES (2, 2);
+"""
+
+
+class TestCounterexampleChecker(TestCase):
+    def test_sqlite_backend(self):
+        with CounterexampleChecker({'backend': 'sqlite'}) as checker:
+            checker.create_tables(COUNTEREXAMPLE)
+            self.assertFalse(checker.compare_query_results("SELECT AGE FROM EMP", "SELECT AGE FROM EMP WHERE AGE > 0"))
+            self.assertTrue(checker.compare_query_results("SELECT ID FROM EMP", "SELECT ID FROM EMP WHERE ID > 0"))
+            self.assertTrue(checker.check_database_integrity([{'not_null': {'value': 'EMP__ID'}}]))
+            self.assertFalse(checker.check_database_integrity([{'primary': [{'value': 'EMP__ID'}]}]))
+            checker.reset()
+            # tables are gone after a reset
+            checker.create_tables(COUNTEREXAMPLE)
+            self.assertEqual(len(checker.run_query("SELECT * FROM EMP")), 2)
+
+    def test_database_integrity(self):
+        with CounterexampleChecker({'backend': 'sqlite'}) as checker:
+            checker.create_tables(COUNTEREXAMPLE)
+            self.assertTrue(checker.check_database_integrity([
+                {'primary': [{'value': 'DEPT__ID'}]},
+                {'primary': [{'value': 'EMP__ID'}, {'value': 'EMP__AGE'}]},
+                {'gt': [{'value': 'DEPT__EMP_ID'}, 0]},
+                {'lte': [{'value': 'DEPT__EMP_ID'}, {'value': 'DEPT__ID'}]},
+                {'inc': {'value': 'DEPT__ID'}},
+            ]))
+            self.assertFalse(checker.check_database_integrity([{'foreign': [{'value': 'DEPT__EMP_ID'}, {'value': 'EMP__ID'}]}]))
+            self.assertFalse(checker.check_database_integrity([{'in': [{'value': 'EMP__AGE'}, [20]]}]))
+            self.assertFalse(checker.check_database_integrity([{'gt': [{'value': 'DEPT__ID'}, {'value': 'DEPT__EMP_ID'}]}]))
@@ -0,0 +1,49 @@
+# -*- coding:utf-8 -*-
+
+import contextlib
+import io
+import os
+import tempfile
+from argparse import Namespace
+from unittest import TestCase
+
+import ujson
+
+from parallel.evaluation import evaluation
+
+
+def _metrics(bound_size, conflicts, reason_unknown=None):
+    return {
+        'bound_size': bound_size, 'statistics': {'conflicts': conflicts, 'max memory': 20.},
+        'reason_unknown': reason_unknown, 'peak_rss': 80.,
+    }
+
+
+# records of `-m train`: times are [traversing time, solving time], and pairs stop at NEQ/TMO
+RECORDS = [
+    {'index': 0, 'pair': ['SELECT A FROM T', 'SELECT DISTINCT A FROM T'], 'states': ['EQU', 'NEQ'],
+     'times': [[0.1, 0.2], [0.3, 0.4]], 'counterexample': None, 'err': None,
+     'metrics': [_metrics(1, 5), _metrics(2, 10)]},
+    {'index': 1, 'pair': ['SELECT A FROM T', 'SELECT A FROM T JOIN S ON T.A = S.A'], 'states': ['NEQ'],
+     'times': [[0.5, None]], 'counterexample': None, 'err': None, 'metrics': [_metrics(1, 1)]},
+    {'index': 2, 'pair': ['SELECT A FROM T', 'SELECT A FROM T'], 'states': ['EQU', 'TMO'],
+     'times': [[0.1, 0.1], None], 'counterexample': None, 'err': 'Time Out!',
+     'metrics': [_metrics(1, 2), _metrics(2, 0, reason_unknown='timeout')]},
+]
+
+
+class TestEvaluation(TestCase):
+    def test_evaluation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            out_file = os.path.join(directory, 'records.out')
+            with open(out_file, 'w') as writer:
+                for record in RECORDS:
+                    print(ujson.dumps(record), file=writer)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                evaluation(Namespace(out_file=out_file, bound_size=2, timeout=10, summary=1))
+        output = output.getvalue()
+        # the summary of solver statistics
+        for group in ['bound=1', 'bound=2', 'op=distinct', 'op=join']:
+            self.assertIn(group, output)
+        self.assertIn('#EQUIV:   1, #NON-EQUIV:   2, #NOT-SUPP:   0, #TIMEOUT:   0, AvgTIME: 0.57s', output)
@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+
+from collections import Counter
+from unittest import TestCase
+
+from evaluator import BatchEvaluator
+
+SCHEMA = {
+    'EMP': {'ID': 'INT', 'NAME': 'VARCHAR', 'AGE': 'INT', 'DEPT_ID': 'INT'},
+    'DEPT': {'ID': 'INT', 'NAME': 'VARCHAR'},
+}
+DATABASES = [
+    {
+        'EMP': [(1, 'a', 20, 1), (2, 'b', None, 1), (3, None, None, None)],
+        'DEPT': [(1, 'x'), (2, None)],
+    },
+    {
+        'EMP': [(1, 'a', 30, 2), (2, 'a', 30, 2), (3, 'c', 40, 2)],
+        'DEPT': [(1, 'x'), (2, 'y')],
+    },
+]
+
+
+def results(query):
+    evaluator = BatchEvaluator(SCHEMA, DATABASES)
+    out = evaluator.evaluate(query)[0]
+    decode = {code: string for string, code in evaluator.codes.items()}
+    bags = []
+    for b in range(len(DATABASES)):
+        rows = []
+        for n in range(out.valid.shape[1]):
+            if out.valid[b, n]:
+                rows.append(tuple(
+                    None if nulls[b, n] else decode.get(values[b, n], values[b, n])
+                    for _, _, values, nulls in out.columns
+                ))
+        bags.append(Counter(rows))
+    return bags
+
+
+class TestBatchEvaluator(TestCase):
+    def test_null_predicates(self):
+        # NULL AND FALSE is FALSE, so NOT(...) keeps the 2nd tuple, while NULL AND NULL drops the 3rd one
+        bags = results("SELECT ID FROM EMP WHERE NOT (AGE > 25 AND NAME = 'z')")
+        self.assertEqual(bags, [Counter({(1,): 1, (2,): 1}), Counter({(1,): 1, (2,): 1, (3,): 1})])
+        bags = results("SELECT ID FROM EMP WHERE AGE > 25")
+        self.assertEqual(bags, [Counter(), Counter({(1,): 1, (2,): 1, (3,): 1})])
+
+    def test_aggregates(self):
+        bags = results("SELECT COUNT(*), COUNT(AGE), SUM(AGE), AVG(AGE), COUNT(DISTINCT AGE) FROM EMP WHERE ID > 1")
+        self.assertEqual(bags, [Counter({(2, 0, None, None, 0): 1}), Counter({(2, 2, 70, 35, 2): 1})])
+
+    def test_group_by(self):
+        # NULL keys are in the same group
+        bags = results("SELECT DEPT_ID, MAX(ID) FROM EMP GROUP BY DEPT_ID HAVING COUNT(*) >= 1")
+        self.assertEqual(bags, [Counter({(1, 2): 1, (None, 3): 1}), Counter({(2, 3): 1})])
+
+    def test_left_join(self):
+        bags = results("SELECT D.NAME, E.ID FROM DEPT D LEFT JOIN EMP E ON D.ID = E.DEPT_ID AND E.AGE IS NULL")
+        self.assertEqual(bags, [Counter({('X', 2): 1, (None, None): 1}), Counter({('X', None): 1, ('Y', None): 1})])
+
+    def test_differ(self):
+        evaluator = BatchEvaluator(SCHEMA, DATABASES)
+        differ = evaluator.differ("SELECT AGE FROM EMP", "SELECT DISTINCT AGE FROM EMP")
+        self.assertEqual(differ.tolist(), [True, True])
+        differ = evaluator.differ("SELECT NAME FROM EMP WHERE AGE = 30", "SELECT NAME FROM EMP WHERE AGE + 1 = 31")
+        self.assertEqual(differ.tolist(), [False, False])
@@ -0,0 +1,28 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from constants import FOREIGN_KEY_ENCODING
+
+from .equivalence import is_eq
+
+
+class TestForeignKeyEncoding(TestCase):
+    ENCODINGS = [FOREIGN_KEY_ENCODING.DISJUNCTION, FOREIGN_KEY_ENCODING.WITNESS]
+    CONSTRAINTS = [
+        {'primary': [{'value': 'DEPT__ID'}]},
+        {'foreign': [{'value': 'EMP__DEPT_ID'}, {'value': 'DEPT__ID'}]},
+    ]
+
+    def test_join_elimination(self):
+        sql1 = "SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id"
+        sql2 = "SELECT age FROM EMP"
+        for encoding in self.ENCODINGS:
+            self.assertTrue(is_eq(sql1, sql2, self.CONSTRAINTS, foreign_key_encoding=encoding))
+            self.assertFalse(is_eq(sql1, sql2, self.CONSTRAINTS[:1], foreign_key_encoding=encoding))
+
+    def test_semi_join(self):
+        sql1 = "SELECT id FROM EMP WHERE dept_id IN (SELECT id FROM DEPT WHERE name > 1)"
+        sql2 = "SELECT id FROM EMP"
+        for encoding in self.ENCODINGS:
+            self.assertFalse(is_eq(sql1, sql2, self.CONSTRAINTS, foreign_key_encoding=encoding))
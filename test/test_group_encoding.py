@@ -0,0 +1,29 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from constants import GROUP_ENCODING
+
+from .equivalence import is_eq
+
+
+class TestGroupEncoding(TestCase):
+    ENCODINGS = [GROUP_ENCODING.PAIRWISE, GROUP_ENCODING.GROUP_ID]
+
+    def test_groupby_keys_order(self):
+        sql1 = "SELECT age, dept_id, MAX(id) FROM EMP GROUP BY age, dept_id"
+        sql2 = "SELECT age, dept_id, MAX(id) FROM EMP GROUP BY dept_id, age"
+        for encoding in self.ENCODINGS:
+            self.assertTrue(is_eq(sql1, sql2, group_encoding=encoding))
+
+    def test_having_non_equivalence(self):
+        sql1 = "SELECT age, MAX(id) FROM EMP GROUP BY age HAVING COUNT(*) > 1"
+        sql2 = "SELECT age, MAX(id) FROM EMP GROUP BY age HAVING COUNT(*) > 2"
+        for encoding in self.ENCODINGS:
+            self.assertFalse(is_eq(sql1, sql2, group_encoding=encoding))
+
+    def test_nested_groupby_equivalence(self):
+        sql1 = "SELECT T.c, COUNT(*) FROM (SELECT age, COUNT(*) AS c FROM EMP GROUP BY age) T GROUP BY T.c"
+        sql2 = "SELECT T.c, SUM(1) FROM (SELECT age, SUM(1) AS c FROM EMP GROUP BY age) T GROUP BY T.c"
+        for encoding in self.ENCODINGS:
+            self.assertTrue(is_eq(sql1, sql2, group_encoding=encoding))
@@ -0,0 +1,33 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from constants import KEY_ENCODING
+
+from .equivalence import is_eq
+
+
+class TestKeyEncoding(TestCase):
+    ENCODINGS = [KEY_ENCODING.PAIRWISE, KEY_ENCODING.DISTINCT]
+    PRIMARY_KEY = [{'primary': [{'value': 'EMP__ID'}]}]
+    COMPOSITE_KEY = [{'primary': [{'value': 'EMP__NAME'}, {'value': 'EMP__AGE'}]}]
+
+    def test_primary_key(self):
+        sql1 = "SELECT id FROM EMP"
+        sql2 = "SELECT DISTINCT id FROM EMP WHERE id IS NOT NULL"
+        for encoding in self.ENCODINGS:
+            self.assertTrue(is_eq(sql1, sql2, self.PRIMARY_KEY, key_encoding=encoding))
+            self.assertFalse(is_eq(sql1, sql2, [], key_encoding=encoding))
+
+    def test_composite_key(self):
+        sql1 = "SELECT name, age FROM EMP"
+        sql2 = "SELECT DISTINCT name, age FROM EMP"
+        for encoding in self.ENCODINGS:
+            self.assertTrue(is_eq(sql1, sql2, self.COMPOSITE_KEY, key_encoding=encoding))
+
+    def test_composite_key_non_equivalence(self):
+        # only the pair (name, age) is unique
+        sql1 = "SELECT name FROM EMP"
+        sql2 = "SELECT DISTINCT name FROM EMP"
+        for encoding in self.ENCODINGS:
+            self.assertFalse(is_eq(sql1, sql2, self.COMPOSITE_KEY, key_encoding=encoding))
@@ -0,0 +1,47 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from z3 import (
+    Real,
+    Solver,
+    sat,
+)
+
+from constants import (
+    BoolVal,
+    Int,
+    IntVal,
+    RealVal,
+    Z3_CONTEXT,
+)
+from utils import model_value
+
+
+class TestModelExtraction(TestCase):
+    def test_model_value(self):
+        x, y, z = Int('x'), Real('y', ctx=Z3_CONTEXT), Real('z', ctx=Z3_CONTEXT)
+        solver = Solver(ctx=Z3_CONTEXT)
+        solver.add(x == IntVal('-3'), y * y == RealVal('2'), y > RealVal('0'), z * RealVal('2') == RealVal('1'))
+        self.assertEqual(solver.check(), sat)
+        model = solver.model()
+        self.assertEqual(model_value(model.eval(x)), -3)
+        self.assertAlmostEqual(model_value(model.eval(y)), 2 ** 0.5, places=6)
+        self.assertEqual(model_value(model.eval(z)), 0.5)
+        self.assertEqual(model_value(model.eval(z * RealVal('4'))), 2)
+        self.assertIs(model_value(model.eval(x < IntVal('0'))), True)
+        self.assertIs(model_value(model.eval(BoolVal(False))), False)
+
+    def test_counterexample(self):
+        from environment import Environment
+        with Environment(generate_counterexample=True) as env:
+            env.create_database({'A': 'INT', 'B': 'INT'}, bound_size=2, name='T')
+            env.save_checkpoints()
+            self.assertFalse(env.analyze("SELECT A FROM T", "SELECT A FROM T WHERE B > 1"))
+            rows = env.counterexample_dict['T']
+        self.assertEqual(len(rows), 2)
+        for row in rows:
+            self.assertEqual(list(row), ['A', 'B'])
+            for value in row.values():
+                self.assertTrue(value == 'NULL' or value.lstrip('-').isdigit())
+        self.assertTrue(any(row['B'] == 'NULL' or int(row['B']) <= 1 for row in rows))
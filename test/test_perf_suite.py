@@ -0,0 +1,54 @@
+# -*- coding:utf-8 -*-
+
+from argparse import Namespace
+from unittest import TestCase
+
+from perf.suite import (
+    SUITE_VERSION,
+    compare,
+)
+
+THRESHOLDS = Namespace(
+    time_threshold=0.25, min_time=0.1, suite_threshold=0.1, ast_threshold=0.05, memory_threshold=0.2, min_memory=16.,
+)
+
+
+def _run(results):
+    return {'version': SUITE_VERSION, 'suite': 'quick', 'results': results}
+
+
+def _check(state='EQU', encode_time=(1., 1.1), solve_time=(2., 2.2), ast_nodes=(100, 100), peak_rss=(200., 200.)):
+    return {
+        'state': state, 'encode_time': list(encode_time), 'solve_time': list(solve_time),
+        'ast_nodes': list(ast_nodes), 'peak_rss': list(peak_rss),
+    }
+
+
+class TestPerfSuite(TestCase):
+    def test_no_regression(self):
+        baseline = _run({'a/1/2': _check(), 'a/2/2': _check(state='TMO', solve_time=(None, None))})
+        # noisy repeats around the same median, and a timeout that becomes solved
+        current = _run({'a/1/2': _check(solve_time=(1.4, 3.)), 'a/2/2': _check(state='NEQ')})
+        regressions, geomeans = compare(baseline, current, THRESHOLDS)
+        self.assertEqual(regressions, [])
+        self.assertAlmostEqual(geomeans['encode_time'], 1.)
+
+    def test_regressions(self):
+        baseline = _run({'a/1/2': _check(), 'a/2/2': _check(), 'a/3/2': _check()})
+        current = _run({
+            'a/1/2': _check(solve_time=(4., 4.1)),
+            'a/2/2': _check(state='NEQ'),
+            'a/3/2': _check(ast_nodes=(120, 120), peak_rss=(300., 300.)),
+        })
+        regressions, geomeans = compare(baseline, current, THRESHOLDS)
+        self.assertEqual(
+            sorted((check, metric) for check, metric, *_ in regressions),
+            [('(suite)', 'solve_time'), ('a/1/2', 'solve_time'), ('a/2/2', 'state'), ('a/3/2', 'ast_nodes'),
+             ('a/3/2', 'peak_rss')],
+        )
+
+    def test_versions(self):
+        baseline = _run({})
+        baseline['version'] = SUITE_VERSION - 1
+        with self.assertRaises(ValueError):
+            compare(baseline, _run({}), THRESHOLDS)
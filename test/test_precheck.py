@@ -0,0 +1,70 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from environment import Environment
+from errors import UnknownError
+from precheck import RandomPrechecker
+
+SCHEMA = {
+    'EMP': {'ID': 'INT', 'NAME': 'INT', 'AGE': 'INT', 'DEPT_ID': 'INT'},
+    'DEPT': {'ID': 'INT', 'NAME': 'INT'},
+}
+CONSTRAINTS = [
+    {'primary': [{'value': 'EMP__ID'}]},
+    {'primary': [{'value': 'DEPT__ID'}]},
+    {'foreign': [{'value': 'EMP__DEPT_ID'}, {'value': 'DEPT__ID'}]},
+]
+
+
+def is_eq(q1, q2, precheck, constraints=CONSTRAINTS, ROW_NUM=3, symmetry_breaking=False):
+    with Environment(generate_counterexample=True, precheck=precheck, symmetry_breaking=symmetry_breaking) as env:
+        for k, v in SCHEMA.items():
+            env.create_database(attributes=v, name=k, bound_size=ROW_NUM)
+        env.add_constraints(constraints)
+        env.save_checkpoints()
+        out = env.analyze(q1, q2)
+        return out, env.precheck_hit
+
+
+class TestPrecheck(TestCase):
+    def test_random_database(self):
+        prechecker = RandomPrechecker(SCHEMA, {'EMP': 3, 'DEPT': 2}, CONSTRAINTS)
+        sql1 = "SELECT age FROM EMP"
+        sql2 = "SELECT DISTINCT age FROM EMP"
+        database = prechecker.search(sql1, sql2, trials=20)
+        self.assertIsNotNone(database)
+        self.assertEqual([len(database['EMP']), len(database['DEPT'])], [3, 2])
+        self.assertEqual(len({row[0] for row in database['EMP']}), 3)
+        self.assertTrue({row[3] for row in database['EMP']} <= {row[0] for row in database['DEPT']})
+
+    def test_non_equivalence(self):
+        sql1 = "SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id WHERE d.name > 1"
+        sql2 = "SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id WHERE d.name >= 1"
+        self.assertEqual(is_eq(sql1, sql2, precheck=20), (False, True))
+
+    def test_symmetry_breaking(self):
+        # random rows are not lexicographically ordered, which must not reject them
+        sql1 = "SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id WHERE d.name > 1"
+        sql2 = "SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id WHERE d.name >= 1"
+        self.assertEqual(is_eq(sql1, sql2, precheck=20, symmetry_breaking=True), (False, True))
+
+    def test_equivalence(self):
+        sql1 = "SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id"
+        sql2 = "SELECT age FROM EMP"
+        self.assertEqual(is_eq(sql1, sql2, precheck=20), (True, False))
+
+    def test_inconclusive(self):
+        # a pinned check that times out is left to the symbolic check
+        analyze_asts = Environment._analyze_asts
+
+        def _analyze_asts(self, query_asts, out_file=None, symmetry_breaking=True):
+            if not symmetry_breaking:
+                raise UnknownError
+            return analyze_asts(self, query_asts, out_file=out_file, symmetry_breaking=symmetry_breaking)
+
+        sql1 = "SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id WHERE d.name > 1"
+        sql2 = "SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id WHERE d.name >= 1"
+        with patch.object(Environment, '_analyze_asts', _analyze_asts):
+            self.assertEqual(is_eq(sql1, sql2, precheck=20), (False, False))
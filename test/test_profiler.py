@@ -0,0 +1,49 @@
+# -*- coding:utf-8 -*-
+
+import os
+import tempfile
+from unittest import TestCase
+
+import ujson
+
+from environment import Environment
+
+
+class TestProfiler(TestCase):
+    def test_stages(self):
+        with Environment(profile=True, generate_counterexample=True) as env:
+            env.create_database({'ID': 'INT', 'A': 'INT'}, bound_size=2, name='T')
+            env.create_database({'ID': 'INT', 'B': 'INT'}, bound_size=2, name='S')
+            result = env.analyze(
+                "SELECT T.A, COUNT(*) FROM T JOIN S ON T.ID = S.ID WHERE T.A > 1 GROUP BY T.A",
+                "SELECT DISTINCT T.A, 1 FROM T JOIN S ON T.ID = S.ID WHERE T.A > 1 ORDER BY 1",
+            )
+            self.assertFalse(result)
+            stages = env.profiler.summary()
+            for name in ['parse', 'analyze', 'visit.join', 'visit.filter', 'visit.groupby', 'visit.distinct',
+                         'visit.orderby', 'verifier', 'solver', 'model']:
+                self.assertIn(name, stages)
+            self.assertEqual(stages['parse']['count'], 2)
+            self.assertEqual(stages['verifier']['formulas'], 1)
+            self.assertGreater(stages['verifier']['ast_nodes'], 0)
+            self.assertGreater(stages['visit.join']['ast_nodes'], 0)
+            self.assertGreater(stages['analyze']['tuple_sorts'] + stages['visit.groupby']['tuple_sorts'], 0)
+            # exclusive times of nested stages never exceed the total
+            records = env.profiler.records
+            total = sum(record['time'] for record in records if record['depth'] == 0)
+            self.assertTrue(all(record['self_time'] >= 0 for record in records))
+            self.assertLessEqual(sum(record['self_time'] for record in records), total + 1e-6)
+
+            with tempfile.TemporaryDirectory() as directory:
+                file = os.path.join(directory, 'trace.json')
+                env.profiler.chrome_trace(file)
+                with open(file) as reader:
+                    events = ujson.load(reader)['traceEvents']
+            self.assertEqual(len(events), len(records))
+            self.assertTrue(all(event['ph'] == 'X' for event in events))
+
+    def test_disabled(self):
+        with Environment() as env:
+            env.create_database({'ID': 'INT'}, bound_size=2, name='T')
+            self.assertTrue(env.analyze("SELECT ID FROM T", "SELECT T.ID FROM T"))
+            self.assertIsNone(env.profiler)
@@ -0,0 +1,70 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from environment import Environment
+from errors import NotEquivalenceError
+from pruning import prune_schema
+
+SCHEMA = {
+    'EMP': {'EMPNO': 'INT', 'ENAME': 'VARCHAR', 'SAL': 'INT', 'DEPTNO': 'INT'},
+    'DEPT': {'DEPTNO': 'INT', 'NAME': 'VARCHAR'},
+    'BONUS': {'ENAME': 'VARCHAR', 'COMM': 'INT'},
+}
+CONSTRAINTS = [
+    {'primary': [{'value': 'EMP__EMPNO'}]},
+    {'not_null': {'value': 'EMP__SAL'}},
+    {'primary': [{'value': 'DEPT__DEPTNO'}]},
+    {'foreign': [{'value': 'EMP__DEPTNO'}, {'value': 'DEPT__DEPTNO'}]},
+    {'not_null': {'value': 'BONUS__COMM'}},
+]
+
+
+def is_eq(q1, q2, prune, ROW_NUM=2):
+    schema, constraints = prune_schema(SCHEMA, CONSTRAINTS, q1, q2) if prune else (SCHEMA, CONSTRAINTS)
+    with Environment() as env:
+        for k, v in schema.items():
+            env.create_database(attributes=v, name=k, bound_size=ROW_NUM)
+        env.add_constraints(constraints)
+        try:
+            return env.analyze(q1, q2)
+        except NotEquivalenceError:
+            return False
+
+
+class TestPruning(TestCase):
+    def test_columns(self):
+        schema, constraints = prune_schema(SCHEMA, CONSTRAINTS, "SELECT SAL FROM EMP", "SELECT E.SAL FROM EMP E")
+        self.assertEqual(schema, {'EMP': {'SAL': 'INT'}})
+        self.assertEqual(constraints, [{'not_null': {'value': 'EMP__SAL'}}])
+
+    def test_constraint_closure(self):
+        # the foreign key reaches DEPT, and then its primary key
+        schema, constraints = prune_schema(SCHEMA, CONSTRAINTS, "SELECT DEPTNO FROM EMP", "SELECT DEPTNO FROM EMP")
+        self.assertEqual(schema, {'EMP': {'DEPTNO': 'INT'}, 'DEPT': {'DEPTNO': 'INT'}})
+        self.assertEqual(constraints, CONSTRAINTS[2:4])
+
+    def test_stars(self):
+        schema, _ = prune_schema(SCHEMA, None, "SELECT E.*, D.NAME FROM EMP E JOIN DEPT D ON E.DEPTNO = D.DEPTNO",
+                                 "SELECT * FROM (SELECT COMM FROM BONUS) T")
+        self.assertEqual(schema, {'EMP': SCHEMA['EMP'], 'DEPT': SCHEMA['DEPT'], 'BONUS': {'COMM': 'INT'}})
+        # COUNT(*) reads no column, but a table keeps one
+        schema, _ = prune_schema(SCHEMA, None, "SELECT COUNT(*) FROM EMP", "SELECT COUNT(*) FROM EMP")
+        self.assertEqual(schema, {'EMP': {'EMPNO': 'INT'}})
+        schema, _ = prune_schema(SCHEMA, None, "SELECT ENAME FROM EMP NATURAL JOIN BONUS", "SELECT ENAME FROM BONUS")
+        self.assertEqual(schema, {'EMP': SCHEMA['EMP'], 'BONUS': SCHEMA['BONUS']})
+
+    def test_unparsable(self):
+        self.assertEqual(prune_schema(SCHEMA, CONSTRAINTS, "SELECT FROM", "SELECT 1"), (SCHEMA, CONSTRAINTS))
+
+    def test_results(self):
+        pairs = [
+            ("SELECT SAL FROM EMP WHERE SAL IS NOT NULL", "SELECT SAL FROM EMP"),
+            ("SELECT EMP.DEPTNO FROM EMP JOIN DEPT ON EMP.DEPTNO = DEPT.DEPTNO", "SELECT DEPTNO FROM EMP"),
+            ("SELECT DEPTNO FROM EMP", "SELECT DEPTNO FROM DEPT"),
+            ("SELECT COUNT(*) FROM EMP", "SELECT COUNT(SAL) FROM EMP"),
+            ("SELECT COUNT(*) FROM EMP", "SELECT COUNT(DEPTNO) FROM EMP"),
+            ("SELECT * FROM EMP", "SELECT * FROM EMP WHERE ENAME IS NOT NULL"),
+        ]
+        for q1, q2 in pairs:
+            self.assertEqual(is_eq(q1, q2, prune=False), is_eq(q1, q2, prune=True), (q1, q2))
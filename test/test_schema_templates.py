@@ -0,0 +1,48 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from environment import Environment
+from parallel.schema_templates import SchemaTemplates
+
+SCHEMA = {
+    'EMP': {'ID': 'INT', 'NAME': 'VARCHAR', 'AGE': 'INT', 'DEPT_ID': 'INT'},
+    'DEPT': {'ID': 'INT', 'NAME': 'INT'},
+}
+CONSTRAINTS = [
+    {'primary': [{'value': 'EMP__ID'}]},
+    {'primary': [{'value': 'DEPT__ID'}]},
+    {'foreign': [{'value': 'EMP__DEPT_ID'}, {'value': 'DEPT__ID'}]},
+]
+PAIRS = [
+    ("SELECT age FROM EMP", "SELECT DISTINCT age FROM EMP", False),
+    ("SELECT e.age FROM EMP e JOIN DEPT d ON e.dept_id = d.id", "SELECT age FROM EMP WHERE dept_id IS NOT NULL", True),
+    ("SELECT id FROM EMP WHERE name = 'A'", "SELECT id FROM EMP WHERE name = 'B'", False),
+    ("SELECT id FROM EMP WHERE name = 'A'", "SELECT id FROM EMP WHERE 'A' = name", True),
+    ("SELECT * FROM DEPT WHERE 1 = 0", "SELECT * FROM DEPT WHERE id IS NULL", True),
+]
+
+
+class TestSchemaTemplates(TestCase):
+    def test_reuse(self):
+        templates = SchemaTemplates(lambda: Environment(generate_counterexample=True))
+        num_facts = None
+        for sql1, sql2, expected in PAIRS * 2:
+            env = templates.get(SCHEMA, CONSTRAINTS, 2)
+            if num_facts is None:
+                num_facts = len(env.DBMS_facts)
+            self.assertEqual(len(env.DBMS_facts), num_facts)
+            self.assertEqual(env.analyze(sql1, sql2), expected)
+            if expected:
+                self.assertIsNone(env.sql_code)
+            else:
+                self.assertTrue(env.sql_code.startswith('CREATE TABLE EMP'))
+                self.assertEqual(len(env.counterexample_dict['EMP']), 2)
+            templates.release(env)
+        self.assertEqual((templates.hits, templates.misses), (2 * len(PAIRS) - 1, 1))
+
+        env = templates.get(SCHEMA, CONSTRAINTS, 3)
+        self.assertEqual(len(env.base_databases['EMP'].tuples), 3)
+        templates.release(env, reuse=False)
+        self.assertEqual(len(templates.templates), 1)
+        templates.close()
@@ -0,0 +1,59 @@
+# -*- coding:utf-8 -*-
+
+from time import time
+from unittest import TestCase
+
+from environment import Environment
+from errors import UnknownError
+from parallel.metrics import (
+    collect_metrics,
+    metrics_summary,
+    pair_operators,
+)
+
+
+class TestSolverStatistics(TestCase):
+    def test_statistics(self):
+        with Environment() as env:
+            env.create_database({'ID': 'INT', 'A': 'INT'}, bound_size=3, name='T')
+            sql1, sql2 = "SELECT A, COUNT(*) FROM T GROUP BY A", "SELECT A, SUM(1) FROM T GROUP BY A"
+            self.assertTrue(env.analyze(sql1, sql2))
+            self.assertIsNone(env.reason_unknown)
+            self.assertIn('conflicts', env.solver_statistics)
+            metrics = collect_metrics(env, sql1, sql2, 3)
+            self.assertEqual(metrics['statistics'], env.solver_statistics)
+            self.assertGreater(metrics['peak_rss'], 0)
+            self.assertNotIn('stages', metrics)
+
+    def test_deadline(self):
+        with Environment() as env:
+            env.create_database({'ID': 'INT', 'A': 'INT', 'B': 'INT'}, bound_size=6, name='T')
+            env.deadline = time()
+            with self.assertRaises(UnknownError):
+                env.analyze("SELECT A, COUNT(*) FROM T GROUP BY A", "SELECT DISTINCT A, SUM(1) FROM T GROUP BY A")
+            self.assertEqual(env.reason_unknown, 'timeout')
+            self.assertIsNotNone(env.solver_statistics)
+
+    def test_summary(self):
+        self.assertEqual(
+            pair_operators(["SELECT DISTINCT a FROM T, S WHERE T.id = S.id", "SELECT a FROM T GROUP BY a"]),
+            ['distinct', 'groupby', 'join'],
+        )
+        records = [
+            {
+                'pair': ["SELECT a FROM T ORDER BY a", "SELECT a FROM T"],
+                'states': ['EQU', 'TMO'],
+                'metrics': [
+                    {'bound_size': 1, 'statistics': {'conflicts': 2, 'arith-lower': 3}, 'reason_unknown': None,
+                     'peak_rss': 10.},
+                    {'bound_size': 2, 'statistics': {'conflicts': 4}, 'reason_unknown': 'timeout', 'peak_rss': 12.},
+                ],
+            },
+            # killed by the parent, no metrics
+            {'pair': ["SELECT a FROM T", "SELECT a FROM T"], 'states': ['TMO']},
+        ]
+        rows = {row[0]: row for row in metrics_summary(records).rows}
+        self.assertEqual(rows['bound=1'][1:4], [2, 1, 1])
+        self.assertEqual(rows['bound=2'][4], 'timeout: 1')
+        self.assertEqual(rows['op=orderby'][1:4], [2, 1, 0])
+        self.assertEqual(rows['op=orderby'][5], 3.)
@@ -0,0 +1,36 @@
+# -*- coding:utf-8 -*-
+
+import itertools
+from unittest import TestCase
+
+from constants import SORT_ENCODING
+from utils import odd_even_merge_sort_network
+
+from .equivalence import is_eq
+
+
+class TestSortEncoding(TestCase):
+    ENCODINGS = [SORT_ENCODING.BUBBLE, SORT_ENCODING.NETWORK, SORT_ENCODING.PERMUTATION]
+
+    def test_odd_even_merge_sort_network(self):
+        # 0-1 principle: a network sorts every input iff it sorts every 0/1 input
+        for size in range(1, 10):
+            comparators = odd_even_merge_sort_network(size)
+            for bits in itertools.product([0, 1], repeat=size):
+                values = list(bits)
+                for i, j in comparators:
+                    if values[i] > values[j]:
+                        values[i], values[j] = values[j], values[i]
+                self.assertEqual(values, sorted(bits))
+
+    def test_orderby_equivalence(self):
+        sql1 = "SELECT id, age FROM EMP WHERE age > 25 ORDER BY age"
+        sql2 = "SELECT id, age FROM (SELECT * FROM EMP ORDER BY age) WHERE age > 25 ORDER BY age"
+        for encoding in self.ENCODINGS:
+            self.assertTrue(is_eq(sql1, sql2, sort_encoding=encoding))
+
+    def test_orderby_limit_non_equivalence(self):
+        sql1 = "SELECT id FROM EMP ORDER BY age LIMIT 1"
+        sql2 = "SELECT id FROM EMP ORDER BY age DESC LIMIT 1"
+        for encoding in self.ENCODINGS:
+            self.assertFalse(is_eq(sql1, sql2, sort_encoding=encoding))
@@ -0,0 +1,26 @@
+# -*- coding:utf-8 -*-
+
+from unittest import TestCase
+
+from .equivalence import is_eq
+
+
+class TestSymmetryBreaking(TestCase):
+    def test_join_equivalence(self):
+        sql1 = "SELECT e.age, d.name FROM EMP e JOIN DEPT d ON e.dept_id = d.id"
+        sql2 = "SELECT e.age, d.name FROM DEPT d JOIN EMP e ON d.id = e.dept_id"
+        for symmetry_breaking in [False, True]:
+            self.assertTrue(is_eq(sql1, sql2, symmetry_breaking=symmetry_breaking))
+
+    def test_multiplicity_non_equivalence(self):
+        sql1 = "SELECT age FROM EMP"
+        sql2 = "SELECT DISTINCT age FROM EMP"
+        for symmetry_breaking in [False, True]:
+            self.assertFalse(is_eq(sql1, sql2, symmetry_breaking=symmetry_breaking))
+
+    def test_limit_non_equivalence(self):
+        # equivalent if tuples were ordered by `id`, so tables must not be ordered for LIMIT
+        sql1 = "SELECT id FROM EMP LIMIT 1"
+        sql2 = "SELECT id FROM EMP ORDER BY id LIMIT 1"
+        for symmetry_breaking in [False, True]:
+            self.assertFalse(is_eq(sql1, sql2, symmetry_breaking=symmetry_breaking))
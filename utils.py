@@ -6,13 +6,26 @@ import functools
 import math
 import os
 import re
+import signal
+import sys
 import time
 import uuid
 
 import ujson
+from z3 import (
+    AstRef,
+    is_algebraic_value,
+    is_false,
+    is_int_value,
+    is_rational_value,
+    is_string_value,
+    is_true,
+)
 
 from constants import (
     If,
+    RealVal,
+    Z3_0,
     Or,
     And,
     Not,
@@ -132,6 +145,56 @@ def divide(lst, partitions):
         yield lst[i:i + chunck_size]
 
 
+def odd_even_merge_sort_network(size):
+    """
+    comparators (i, j), i < j, of Batcher's odd-even merge sort over `size` wires
+    the network is built for the next power of two, and comparators touching padding wires are dropped
+    """
+    width = 1
+    while width < size:
+        width <<= 1
+    comparators = []
+    p = 1
+    while p < width:
+        k = p
+        while k >= 1:
+            for j in range(k % p, width - k, 2 * k):
+                for i in range(min(k, width - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p) and i + j + k < size:
+                        comparators.append((i + j, i + j + k))
+            k //= 2
+        p <<= 1
+    return comparators
+
+
+def formula_size(*formulas):
+    """number of distinct sub-terms (DAG nodes) of z3 formulas, shared sub-terms are counted once"""
+    visited = set()
+    stack = [formula for formula in formulas if isinstance(formula, AstRef)]
+    while stack:
+        term = stack.pop()
+        if term.get_id() in visited:
+            continue
+        visited.add(term.get_id())
+        stack.extend(term.children())
+    return len(visited)
+
+
+def solver_statistics(solver):
+    """counters of the last check of a z3 solver, e.g., conflicts, decisions, propagations, memory and arith-*"""
+    statistics = solver.statistics()
+    return {key: statistics.get_key_value(key) for key in statistics.keys()}
+
+
+def kill_with_parent():
+    """children must not outlive a parent terminated by the parallel CLIs"""
+    if sys.platform.startswith('linux'):
+        try:
+            ctypes.CDLL('libc.so.6').prctl(1, signal.SIGKILL)  # PR_SET_PDEATHSIG
+        except OSError:
+            pass
+
+
 def safe_readline(f):
     pos = f.tell()
     while True:
@@ -182,14 +245,73 @@ def encode_concate_by_or(nulls, values):
     )
 
 
+def encode_fingerprints(rows, name, declare_function, range_sort):
+    """
+    map rows of columns `(NULL, VALUE)` to terms `name(NULL_1, VALUE_1, ...)` whose VALUEs are zeroed when NULL,
+    so that 2 rows are the same (cf. `encode_same`) iff their fingerprints are equal.
+    Injectivity is only asserted on these rows, by inverse functions of each argument.
+    return (fingerprints, axioms), or (None, None) if columns are not z3 terms of the same sorts
+    """
+    from z3 import ExprRef, is_bool, is_int, is_real
+
+    arguments = []
+    for row in rows:
+        args = []
+        for null, value in row:
+            if not isinstance(null, ExprRef) or not isinstance(value, ExprRef):
+                return None, None
+            if is_bool(value):
+                zero = Z3_FALSE
+            elif is_int(value):
+                zero = Z3_0
+            elif is_real(value):
+                zero = RealVal('0')
+            else:
+                return None, None
+            args.extend([null, If(null, zero, value)])
+        arguments.append(args)
+    if len(arguments) == 0 or len(arguments[0]) == 0:
+        return None, None
+    sorts = [arg.sort() for arg in arguments[0]]
+    if any([arg.sort() for arg in args] != sorts for args in arguments[1:]):
+        return None, None
+
+    # one signature per name, as SMT-LIB2 dumps (e.g., for the portfolio) do not overload functions
+    name = f"{name}__{'_'.join(str(sort) for sort in sorts)}"
+    fingerprint_func = declare_function(name, *sorts, range_sort)
+    inverse_funcs = [declare_function(f'{name}__{idx}', range_sort, sort) for idx, sort in enumerate(sorts)]
+    fingerprints, axioms = [], []
+    for args in arguments:
+        fingerprint = fingerprint_func(*args)
+        fingerprints.append(fingerprint)
+        axioms.extend(inverse_func(fingerprint) == arg for inverse_func, arg in zip(inverse_funcs, args))
+    return fingerprints, axioms
+
+
+def encode_lexicographic_order(lhs, rhs):
+    """
+    `lhs <= rhs` over rows of columns `(NULL, VALUE)`, compared column by column where NULL precedes any value
+    """
+    formula = Z3_TRUE
+    for (lhs_null, lhs_value), (rhs_null, rhs_value) in reversed(list(zip(lhs, rhs))):
+        less = And(Not(rhs_null), Or(lhs_null, lhs_value < rhs_value))
+        same = Or(And(lhs_null, rhs_null), And(Not(lhs_null), Not(rhs_null), lhs_value == rhs_value))
+        formula = Or(less, And(same, formula))
+    return formula
+
+
 class CodeSnippet(object):
     def __init__(self, code: str, docstring: str = None, docstring_first=False, code_string=None):
         self.code = code  # str or CodeSnippet itself
-        self.docstring = '# ' + (docstring or '')
+        self._docstring = docstring  # str, or an object (e.g., a tuple) only printed with the code
         self.docstring_first = docstring_first
         self._code_string = code_string if code_string is None else code_string.strip(
             '\n')  # only store codes which are TOOOOO LONG
 
+    @property
+    def docstring(self):
+        return '# ' + ('' if self._docstring is None else str(self._docstring))
+
     def __str__(self):
         code_string = str(self.code) if self._code_string is None else self._code_string
         if len(self.docstring) > 2:
@@ -219,6 +341,25 @@ class ValuesTable():
         return self.__str__()
 
 
+def model_value(value):
+    """Python value of an evaluated z3 term, e.g., 1 for IntVal(1), 0.5 for RealVal(1/2) and True for BoolVal(True)"""
+    if is_true(value):
+        return True
+    elif is_false(value):
+        return False
+    elif is_int_value(value):
+        return value.as_long()
+    elif is_rational_value(value):
+        fraction = value.as_fraction()
+        return fraction.numerator if fraction.denominator == 1 else float(fraction)
+    elif is_algebraic_value(value):
+        return float(value.approx(20).as_fraction())
+    elif is_string_value(value):
+        return value.as_string()
+    else:
+        return str(value)
+
+
 def is_date_format(date: str):
     return re.match(r'^[0-9]{2,4}[-|_|:|/][0-9]{1,2}[-|_|:|/][0-9]{1,2}(\s+[0-9]{1,2}:[0-9]{1,2}:[0-9]{1,2})?$',
                     date.strip()) is not None
@@ -5,6 +5,7 @@ from z3 import (
 )
 
 from constants import (
+    BAG_ENCODING,
     NumericType,
     Or,
     And,
@@ -12,13 +13,16 @@ from constants import (
     Implies,
     If,
     Sum,
+    IntVal,
     Z3_1,
     Z3_0,
+    Z3_FALSE,
 )
 from formulas.columns import *
 from formulas.expressions import *
 from utils import (
     encode_same,
+    encode_fingerprints,
     CodeSnippet,
 )
 from verifiers.verifier import (
@@ -108,6 +112,9 @@ def equals(ltuples, rtuples):
         return CodeSnippet(code)
 
     def table_equivalence(self, ltable, rtable, left_attributes, right_attributes, **kwargs):
+        if self._env.bag_encoding == BAG_ENCODING.FINGERPRINT:
+            return self._fingerprint_table_equivalence(ltable, rtable, left_attributes, right_attributes)
+
         # |lhs_table| = |rhs_table|, to accelerate
         formulas = [
             self._table_size(ltable) == self._table_size(rtable)
@@ -158,3 +165,55 @@ def equals(ltuples, rtuples):
 
         formulas = And(*formulas)
         return formulas
+
+    def _fingerprint_table_equivalence(self, ltable, rtable, left_attributes, right_attributes):
+        """
+        With |lhs_table| = |rhs_table|, 2 bags are equal iff every tuple of the lhs table occurs as many times in both
+        tables. Each count is a single signed sum of fingerprint equalities, and no rhs-rhs pair is compared.
+        """
+        formulas = [
+            self._table_size(ltable) == self._table_size(rtable)
+        ]
+
+        cmp_funcs = self.cmp_funcs(left_attributes, right_attributes)
+        lhs_tuple_values = self.tuple_values(ltable.values(), left_attributes, cmp_funcs)
+        rhs_tuple_values = self.tuple_values(rtable.values(), right_attributes, cmp_funcs)
+        tuple_values = lhs_tuple_values + rhs_tuple_values
+        if len(tuple_values) == 0:
+            return And(*formulas)
+        fingerprints, axioms = encode_fingerprints(
+            [[attr if isinstance(attr, list) else (Z3_FALSE, attr) for attr in tuple_value[1:]]
+             for tuple_value in tuple_values],
+            name='__fingerprint', declare_function=self._env._declare_auxiliary_function, range_sort=self._env.VarSort,
+        )
+
+        def _same(i, j):
+            if fingerprints is not None:
+                return fingerprints[i] == fingerprints[j]
+            equalities = []
+            for lhs_attr, rhs_attr in zip(tuple_values[i][1:], tuple_values[j][1:]):
+                if isinstance(lhs_attr, list):
+                    equalities.append(encode_same(lhs_attr[0], rhs_attr[0], lhs_attr[1], rhs_attr[1]))
+                else:
+                    equalities.append(lhs_attr == rhs_attr)
+            return And(*equalities)
+
+        lhs_table_num = len(ltable)
+        for i in range(lhs_table_num):
+            counts = []
+            for j in range(len(tuple_values)):
+                if j == i:
+                    continue
+                sign = Z3_1 if j < lhs_table_num else IntVal('-1')
+                counts.append(If(Or(tuple_values[j][0], Not(_same(i, j))), Z3_0, sign))
+            formulas.append(
+                Implies(
+                    Not(tuple_values[i][0]),
+                    Sum(Z3_1, *counts) == Z3_0 if len(counts) > 0 else Z3_FALSE,
+                )
+            )
+
+        formulas = And(*formulas)
+        if axioms:
+            formulas = Implies(And(*axioms), formulas)
+        return formulas
@@ -88,6 +88,8 @@ class Verifier:
         if kwargs['bound_constraints'] is not None and len(kwargs['bound_constraints']) > 0:
             # premise.append(And(*list(kwargs['bound_constraints'])))
             premise.extend(kwargs['bound_constraints'])
+        if kwargs.get('symmetry_constraints'):
+            premise.extend(kwargs['symmetry_constraints'])
         premise = And(*premise)
 
         if kwargs['orderby_constraints'][0] is not None and \
@@ -103,7 +105,7 @@ class Verifier:
         conclusion = semantics_verifier.table_equivalence(ltable, rtable, left_attributes, right_attributes, **kwargs)
         if self._env._script_writer is not None:
             self._env._script_writer.DBMS_facts = CodeWriter(
-                code=self._env.DBMS_facts,
+                code=self._env.DBMS_facts + (kwargs.get('symmetry_constraints') or []),
                 docstring=f'Database tuples',
             )
             if kwargs['bound_constraints'] is not None and len(kwargs['bound_constraints']) > 0:
@@ -39,6 +39,8 @@ from constants import (
     IntVal,
     BoolVal,
     RealVal,
+    SORT_ENCODING,
+    GROUP_ENCODING,
 )
 from errors import NotSupportedError
 from formulas.columns import *
@@ -54,8 +56,10 @@ from utils import (
     simplify,
     encode_concate_by_and,
     encode_concate_by_or,
+    encode_fingerprints,
     is_uninterpreted_func,
     __pos_hash__,
+    odd_even_merge_sort_network,
     CodeSnippet
 )
 from visitors import visitor
@@ -308,7 +312,7 @@ class Visitor:
                     )
                     implication = CodeSnippet(
                         code=code,
-                        docstring=str(curr_tuple),
+                        docstring=curr_tuple,
                         docstring_first=True,
                     )
                     self.scope.register_formulas(formulas=implication)
@@ -437,7 +441,7 @@ And(
 
                 implication = CodeSnippet(
                     code=code,
-                    docstring=str(curr_tuple),
+                    docstring=curr_tuple,
                     docstring_first=True,
                     code_string=_code_string,
                 )
@@ -542,7 +546,7 @@ And(
                     Implies(not_premise, self._DEL(curr_tuple_sort)),
                 ])
 
-                implication = CodeSnippet(code=code, docstring=str(curr_tuple), docstring_first=True)
+                implication = CodeSnippet(code=code, docstring=curr_tuple, docstring_first=True)
                 self.scope.register_formulas(formulas=implication)
                 curr_tuple = DumpTuple(
                     name=curr_tuple.name, sort=curr_tuple_sort,
@@ -623,7 +627,7 @@ And(
                         ),
                         Implies(Not(premise), self._DEL(curr_tuple.SORT)),
                     ),
-                    docstring=str(curr_tuple),
+                    docstring=curr_tuple,
                     docstring_first=True,
                     code_string=_code_string,
                 )
@@ -702,7 +706,7 @@ Implies({premise}, And(
 Implies(Not({premise}), {self._DEL(curr_sort)}),
 )
 """
-        formulas = CodeSnippet(code=code, docstring=str(curr_tuple), docstring_first=True, code_string=_code_string)
+        formulas = CodeSnippet(code=code, docstring=curr_tuple, docstring_first=True, code_string=_code_string)
         self.scope.register_formulas(formulas)
         curr_tuple = DumpTuple(
             name=curr_tuple.name, sort=curr_sort, attributes=curr_tuple.attributes,
@@ -899,7 +903,7 @@ Not({self._DEL(curr_tuple_sort)}),
     Implies(Not({premise}), {self._DEL(curr_tuple_sort)}),
 ])
 """
-                implication = CodeSnippet(code=code, docstring=str(curr_tuple), docstring_first=True,
+                implication = CodeSnippet(code=code, docstring=curr_tuple, docstring_first=True,
                                           code_string=_code_string)
                 self.scope.register_formulas(formulas=implication)
                 curr_tuple = DumpTuple(
@@ -1031,7 +1035,7 @@ And(
     Implies(Not({_premise_string}), {self._DEL(curr_tuple_sort)}),
 )
 """
-                implication = CodeSnippet(code=code, docstring=str(curr_tuple), docstring_first=True,
+                implication = CodeSnippet(code=code, docstring=curr_tuple, docstring_first=True,
                                           code_string=_code_string)
                 self.scope.register_formulas(formulas=implication)
                 curr_tuple = DumpTuple(
@@ -1109,40 +1113,17 @@ And(
 
     ############################ table ############################
 
-    @visitor(FGroupByTable)
-    def visit(self, formulas: FGroupByTable, **kwargs) -> Dict:
-        prev_table = self.visit(formulas.fathers[0])
-        return prev_table
-
-    @visitor(FGroupByMapTable)
-    def visit(self, formulas: FGroupByMapTable, **kwargs) -> Dict:
-        prev_table = self.visit(formulas.fathers[0])
-        if not formulas.is_correlated_subquery and formulas.fathers[0].is_correlated_subquery:
-            # attach correlated subquery's tuples to projection
-            prev_table = self.attach_tuples(prev_table)
-
-        """
-        Example:
-            (t10, t11, t12) -> t16
-            (     t13, t14) -> t17
-            (          t15) -> t18
-        """
-
+    def _group_by_pairwise(self, formulas: FGroupByMapTable, prev_tuples, values):
         # constraint for groupby
         # let i = [1, ..., n], i <= j, j = [i, ..., n]
         # group(i, t_j)  <=> ¬ Del(t_j) ∧ group(i, t_i) ∧ E(t_j) = E(t_i)
         # sum group(?, t_j) = Del(t_j)
         constraint = []
         i = 0
-        prev_tuples = list(prev_table.values())
         t_0 = prev_tuples[i].SORT
         constraint.append(
             formulas.group_function(t_0, IntVal(str(i))) == If(self._DEL(t_0), Z3_0, Z3_1)
         )
-        values = [
-            [self.visit(key)(t.SORT) for key in keys]
-            for t, keys in zip(prev_tuples, formulas.keys)
-        ]
         for j, curr_tuple in enumerate(prev_tuples[1:], start=1):
             constraint.append(
                 Sum(*[formulas.group_function(curr_tuple.SORT, IntVal(str(group_idx))) for group_idx in
@@ -1166,6 +1147,80 @@ And(
                         value_equality,
                     )
                 )
+        return constraint
+
+    def _group_by_ids(self, formulas: FGroupByMapTable, prev_tuples, values):
+        """
+        Linear-size GROUP BY: every non-deleted tuple t_j carries a group id, i.e., the index of the 1st non-deleted
+        tuple (the leader) with the same keys. Keys are compared through their fingerprints K_j (shared by all GROUP BY
+        tables, and keys are in a canonical order, so that the same keys of 2 queries have the same fingerprints):
+            ¬Del(t_j) => GROUP_ID(t_j) = LEADER(K_j) ∧ LEADER_KEY(GROUP_ID(t_j)) = K_j  (same keys <=> same id)
+            ¬Del(t_j) => ∨_{i <= j} GROUP_ID(t_j) = i ∧ ¬Del(t_i) ∧ GROUP_ID(t_i) = i
+        return (group function, constraint), or (None, None) if keys cannot be fingerprinted
+        """
+        rows = []
+        for keys, tuple_values in zip(formulas.keys, values):
+            row = sorted(zip(map(str, keys), tuple_values), key=lambda pair: pair[0])
+            rows.append([(value.NULL, value.VALUE) for _, value in row])
+        fingerprints, constraint = encode_fingerprints(
+            rows, name='__GROUP_KEY', declare_function=self.scope._declare_auxiliary_function,
+            range_sort=self.scope.VarSort,
+        )
+        if fingerprints is None:
+            return None, None
+
+        # table names are reused by the other query's scope, but tuple sorts are not
+        prefix = f'{formulas.name}_{prev_tuples[0].SORT}'
+        declare_function = self.scope._declare_auxiliary_function
+        group_id = declare_function(f'{prefix}_GROUP_ID', self.scope.TupleSort, self.scope.VarSort)
+        leader = declare_function(f'{prefix}_GROUP_LEADER', self.scope.VarSort, self.scope.VarSort)
+        leader_key = declare_function(f'{prefix}_GROUP_LEADER_KEY', self.scope.VarSort, self.scope.VarSort)
+        leaders = []
+        for j, (curr_tuple, fingerprint) in enumerate(zip(prev_tuples, fingerprints)):
+            curr_group_id = group_id(curr_tuple.SORT)
+            leaders.append(And(Not(self._DEL(curr_tuple.SORT)), curr_group_id == IntVal(str(j))))
+            constraint.append(
+                Implies(
+                    Not(self._DEL(curr_tuple.SORT)),
+                    And(
+                        curr_group_id == leader(fingerprint),
+                        leader_key(curr_group_id) == fingerprint,
+                        Or(*[And(curr_group_id == IntVal(str(i)), leaders[i]) for i in range(j + 1)]),
+                    ),
+                )
+            )
+        return lambda x, group_idx: And(Not(self._DEL(x)), group_id(x) == group_idx), constraint
+
+    @visitor(FGroupByTable)
+    def visit(self, formulas: FGroupByTable, **kwargs) -> Dict:
+        prev_table = self.visit(formulas.fathers[0])
+        return prev_table
+
+    @visitor(FGroupByMapTable)
+    def visit(self, formulas: FGroupByMapTable, **kwargs) -> Dict:
+        prev_table = self.visit(formulas.fathers[0])
+        if not formulas.is_correlated_subquery and formulas.fathers[0].is_correlated_subquery:
+            # attach correlated subquery's tuples to projection
+            prev_table = self.attach_tuples(prev_table)
+
+        """
+        Example:
+            (t10, t11, t12) -> t16
+            (     t13, t14) -> t17
+            (          t15) -> t18
+        """
+
+        prev_tuples = list(prev_table.values())
+        values = [
+            [self.visit(key)(t.SORT) for key in keys]
+            for t, keys in zip(prev_tuples, formulas.keys)
+        ]
+        partition, constraint = None, None
+        if self.scope.group_encoding == GROUP_ENCODING.GROUP_ID:
+            partition, constraint = self._group_by_ids(formulas, prev_tuples, values)
+        if partition is None:
+            partition = formulas.group_function
+            constraint = self._group_by_pairwise(formulas, prev_tuples, values)
 
         curr_table = {}
         for idx, curr_tuple in enumerate(formulas):
@@ -1175,7 +1230,7 @@ And(
                 curr_tuple_sort = curr_tuple.SORT
                 prev_tuples = [prev_table[idx] for idx in curr_tuple.fathers]  # many-to-one mapping, e.g., COUNT(...)
                 prev_tuple_sorts = [t.SORT for t in prev_tuples]
-                group_function = lambda x, **kwargs: formulas.group_function(x, IntVal(str(idx)))
+                group_function = lambda x, **kwargs: partition(x, IntVal(str(idx)))
 
                 first_non_deleted_tuple_sort = None
                 last_non_deleted_tuple_sort = None
@@ -1295,7 +1350,7 @@ And(
     ),
 )
 """
-                implication = CodeSnippet(code=code, docstring=str(curr_tuple), docstring_first=True,
+                implication = CodeSnippet(code=code, docstring=curr_tuple, docstring_first=True,
                                           code_string=_code_string)
                 self.scope.register_formulas(formulas=implication)
                 curr_tuple = DumpTuple(
@@ -1358,39 +1413,76 @@ And(
                                  docstring_first=True, code_string=_code_string)
         return sorted_tuples, constraint
 
-    @visitor(FOrderByTable)
-    def visit(self, formulas: FOrderByTable, **kwargs) -> Dict:
-        prev_table = self.visit(formulas.fathers[0])
-        if not formulas.is_correlated_subquery and formulas.fathers[0].is_correlated_subquery:
-            # attach correlated subquery's tuples to projection
-            prev_table = self.attach_tuples(prev_table)
-        constraint = []  # generate constraint over those Map tuples
-
-        # 1) move DELETED tuples to the table end
-        sorted_tuples = [t.SORT for t in prev_table.values()]
-        for idx in range(len(sorted_tuples)):
-            new_tuple = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
-            constraint.append(new_tuple == sorted_tuples[idx])
-            sorted_tuples[idx] = new_tuple
+    def _sort_tuples(self, tuple_sorts, prefix, swap_func=None, same_func=None):
+        """
+        stably sort tuples with `SORT_ENCODING.NETWORK` or `SORT_ENCODING.PERMUTATION`
+        deleted tuples go to the tail; others are ordered by `swap_func` (x should go behind y) and
+        ties under `same_func` keep their input order, which is the result of two bubble-sort passes
+        """
 
-        for j in range(len(formulas)):
-            for idx in range(len(formulas) - j - 1):
-                x, y = sorted_tuples[idx], sorted_tuples[idx + 1]
-                _x = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
-                _y = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
+        def _behind(x, y, pos_x, pos_y):
+            both_deleted = And(self._DEL(x), self._DEL(y))
+            both_alive = And(Not(self._DEL(x)), Not(self._DEL(y)))
+            if same_func is not None:
+                both_alive = And(both_alive, same_func(x, y))
+            conds = [And(self._DEL(x), Not(self._DEL(y)))]
+            if swap_func is not None:
+                conds.append(swap_func(x, y))
+            conds.append(And(Or(both_deleted, both_alive), pos_x > pos_y))
+            return Or(*conds)
 
+        constraint = []
+        sorted_tuples = list(tuple_sorts)
+        if self.scope.sort_encoding == SORT_ENCODING.PERMUTATION:
+            size = len(sorted_tuples)
+            # matrix[i][j] <=> the i-th output tuple is the j-th input tuple
+            matrix_name = f'{prefix}{self.scope._get_new_tuple_name()}__perm'
+            matrix = [
+                [self.scope._declare_auxiliary_value(f'{matrix_name}_{i}_{j}', self.scope.BooleanSort)
+                 for j in range(size)]
+                for i in range(size)
+            ]
+            for i in range(size):
+                constraint.append(Sum(*[If(matrix[i][j], Z3_1, Z3_0) for j in range(size)]) == Z3_1)
+                constraint.append(Sum(*[If(matrix[j][i], Z3_1, Z3_0) for j in range(size)]) == Z3_1)
+            positions = []
+            for i in range(size):
+                new_tuple = self.scope._declare_tuple_sort(f'{prefix}{self.scope._get_new_tuple_name()}')
+                constraint.extend([Implies(matrix[i][j], new_tuple == tuple_sorts[j]) for j in range(size)])
+                positions.append(Sum(*[If(matrix[i][j], IntVal(str(j)), Z3_0) for j in range(size)]))
+                sorted_tuples[i] = new_tuple
+            for i in range(size - 1):
+                constraint.append(
+                    Not(_behind(sorted_tuples[i], sorted_tuples[i + 1], positions[i], positions[i + 1]))
+                )
+        else:
+            positions = [IntVal(str(idx)) for idx in range(len(sorted_tuples))]
+            for i, j in odd_even_merge_sort_network(len(sorted_tuples)):
+                x, y = sorted_tuples[i], sorted_tuples[j]
+                _x = self.scope._declare_tuple_sort(f'{prefix}{self.scope._get_new_tuple_name()}')
+                _y = self.scope._declare_tuple_sort(f'{prefix}{self.scope._get_new_tuple_name()}')
+                swap_cond = _behind(x, y, positions[i], positions[j])
+                # fresh position variables keep the formulas (and the generated script) linear in size
+                _pos_x = self.scope._declare_auxiliary_value(f'{_x}__pos', self.scope.VarSort)
+                _pos_y = self.scope._declare_auxiliary_value(f'{_y}__pos', self.scope.VarSort)
                 constraint.append(
                     If(
-                        And(self._DEL(x), Not(self._DEL(y))),
-                        And(_x == y, _y == x),
-                        And(_x == x, _y == y),
+                        swap_cond,
+                        And(_x == y, _y == x, _pos_x == positions[j], _pos_y == positions[i]),
+                        And(_x == x, _y == y, _pos_x == positions[i], _pos_y == positions[j]),
                     )
                 )
+                sorted_tuples[i], sorted_tuples[j] = _x, _y
+                positions[i], positions[j] = _pos_x, _pos_y
+        return sorted_tuples, constraint
 
-                sorted_tuples[idx] = _x
-                sorted_tuples[idx + 1] = _y
-
-        # 2) swap by keys and their ascending rules
+    @visitor(FOrderByTable)
+    def visit(self, formulas: FOrderByTable, **kwargs) -> Dict:
+        prev_table = self.visit(formulas.fathers[0])
+        if not formulas.is_correlated_subquery and formulas.fathers[0].is_correlated_subquery:
+            # attach correlated subquery's tuples to projection
+            prev_table = self.attach_tuples(prev_table)
+        # swap by keys and their ascending rules
         order_keys = formulas.keys
 
         def _swap(x, y):
@@ -1431,23 +1523,62 @@ And(
             swap_cond = simplify(swap_cond, operator=Or)
             return swap_cond
 
-        for j in range(len(sorted_tuples)):
-            for idx in range(len(sorted_tuples) - j - 1):
-                x, y = sorted_tuples[idx], sorted_tuples[idx + 1]
-                _x = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
-                _y = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
+        def _same(x, y):
+            same_cond = []
+            for attribute in order_keys:
+                attr_x = self.visit(attribute)(x)
+                attr_y = self.visit(attribute)(y)
+                same_cond.append(encode_same(attr_x.NULL, attr_y.NULL, attr_x.VALUE, attr_y.VALUE))
+            return simplify(same_cond, operator=And)
 
-                constraint.append(
-                    # swapping is stricter than not swapping
-                    If(
-                        _swap(x, y),
-                        And(_x == y, _y == x),
-                        And(_x == x, _y == y),  # keep the same order
+        if self.scope.sort_encoding == SORT_ENCODING.BUBBLE:
+            constraint = []  # generate constraint over those Map tuples
+            # 1) move DELETED tuples to the table end
+            sorted_tuples = [t.SORT for t in prev_table.values()]
+            for idx in range(len(sorted_tuples)):
+                new_tuple = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
+                constraint.append(new_tuple == sorted_tuples[idx])
+                sorted_tuples[idx] = new_tuple
+
+            for j in range(len(formulas)):
+                for idx in range(len(formulas) - j - 1):
+                    x, y = sorted_tuples[idx], sorted_tuples[idx + 1]
+                    _x = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
+                    _y = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
+
+                    constraint.append(
+                        If(
+                            And(self._DEL(x), Not(self._DEL(y))),
+                            And(_x == y, _y == x),
+                            And(_x == x, _y == y),
+                        )
                     )
-                )
 
-                sorted_tuples[idx] = _x
-                sorted_tuples[idx + 1] = _y
+                    sorted_tuples[idx] = _x
+                    sorted_tuples[idx + 1] = _y
+
+            # 2) swap by keys and their ascending rules
+            for j in range(len(sorted_tuples)):
+                for idx in range(len(sorted_tuples) - j - 1):
+                    x, y = sorted_tuples[idx], sorted_tuples[idx + 1]
+                    _x = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
+                    _y = self.scope._declare_tuple_sort(f'_orderby_{self.scope._get_new_tuple_name()}')
+
+                    constraint.append(
+                        # swapping is stricter than not swapping
+                        If(
+                            _swap(x, y),
+                            And(_x == y, _y == x),
+                            And(_x == x, _y == y),  # keep the same order
+                        )
+                    )
+
+                    sorted_tuples[idx] = _x
+                    sorted_tuples[idx + 1] = _y
+        else:
+            sorted_tuples, constraint = self._sort_tuples(
+                [t.SORT for t in prev_table.values()], prefix='_orderby_', swap_func=_swap, same_func=_same,
+            )
 
         if self.scope._script_writer is None:
             _code_string = None
@@ -1468,7 +1599,7 @@ And(
             else:
                 curr_tuple_sort = self.scope._get_tuple_sort(curr_tuple.name)
                 implication = CodeSnippet(code=curr_tuple_sort == sorted_tuples[idx],
-                                          docstring=str(curr_tuple), docstring_first=True)
+                                          docstring=curr_tuple, docstring_first=True)
                 self.scope.register_formulas(formulas=implication)
                 curr_tuple = DumpTuple(
                     name=curr_tuple.name, sort=curr_tuple_sort,
@@ -1489,30 +1620,33 @@ And(
     def visit(self, formulas: FLimitTable, **kwargs) -> Dict:
         prev_table = self.visit(formulas.fathers[0])
         if formulas.drop_deleted_tuples:
-            constraint = []
-            # 1) move DELETED tuples to the table end
-            sorted_tuples = [t.SORT for t in prev_table.values()]
-            for idx in range(len(sorted_tuples)):
-                new_tuple = self.scope._declare_tuple_sort(f'_limit_{self.scope._get_new_tuple_name()}')
-                constraint.append(new_tuple == sorted_tuples[idx])
-                sorted_tuples[idx] = new_tuple
-
-            for j in range(len(prev_table)):
-                for idx in range(len(prev_table) - j - 1):
-                    x, y = sorted_tuples[idx], sorted_tuples[idx + 1]
-                    _x = self.scope._declare_tuple_sort(f'_limit_{self.scope._get_new_tuple_name()}')
-                    _y = self.scope._declare_tuple_sort(f'_limit_{self.scope._get_new_tuple_name()}')
-
-                    constraint.append(
-                        If(
-                            And(self._DEL(x), Not(self._DEL(y))),
-                            And(_x == y, _y == x),
-                            And(_x == x, _y == y),
+            if self.scope.sort_encoding == SORT_ENCODING.BUBBLE:
+                constraint = []
+                # 1) move DELETED tuples to the table end
+                sorted_tuples = [t.SORT for t in prev_table.values()]
+                for idx in range(len(sorted_tuples)):
+                    new_tuple = self.scope._declare_tuple_sort(f'_limit_{self.scope._get_new_tuple_name()}')
+                    constraint.append(new_tuple == sorted_tuples[idx])
+                    sorted_tuples[idx] = new_tuple
+
+                for j in range(len(prev_table)):
+                    for idx in range(len(prev_table) - j - 1):
+                        x, y = sorted_tuples[idx], sorted_tuples[idx + 1]
+                        _x = self.scope._declare_tuple_sort(f'_limit_{self.scope._get_new_tuple_name()}')
+                        _y = self.scope._declare_tuple_sort(f'_limit_{self.scope._get_new_tuple_name()}')
+
+                        constraint.append(
+                            If(
+                                And(self._DEL(x), Not(self._DEL(y))),
+                                And(_x == y, _y == x),
+                                And(_x == x, _y == y),
+                            )
                         )
-                    )
 
-                    sorted_tuples[idx] = _x
-                    sorted_tuples[idx + 1] = _y
+                        sorted_tuples[idx] = _x
+                        sorted_tuples[idx + 1] = _y
+            else:
+                sorted_tuples, constraint = self._sort_tuples([t.SORT for t in prev_table.values()], prefix='_limit_')
             # register constraint of dropping the deleted tuples to the end of the table
             if self.scope._script_writer is None:
                 _code_string = None
@@ -1536,7 +1670,7 @@ And(
                     curr_tuple_sort = curr_tuple.SORT
                     implication = CodeSnippet(
                         code=curr_tuple_sort == sorted_tuples[prev_index],
-                        docstring=str(curr_tuple), docstring_first=True,
+                        docstring=curr_tuple, docstring_first=True,
                     )
                     self.scope.register_formulas(formulas=implication)
                     curr_tuple = DumpTuple(
@@ -1717,7 +1851,7 @@ And(
                     ),
                     Implies(Not(premise), self._DEL(curr_tuple_sort)),
                 ])
-                implication = CodeSnippet(code=code, docstring=str(curr_tuple), docstring_first=True)
+                implication = CodeSnippet(code=code, docstring=curr_tuple, docstring_first=True)
                 self.scope.register_formulas(formulas=implication)
                 curr_tuple = DumpTuple(
                     name=curr_tuple.name, sort=curr_tuple_sort, attributes=curr_attributes,
@@ -2200,13 +2334,8 @@ And(
             if str(formulas) in outer_kwargs.get('outer_attrs', {}):
                 return outer_kwargs['outer_attrs'][str(formulas)]
             else:
-                NULL = formulas.NULL(args)
-                if kwargs.get('pity_flag', False):
-                    NULL = Or(NULL, self._DEL(args))
-                return FExpressionTuple(
-                    NULL=NULL,
-                    VALUE=formulas.VALUE(args),
-                )
+                NULL, VALUE = self.scope.attribute_terms(formulas, args, kwargs.get('pity_flag', False))
+                return FExpressionTuple(NULL=NULL, VALUE=VALUE)
 
         return _f
 